@@ -1,21 +1,46 @@
 from __future__ import annotations
 
-import hashlib
+import asyncio
+import queue
 import re
+import threading
 import uuid
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
 
 import structlog
 
+from schemachange.action.lint import log_lock_hazards
+from schemachange.common.checksum import (
+    checksum_matches,
+    file_checksum_matches,
+    get_checksum,
+    get_file_checksum,
+)
 from schemachange.common.utils import validate_script_content
 from schemachange.config.deploy_config import DeployConfig
 from schemachange.jinja.jinja_template_processor import JinjaTemplateProcessor
+from schemachange.session.async_base import AsyncBaseSession
 from schemachange.session.base import ApplyStatus, BaseSession
+from schemachange.session.change_history import parse_statement_indexes
+from schemachange.session.lock_hazard import lint_script_content
+from schemachange.session.object_references import get_script_objects
+from schemachange.session.result_set import ResultRow, ResultSet
 from schemachange.session.script import (
     DEPLOYABLE_SCRIPT_TYPES,
+    AlwaysScript,
+    RepeatableScript,
+    Script,
     ScriptType,
+    SeedScript,
+    VersionedScript,
     get_all_scripts_recursively,
+    get_script_headers,
 )
+from schemachange.session.script_graph import ScriptGraph, get_depends_on
 
 
 def alphanum_convert(text: str):
@@ -39,179 +64,736 @@ def sorted_alphanumeric(data):
     return sorted(data, key=get_alphanum_key)
 
 
-def deploy(
-    config: DeployConfig, db_session: BaseSession, logger: structlog.BoundLogger
-):
-    batch_id = str(uuid.uuid4())
-    logger.info(
-        "Starting deploy",
-        dry_run=config.dry_run,
+def rerecord_legacy_checksum(
+    db_session: BaseSession,
+    script_name: str,
+    script_type: str,
+    checksum: str,
+    checksum_current: str,
+    dry_run: bool,
+    logger: structlog.BoundLogger,
+) -> None:
+    # Unchanged scripts recorded with another checksum algorithm (e.g. legacy bare sha224)
+    # are re-recorded with the configured one, so the next run compares them directly
+    logger.debug(
+        "Re-recording script checksum with the configured algorithm",
+        checksum=checksum,
+        checksum_current=checksum_current,
+    )
+    if dry_run:
+        return
+    db_session.update_script_checksum(
+        script_name=script_name,
+        script_type=script_type,
+        checksum=checksum,
+        checksum_current=checksum_current,
+    )
+
+
+def get_resume_state(
+    db_session: BaseSession, batch_id: str
+) -> Tuple[Dict[str, str], Dict[str, ResultRow]]:
+    """
+    Returns the checksums of the scripts applied by a failed or killed batch, and the
+    checkpoints of its unfinished scripts by script name
+    """
+    return check_resume_state(
         batch_id=batch_id,
-        change_history_table=db_session.change_history_table.fully_qualified,
-        autocommit=db_session.autocommit,
-        db_type=db_session.db_type,
-        connections_info=db_session.connections_info,
+        batch_data=db_session.get_batch_by_id(batch_id=batch_id),
+        checkpoints=db_session.fetch_checkpoints(batch_id=batch_id),
     )
 
-    try:
-        if config.force:
-            logger.info(
-                "Running aggressive deployment mode for versioned scripts",
-                from_version=config.from_version,
-                to_version=config.to_version,
+
+def check_resume_state(
+    batch_id: str, batch_data: ResultSet, checkpoints: List[ResultRow]
+) -> Tuple[Dict[str, str], Dict[str, ResultRow]]:
+    if not batch_data and not checkpoints:
+        raise ValueError(f"Nothing to resume for batch {batch_id}")
+    # A batch left in progress was stopped without being marked failed, e.g. killed
+    for batch_status in batch_data.iter_values("batch_status"):
+        if batch_status[0] not in (ApplyStatus.FAILED, ApplyStatus.IN_PROGRESS):
+            raise ValueError(
+                f"Batch {batch_id} cannot be resumed, its status is {batch_status[0]}"
             )
+    applied_scripts = dict(batch_data.iter_values("script", "checksum"))
+    return applied_scripts, {
+        checkpoint["script"]: checkpoint for checkpoint in checkpoints
+    }
 
-        (
-            versioned_scripts,
-            r_scripts_checksum,
-            max_published_version,
-        ) = db_session.get_script_metadata(
-            create_change_history_table=config.create_change_history_table,
-            dry_run=config.dry_run,
+
+def script_checksum_matches(
+    script: VersionedScript | RepeatableScript | AlwaysScript,
+    stored_checksum: str | None,
+    content: str,
+) -> bool:
+    """
+    Compares the script against a stored checksum, using the algorithm it was recorded
+    with. Seed files are compared by their bytes, their rendered content is empty
+    """
+    if script.type == ScriptType.SEED:
+        return file_checksum_matches(
+            stored_checksum=stored_checksum, file_path=script.file_path
         )
+    return checksum_matches(stored_checksum=stored_checksum, content=content)
 
-        max_published_version = get_alphanum_key(max_published_version)
 
-        # Find all scripts in the root folder (recursively) and sort them correctly
-        all_scripts = get_all_scripts_recursively(
-            root_directory=config.root_folder,
+def verify_resumed_checksum(
+    script: VersionedScript | RepeatableScript | AlwaysScript,
+    checksum: str,
+    checksum_current: str,
+    content: str,
+) -> None:
+    if checksum != checksum_current and not script_checksum_matches(
+        script=script, stored_checksum=checksum, content=content
+    ):
+        raise ValueError(
+            f"Script {script.name} has changed since the batch failed, it cannot be resumed"
         )
-        all_script_names = list(all_scripts.keys())
-        # Sort scripts such that versioned scripts get applied first and then the repeatable ones.
-        all_script_names_sorted = (
-            sorted_alphanumeric(
-                [
-                    script
-                    for script in all_script_names
-                    if script[0] == ScriptType.VERSIONED.lower()
-                ]
-            )
-            + sorted_alphanumeric(
-                [
-                    script
-                    for script in all_script_names
-                    if script[0] == ScriptType.REPEATABLE.lower()
-                ]
+
+
+@dataclass(frozen=True)
+class DeployState:
+    """Change history read at the start of a deploy, which the scripts are planned against"""
+
+    versioned_scripts: Dict[str, Dict[str, str | int]]
+    r_scripts_checksum: Dict[str, List[str]]
+    max_published_version: List
+    applied_scripts: Dict[str, str]
+    # Checkpoints of the scripts of the resumed batch that failed, by script name
+    checkpoints: Dict[str, ResultRow]
+
+
+@dataclass(frozen=True)
+class ScriptPlan:
+    """What a deploy does with a script: skip it, or apply it from a statement"""
+
+    script: VersionedScript | RepeatableScript | AlwaysScript | SeedScript
+    content: str
+    checksum: str
+    apply: bool
+    start_statement_index: int = 0
+    # Lower key of the chunk to resume a chunked script from
+    start_chunk_key: int | None = None
+    # Statements after the start statement applied by a parallel block, not run again
+    completed_statements: Tuple[int, ...] = ()
+    # Checksum of the unchanged script recorded with another algorithm, to re-record
+    legacy_checksum: str | None = None
+
+
+def get_deploy_scripts(
+    root_folder: Path,
+) -> List[VersionedScript | RepeatableScript | AlwaysScript | SeedScript]:
+    """
+    Deployable scripts in apply order: versioned scripts, then seed files,
+    repeatable scripts and always scripts
+    """
+    # Find all scripts in the root folder (recursively) and sort them correctly
+    all_scripts = get_all_scripts_recursively(
+        root_directory=root_folder,
+    )
+    all_script_names = list(all_scripts.keys())
+    # Sort scripts such that versioned scripts get applied first and then the repeatable ones.
+    all_script_names_sorted = (
+        sorted_alphanumeric(
+            [
+                script
+                for script in all_script_names
+                if script[0] == ScriptType.VERSIONED.lower()
+            ]
+        )
+        + sorted_alphanumeric(
+            [
+                script
+                for script in all_script_names
+                if script[0] == ScriptType.SEED.lower()
+            ]
+        )
+        + sorted_alphanumeric(
+            [
+                script
+                for script in all_script_names
+                if script[0] == ScriptType.REPEATABLE.lower()
+            ]
+        )
+        + sorted_alphanumeric(
+            [
+                script
+                for script in all_script_names
+                if script[0] == ScriptType.ALWAYS.lower()
+            ]
+        )
+    )
+    return [
+        all_scripts[script_name]
+        for script_name in all_script_names_sorted
+        if all_scripts[script_name].type in DEPLOYABLE_SCRIPT_TYPES
+    ]
+
+
+def get_script_logger(
+    script: VersionedScript | RepeatableScript | AlwaysScript,
+    logger: structlog.BoundLogger,
+) -> structlog.BoundLogger:
+    return logger.bind(
+        # The logging keys will be sorted alphabetically.
+        # Appending 'a' is a lazy way to get the script name to appear at the start of the log
+        a_script_name=script.name,
+        script_version=getattr(script, "version", "N/A"),
+    )
+
+
+def render_script(
+    script: VersionedScript | RepeatableScript | AlwaysScript,
+    config: DeployConfig,
+) -> Tuple[str, str]:
+    """Renders the script, returns its content and checksum"""
+    if script.type == ScriptType.SEED:
+        # Seed files are loaded as is, their checksum is the one of the file
+        return "", get_file_checksum(
+            file_path=script.file_path, algorithm=config.checksum_algorithm
+        )
+    # Always process with jinja engine
+    jinja_processor = JinjaTemplateProcessor(
+        project_root=config.root_folder, modules_folder=config.modules_folder
+    )
+    content = jinja_processor.render(
+        jinja_processor.relpath(script.file_path),
+        config.config_vars,
+    )
+    return content, get_checksum(content=content, algorithm=config.checksum_algorithm)
+
+
+def classify_script(
+    script: VersionedScript | RepeatableScript | AlwaysScript,
+    content: str,
+    checksum_current: str,
+    config: DeployConfig,
+    state: DeployState,
+    db_type: str,
+    logger: structlog.BoundLogger,
+) -> ScriptPlan:
+    """Decides from the change history whether the rendered script is applied"""
+    script_type = script.type
+    skip = ScriptPlan(
+        script=script, content=content, checksum=checksum_current, apply=False
+    )
+
+    # Scripts applied by the resumed batch are skipped, the failed one continues
+    # from its checkpoint, provided none of them changed since
+    checkpoint = state.checkpoints.get(script.name)
+    is_checkpoint_script = checkpoint is not None
+    start_statement_index = 0
+    start_chunk_key = None
+    completed_statements: Tuple[int, ...] = ()
+    if script.name in state.applied_scripts:
+        verify_resumed_checksum(
+            script=script,
+            checksum=state.applied_scripts[script.name],
+            checksum_current=checksum_current,
+            content=content,
+        )
+        logger.debug("Skipping script applied by the resumed batch")
+        return skip
+    if is_checkpoint_script:
+        verify_resumed_checksum(
+            script=script,
+            checksum=checkpoint["checksum"],
+            checksum_current=checksum_current,
+            content=content,
+        )
+        start_statement_index = int(checkpoint["statement_index"])
+        if checkpoint.get("chunk_key") is not None:
+            start_chunk_key = int(checkpoint["chunk_key"])
+        completed_statements = tuple(
+            parse_statement_indexes(value=checkpoint.get("completed_statements"))
+        )
+
+    max_published_version = state.max_published_version
+    # Apply a versioned-change script only if the version is newer than the most recent change in the database
+    # Apply any other scripts, i.e. repeatable scripts, irrespective of the most recent change in the database
+    if script_type == ScriptType.VERSIONED and not is_checkpoint_script:
+        script_metadata = state.versioned_scripts.get(script.name)
+        script_version = script.version
+
+        if config.force:
+            if (
+                get_alphanum_key(script_version) < get_alphanum_key(config.from_version)
+            ) or (
+                get_alphanum_key(script_version) > get_alphanum_key(config.to_version)
+            ):
+                logger.debug(
+                    "Skipping versioned script because it's not in aggressive deployment version range",
+                    script_version=script_version,
+                )
+                return skip
+        else:
+            if (
+                max_published_version is not None
+                and get_alphanum_key(script_version) <= max_published_version
+            ):
+                if script_metadata is None:
+                    logger.debug(
+                        "Skipping versioned script because it's older than the most recently applied change",
+                        max_published_version=max_published_version,
+                    )
+                    return skip
+                logger.debug(
+                    "Script has already been applied",
+                    max_published_version=max_published_version,
+                )
+                checksum_last = script_metadata["checksum"]
+                if checksum_last != checksum_current:
+                    if checksum_matches(stored_checksum=checksum_last, content=content):
+                        return replace(skip, legacy_checksum=checksum_last)
+                    logger.info("Script checksum has drifted since application")
+
+                return skip
+
+    # Apply only R scripts and seed files where the checksum changed compared to the last execution of snowchange
+    if (
+        script_type in (ScriptType.REPEATABLE, ScriptType.SEED)
+        and not is_checkpoint_script
+    ):
+        # check if R file was already executed
+        if (
+            state.r_scripts_checksum is not None
+        ) and script.name in state.r_scripts_checksum:
+            checksum_last = state.r_scripts_checksum[script.name][0]
+        else:
+            checksum_last = ""
+
+        # check if there is a change of the checksum in the script
+        if checksum_current == checksum_last:
+            logger.debug(
+                "Skipping change script because there is no change since the last execution"
             )
-            + sorted_alphanumeric(
-                [
-                    script
-                    for script in all_script_names
-                    if script[0] == ScriptType.ALWAYS.lower()
-                ]
+            return skip
+        elif script_checksum_matches(
+            script=script, stored_checksum=checksum_last, content=content
+        ):
+            logger.debug(
+                "Skipping change script because there is no change since the last execution"
             )
+            return replace(skip, legacy_checksum=checksum_last)
+
+    if script_type == ScriptType.SEED:
+        return replace(skip, apply=True)
+
+    validate_script_content(script_name=script.name, script_content=content)
+    if config.dry_run:
+        log_lock_hazards(
+            lock_hazards=lint_script_content(script_content=content, db_type=db_type),
+            logger=logger,
         )
+    return replace(
+        skip,
+        apply=True,
+        start_statement_index=start_statement_index,
+        start_chunk_key=start_chunk_key,
+        completed_statements=completed_statements,
+    )
 
-        scripts_skipped = 0
-        scripts_applied = 0
 
-        # Loop through each script in order and apply any required changes
-        for script_name in all_script_names_sorted:
-            script = all_scripts[script_name]
-            script_type = script.type
+# Seconds the planning thread waits for room in the queue before checking it was stopped
+PLANNING_POLL_INTERVAL = 0.1
+_PLANNING_DONE = object()
+
+
+@contextmanager
+def planned_scripts(
+    scripts: List[VersionedScript | RepeatableScript | AlwaysScript],
+    config: DeployConfig,
+    state: Future[DeployState],
+    db_type: str,
+    logger: structlog.BoundLogger,
+) -> Iterator[Iterator[Tuple[structlog.BoundLogger, ScriptPlan]]]:
+    """
+    Yields the plans of the scripts in apply order. They are rendered by a thread running
+    up to render_ahead scripts ahead of the one being applied, so rendering overlaps the
+    database round trips, and classified as they are handed out. The rendering does not
+    wait for the change history the scripts are classified against, which is still
+    being read. A planning error surfaces when its script is reached
+    """
+
+    def render(script) -> Tuple[Script, structlog.BoundLogger, str, str]:
+        script_log = get_script_logger(script=script, logger=logger)
+        content, checksum = render_script(script=script, config=config)
+        return script, script_log, content, checksum
+
+    def classify(
+        rendered: Tuple[Script, structlog.BoundLogger, str, str],
+    ) -> Tuple[structlog.BoundLogger, ScriptPlan]:
+        script, script_log, content, checksum = rendered
+        return script_log, classify_script(
+            script=script,
+            content=content,
+            checksum_current=checksum,
+            config=config,
+            state=state.result(),
+            db_type=db_type,
+            logger=script_log,
+        )
+
+    if config.render_ahead < 1:
+        yield (classify(render(script)) for script in scripts)
+        return
+
+    plans: queue.Queue = queue.Queue(maxsize=config.render_ahead)
+    stopped = threading.Event()
 
-            if script_type not in DEPLOYABLE_SCRIPT_TYPES:
+    def put(item) -> bool:
+        # The consumer stops taking plans when a script fails, the thread then gives up
+        while not stopped.is_set():
+            try:
+                plans.put(item, timeout=PLANNING_POLL_INTERVAL)
+                return True
+            except queue.Full:
                 continue
+        return False
 
-            script_log = logger.bind(
-                # The logging keys will be sorted alphabetically.
-                # Appending 'a' is a lazy way to get the script name to appear at the start of the log
-                a_script_name=script.name,
-                script_version=getattr(script, "version", "N/A"),
-            )
-            # Always process with jinja engine
-            jinja_processor = JinjaTemplateProcessor(
-                project_root=config.root_folder, modules_folder=config.modules_folder
-            )
-            content = jinja_processor.render(
-                jinja_processor.relpath(script.file_path),
-                config.config_vars,
+    def produce() -> None:
+        for script in scripts:
+            try:
+                item = render(script)
+            except Exception as e:
+                put(e)
+                return
+            if not put(item):
+                return
+        put(_PLANNING_DONE)
+
+    def consume() -> Iterator[Tuple[structlog.BoundLogger, ScriptPlan]]:
+        while True:
+            item = plans.get()
+            if item is _PLANNING_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield classify(item)
+
+    producer = threading.Thread(
+        target=produce, name="schemachange-planner", daemon=True
+    )
+    producer.start()
+    try:
+        yield consume()
+    finally:
+        stopped.set()
+        producer.join()
+
+
+def run_script_plan(
+    plan: ScriptPlan,
+    config: DeployConfig,
+    db_session: BaseSession,
+    batch_id: str,
+    logger: structlog.BoundLogger,
+) -> None:
+    if plan.legacy_checksum is not None:
+        rerecord_legacy_checksum(
+            db_session=db_session,
+            script_name=plan.script.name,
+            script_type=plan.script.type,
+            checksum=plan.legacy_checksum,
+            checksum_current=plan.checksum,
+            dry_run=config.dry_run,
+            logger=logger,
+        )
+    if not plan.apply:
+        return
+    if plan.script.type == ScriptType.SEED:
+        db_session.apply_seed_script(
+            script=plan.script,
+            checksum=plan.checksum,
+            dry_run=config.dry_run,
+            logger=logger,
+            batch_id=batch_id,
+            force=config.force,
+        )
+        return
+    db_session.apply_change_script(
+        script=plan.script,
+        script_content=plan.content,
+        dry_run=config.dry_run,
+        logger=logger,
+        batch_id=batch_id,
+        force=config.force,
+        start_statement_index=plan.start_statement_index,
+        start_chunk_key=plan.start_chunk_key,
+        completed_statements=plan.completed_statements,
+    )
+
+
+def run_pooled_script_plan(
+    plan: ScriptPlan,
+    config: DeployConfig,
+    db_session: BaseSession,
+    batch_id: str,
+    logger: structlog.BoundLogger,
+) -> None:
+    with db_session.pool.session() as session:
+        run_script_plan(
+            plan=plan,
+            config=config,
+            db_session=session,
+            batch_id=batch_id,
+            logger=logger,
+        )
+
+
+def get_script_graph(
+    scripts: List[VersionedScript | RepeatableScript | AlwaysScript | SeedScript],
+    config: DeployConfig,
+) -> ScriptGraph[Tuple[structlog.BoundLogger, ScriptPlan]]:
+    return ScriptGraph(scripts=scripts, infer_dependencies=config.infer_dependencies)
+
+
+def add_script_plan(
+    graph: ScriptGraph[Tuple[structlog.BoundLogger, ScriptPlan]],
+    script_log: structlog.BoundLogger,
+    plan: ScriptPlan,
+    config: DeployConfig,
+) -> None:
+    """Adds the planned script to the graph, with the dependencies of its content"""
+    graph.add(
+        name=plan.script.name,
+        item=(script_log, plan),
+        depends_on=get_depends_on(
+            headers=get_script_headers(script_content=plan.content)
+        ),
+        objects=(
+            get_script_objects(script_content=plan.content)
+            if config.infer_dependencies and plan.script.type == ScriptType.REPEATABLE
+            else None
+        ),
+    )
+
+
+def iter_ready_plans(
+    plans: Iterator[Tuple[structlog.BoundLogger, ScriptPlan]],
+    scripts: List[VersionedScript | RepeatableScript | AlwaysScript | SeedScript],
+    config: DeployConfig,
+) -> Iterator[Tuple[structlog.BoundLogger, ScriptPlan]]:
+    """
+    Yields the planned scripts one at a time, each once the scripts it depends on were
+    yielded and applied, see ScriptGraph
+    """
+    graph = get_script_graph(scripts=scripts, config=config)
+    for script_log, plan in plans:
+        add_script_plan(graph=graph, script_log=script_log, plan=plan, config=config)
+        ready = graph.pop_ready()
+        while ready:
+            for script_log, plan in ready:
+                yield script_log, plan
+                graph.mark_done(name=plan.script.name)
+            ready = graph.pop_ready()
+
+
+def apply_script_plans(
+    plans: Iterator[Tuple[structlog.BoundLogger, ScriptPlan]],
+    scripts: List[VersionedScript | RepeatableScript | AlwaysScript | SeedScript],
+    config: DeployConfig,
+    db_session: BaseSession,
+    batch_id: str,
+) -> Tuple[int, int]:
+    """
+    Applies each planned script once the scripts it depends on are done, see ScriptGraph.
+    With a parallelism above 1, up to parallelism scripts run at a time on sessions of
+    the connection pool, and once a script failed no other one starts: the error is
+    raised when the running scripts ended. Returns the numbers of applied and skipped scripts
+    """
+    scripts_applied = 0
+    scripts_skipped = 0
+
+    if config.parallelism <= 1:
+        for script_log, plan in iter_ready_plans(
+            plans=plans, scripts=scripts, config=config
+        ):
+            run_script_plan(
+                plan=plan,
+                config=config,
+                db_session=db_session,
+                batch_id=batch_id,
+                logger=script_log,
             )
+            if plan.apply:
+                scripts_applied += 1
+            else:
+                scripts_skipped += 1
+        return scripts_applied, scripts_skipped
 
-            checksum_current = hashlib.sha224(content.encode("utf-8")).hexdigest()
-
-            # Apply a versioned-change script only if the version is newer than the most recent change in the database
-            # Apply any other scripts, i.e. repeatable scripts, irrespective of the most recent change in the database
-            if script_type == ScriptType.VERSIONED:
-                script_metadata = versioned_scripts.get(script.name)
-                script_version = script.version
-
-                if config.force:
-                    if (
-                        get_alphanum_key(script_version)
-                        < get_alphanum_key(config.from_version)
-                    ) or (
-                        get_alphanum_key(script_version)
-                        > get_alphanum_key(config.to_version)
-                    ):
-                        script_log.debug(
-                            "Skipping versioned script because it's not in aggressive deployment version range",
-                            script_version=script_version,
-                        )
-                        scripts_skipped += 1
-                        continue
-                else:
-                    if (
-                        max_published_version is not None
-                        and get_alphanum_key(script_version) <= max_published_version
-                    ):
-                        if script_metadata is None:
-                            script_log.debug(
-                                "Skipping versioned script because it's older than the most recently applied change",
-                                max_published_version=max_published_version,
-                            )
-                            scripts_skipped += 1
-                            continue
-                        else:
-                            script_log.debug(
-                                "Script has already been applied",
-                                max_published_version=max_published_version,
-                            )
-                            if script_metadata["checksum"] != checksum_current:
-                                script_log.info(
-                                    "Script checksum has drifted since application"
-                                )
-
-                            scripts_skipped += 1
-                            continue
-
-            # Apply only R scripts where the checksum changed compared to the last execution of snowchange
-            if script_type == ScriptType.REPEATABLE:
-                # check if R file was already executed
-                if (
-                    r_scripts_checksum is not None
-                ) and script.name in r_scripts_checksum:
-                    checksum_last = r_scripts_checksum[script.name][0]
-                else:
-                    checksum_last = ""
+    graph = get_script_graph(scripts=scripts, config=config)
 
-                # check if there is a change of the checksum in the script
-                if checksum_current == checksum_last:
-                    script_log.debug(
-                        "Skipping change script because there is no change since the last execution"
-                    )
+    running: Dict[Future, ScriptPlan] = {}
+    errors: List[BaseException] = []
+
+    def collect(block: bool) -> None:
+        nonlocal scripts_applied, scripts_skipped
+        done, _ = wait(
+            running, timeout=None if block else 0, return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            plan = running.pop(future)
+            if future.exception() is not None:
+                errors.append(future.exception())
+                continue
+            graph.mark_done(name=plan.script.name)
+            if plan.apply:
+                scripts_applied += 1
+            else:
+                scripts_skipped += 1
+
+    def dispatch() -> None:
+        nonlocal scripts_skipped
+        ready = [] if errors else graph.pop_ready()
+        while ready:
+            for script_log, plan in ready:
+                if not plan.apply and plan.legacy_checksum is None:
+                    # Nothing to run for a skipped script
+                    graph.mark_done(name=plan.script.name)
                     scripts_skipped += 1
                     continue
+                future = executor.submit(
+                    run_pooled_script_plan,
+                    plan=plan,
+                    config=config,
+                    db_session=db_session,
+                    batch_id=batch_id,
+                    logger=script_log,
+                )
+                running[future] = plan
+            ready = graph.pop_ready()
 
-            validate_script_content(script_name=script.name, script_content=content)
-            db_session.apply_change_script(
-                script=script,
-                script_content=content,
-                dry_run=config.dry_run,
-                logger=script_log,
-                batch_id=batch_id,
-                force=config.force,
+    with ThreadPoolExecutor(
+        max_workers=config.parallelism, thread_name_prefix="schemachange-deploy"
+    ) as executor:
+        for script_log, plan in plans:
+            add_script_plan(
+                graph=graph, script_log=script_log, plan=plan, config=config
             )
+            collect(block=False)
+            dispatch()
+            if errors:
+                break
+        while running:
+            collect(block=True)
+            dispatch()
+    if errors:
+        raise errors[0]
+    return scripts_applied, scripts_skipped
+
+
+def create_deploy_state(
+    script_metadata: Tuple[Dict[str, Dict[str, str | int]], Dict[str, List[str]], Any],
+    resume_state: Tuple[Dict[str, str], Dict[str, ResultRow]] = ({}, {}),
+) -> DeployState:
+    """
+    Deploy state from the script metadata of the change history, and the resume state
+    of the resumed batch
+    """
+    versioned_scripts, r_scripts_checksum, max_published_version = script_metadata
+    applied_scripts, checkpoints = resume_state
+    return DeployState(
+        versioned_scripts=versioned_scripts,
+        r_scripts_checksum=r_scripts_checksum,
+        max_published_version=get_alphanum_key(max_published_version),
+        applied_scripts=applied_scripts,
+        checkpoints=checkpoints,
+    )
+
+
+def get_deploy_state(
+    config: DeployConfig, db_session: BaseSession, batch_id: str
+) -> DeployState:
+    """Reads the change history the scripts are planned against, connecting first"""
+    script_metadata = db_session.get_script_metadata(
+        create_change_history_table=config.create_change_history_table,
+        dry_run=config.dry_run,
+    )
+    if not config.resume_batch_id:
+        return create_deploy_state(script_metadata=script_metadata)
+    return create_deploy_state(
+        script_metadata=script_metadata,
+        resume_state=get_resume_state(db_session=db_session, batch_id=batch_id),
+    )
+
+
+def start_deploy(
+    config: DeployConfig,
+    db_session: BaseSession | AsyncBaseSession,
+    logger: structlog.BoundLogger,
+) -> str:
+    """Logs the start of the deploy, returns the id of its batch"""
+    # A resumed batch keeps its id, so its scripts are marked successful together
+    batch_id = config.resume_batch_id or str(uuid.uuid4())
+    logger.info(
+        "Starting deploy",
+        dry_run=config.dry_run,
+        batch_id=batch_id,
+        resume=config.resume_batch_id is not None,
+        change_history_table=db_session.change_history_table.fully_qualified,
+        autocommit=db_session.autocommit,
+        db_type=db_session.db_type,
+        connections_info=db_session.connections_info,
+    )
+    if config.force:
+        logger.info(
+            "Running aggressive deployment mode for versioned scripts",
+            from_version=config.from_version,
+            to_version=config.to_version,
+        )
+    return batch_id
+
+
+def deploy(
+    config: DeployConfig, db_session: BaseSession, logger: structlog.BoundLogger
+):
+    batch_id = start_deploy(config=config, db_session=db_session, logger=logger)
 
-            scripts_applied += 1
+    try:
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="schemachange-connect"
+        ) as executor:
+            # Connecting and reading the change history overlap the discovery
+            # and the rendering of the scripts
+            deploy_state = executor.submit(
+                get_deploy_state,
+                config=config,
+                db_session=db_session,
+                batch_id=batch_id,
+            )
+            scripts = get_deploy_scripts(root_folder=config.root_folder)
+            # Loop through each script in order and apply any required changes,
+            # while the next scripts are rendered and classified
+            with planned_scripts(
+                scripts=scripts,
+                config=config,
+                state=deploy_state,
+                db_type=db_session.db_type,
+                logger=logger,
+            ) as plans:
+                # The session is used by this thread only once the change history is read
+                state = deploy_state.result()
+                scripts_applied, scripts_skipped = apply_script_plans(
+                    plans=plans,
+                    scripts=scripts,
+                    config=config,
+                    db_session=db_session,
+                    batch_id=batch_id,
+                )
 
         db_session.update_batch_status(
             batch_id=batch_id, batch_status=ApplyStatus.SUCCESS
         )
+        if state.checkpoints and not config.dry_run:
+            db_session.delete_checkpoint(batch_id=batch_id)
         logger.info(
             "Completed successfully",
             scripts_applied=scripts_applied,
             scripts_skipped=scripts_skipped,
+            liveness_probes=db_session.liveness_probes,
+            reconnects=db_session.reconnects,
+            throttled_time=round(db_session.throttle.throttled_time, 1),
         )
         db_session.close()
     except Exception as e:
@@ -220,3 +802,130 @@ def deploy(
         )
         db_session.close()
         raise Exception("Deploy failed") from e
+
+
+async def run_script_plan_async(
+    plan: ScriptPlan,
+    config: DeployConfig,
+    db_session: AsyncBaseSession,
+    batch_id: str,
+    logger: structlog.BoundLogger,
+) -> None:
+    """run_script_plan on an asynchronous session"""
+    if plan.legacy_checksum is not None:
+        logger.debug(
+            "Re-recording script checksum with the configured algorithm",
+            checksum=plan.legacy_checksum,
+            checksum_current=plan.checksum,
+        )
+        if not config.dry_run:
+            await db_session.update_script_checksum(
+                script_name=plan.script.name,
+                script_type=plan.script.type,
+                checksum=plan.legacy_checksum,
+                checksum_current=plan.checksum,
+            )
+    if not plan.apply:
+        return
+    if plan.script.type == ScriptType.SEED:
+        raise ValueError(
+            f"Seed file {plan.script.name} is not supported by deploy_async"
+        )
+    await db_session.apply_change_script(
+        script=plan.script,
+        script_content=plan.content,
+        dry_run=config.dry_run,
+        logger=logger,
+        batch_id=batch_id,
+        force=config.force,
+        start_statement_index=plan.start_statement_index,
+    )
+
+
+async def deploy_async(
+    config: DeployConfig, db_session: AsyncBaseSession, logger: structlog.BoundLogger
+):
+    """
+    deploy on an asynchronous session, for callers running an event loop. The scripts
+    are planned and ordered as by deploy and applied one at a time
+    """
+    batch_id = start_deploy(config=config, db_session=db_session, logger=logger)
+    if config.parallelism > 1:
+        logger.warning(
+            "Parallelism is not supported by deploy_async, scripts are applied one at a time",
+            parallelism=config.parallelism,
+        )
+
+    try:
+        # The scripts are discovered while the connections are opened
+        scripts, _ = await asyncio.gather(
+            asyncio.get_running_loop().run_in_executor(
+                None, get_deploy_scripts, config.root_folder
+            ),
+            db_session.connect(),
+        )
+        script_metadata = await db_session.get_script_metadata(
+            create_change_history_table=config.create_change_history_table,
+            dry_run=config.dry_run,
+        )
+        resume_state: Tuple[Dict[str, str], Dict[str, ResultRow]] = ({}, {})
+        if config.resume_batch_id:
+            batch_data, checkpoint_rows = await asyncio.gather(
+                db_session.get_batch_by_id(batch_id=batch_id),
+                db_session.fetch_checkpoints(batch_id=batch_id),
+            )
+            resume_state = check_resume_state(
+                batch_id=batch_id, batch_data=batch_data, checkpoints=checkpoint_rows
+            )
+        state: Future[DeployState] = Future()
+        state.set_result(
+            create_deploy_state(
+                script_metadata=script_metadata, resume_state=resume_state
+            )
+        )
+
+        scripts_skipped = 0
+        scripts_applied = 0
+        loop = asyncio.get_running_loop()
+        with planned_scripts(
+            scripts=scripts,
+            config=config,
+            state=state,
+            db_type=db_session.db_type,
+            logger=logger,
+        ) as plans:
+            ready_plans = iter_ready_plans(plans=plans, scripts=scripts, config=config)
+            # Rendering, and waiting for the planning thread, block: the plans are
+            # taken in the default executor, off the event loop
+            while item := await loop.run_in_executor(None, next, ready_plans, None):
+                script_log, plan = item
+                await run_script_plan_async(
+                    plan=plan,
+                    config=config,
+                    db_session=db_session,
+                    batch_id=batch_id,
+                    logger=script_log,
+                )
+                if plan.apply:
+                    scripts_applied += 1
+                else:
+                    scripts_skipped += 1
+
+        await db_session.update_batch_status(
+            batch_id=batch_id, batch_status=ApplyStatus.SUCCESS
+        )
+        if state.result().checkpoints and not config.dry_run:
+            await db_session.delete_checkpoint(batch_id=batch_id)
+        logger.info(
+            "Completed successfully",
+            scripts_applied=scripts_applied,
+            scripts_skipped=scripts_skipped,
+            retries=db_session.retries,
+        )
+        await db_session.close()
+    except Exception as e:
+        await db_session.update_batch_status(
+            batch_id=batch_id, batch_status=ApplyStatus.FAILED
+        )
+        await db_session.close()
+        raise Exception("Deploy failed") from e
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from textwrap import indent
+from typing import List
+
+import structlog
+
+from schemachange.config.lint_config import LintConfig
+from schemachange.jinja.jinja_template_processor import JinjaTemplateProcessor
+from schemachange.session.lock_hazard import LockHazard, lint_script_content
+from schemachange.session.script import ScriptType, get_all_scripts_recursively
+
+
+def log_lock_hazards(
+    lock_hazards: List[LockHazard], logger: structlog.BoundLogger
+) -> None:
+    for lock_hazard in lock_hazards:
+        logger.warning(
+            "Statement may take a long exclusive lock or rewrite the table",
+            rule=lock_hazard.rule,
+            reason=lock_hazard.message,
+            statement=indent(lock_hazard.statement, prefix="\t"),
+        )
+
+
+def lint(config: LintConfig, logger: structlog.BoundLogger) -> None:
+    """
+    Renders every change script and reports DDL known to stall production
+    through long exclusive locks or table rewrites on the configured database type.
+    """
+    logger.info("Starting lint", db_type=config.db_type)
+
+    all_scripts = get_all_scripts_recursively(
+        root_directory=config.root_folder,
+    )
+    # Always process with jinja engine
+    jinja_processor = JinjaTemplateProcessor(
+        project_root=config.root_folder, modules_folder=config.modules_folder
+    )
+
+    scripts_with_hazards = 0
+    lock_hazards_found = 0
+    for script_name in sorted(all_scripts.keys()):
+        script = all_scripts[script_name]
+        if script.type == ScriptType.SEED:
+            continue
+        content = jinja_processor.render(
+            jinja_processor.relpath(script.file_path),
+            config.config_vars,
+        )
+
+        lock_hazards = lint_script_content(
+            script_content=content, db_type=config.db_type
+        )
+        if lock_hazards:
+            log_lock_hazards(
+                lock_hazards=lock_hazards,
+                logger=logger.bind(a_script_name=script.name),
+            )
+            scripts_with_hazards += 1
+            lock_hazards_found += len(lock_hazards)
+
+    if lock_hazards_found:
+        raise Exception(
+            f"Lint failed: found {lock_hazards_found} lock hazards "
+            f"in {scripts_with_hazards} scripts"
+        )
+
+    logger.info("Completed successfully", scripts_checked=len(all_scripts))
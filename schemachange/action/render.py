@@ -1,8 +1,8 @@
-import hashlib
 from pathlib import Path
 
 from structlog import BoundLogger
 
+from schemachange.common.checksum import get_checksum
 from schemachange.common.utils import validate_script_content
 from schemachange.config.render_config import RenderConfig
 from schemachange.jinja.jinja_template_processor import JinjaTemplateProcessor
@@ -23,5 +23,5 @@ def render(config: RenderConfig, script_path: Path, logger: BoundLogger) -> None
     )
     validate_script_content(script_name=script_path.name, script_content=content)
 
-    checksum = hashlib.sha224(content.encode("utf-8")).hexdigest()
+    checksum = get_checksum(content=content, algorithm=config.checksum_algorithm)
     logger.info("Success", checksum=checksum, content=content)
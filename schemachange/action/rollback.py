@@ -95,6 +95,9 @@ def rollback(
         logger.info(
             "Completed successfully",
             scripts_applied=scripts_applied,
+            liveness_probes=db_session.liveness_probes,
+            throttled_time=round(db_session.throttle.throttled_time, 1),
+            reconnects=db_session.reconnects,
         )
         db_session.close()
     except Exception as e:
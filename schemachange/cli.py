@@ -1,6 +1,7 @@
 import structlog
 
 from schemachange.action.deploy import deploy
+from schemachange.action.lint import lint
 from schemachange.action.render import render
 from schemachange.action.rollback import rollback
 from schemachange.common.utils import get_config_secrets
@@ -38,6 +39,8 @@ def main():
             script_path=config.script_path,
             logger=logger,
         )
+    elif _subcommand == SubCommand.LINT:
+        lint(config=config, logger=logger)
     else:
         db_session = get_db_session(
             db_type=config.db_type,
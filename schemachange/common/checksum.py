@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from schemachange.common.utils import BaseEnum
+
+CHECKSUM_SEPARATOR = ":"
+
+
+class ChecksumAlgorithm(BaseEnum):
+    SHA224 = "sha224"
+    BLAKE2B = "blake2b"
+    XXH3 = "xxh3"
+
+
+def _sha224_hexdigest(data: bytes) -> str:
+    return hashlib.sha224(data).hexdigest()
+
+
+def _blake2b_hexdigest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=28).hexdigest()
+
+
+def _xxh3_hexdigest(data: bytes) -> str:
+    try:
+        import xxhash
+    except ImportError as e:
+        raise ImportError(
+            "Checksum algorithm 'xxh3' requires the optional 'xxhash' package. "
+            'Install it with: pip install "db-schemachange[xxhash]"'
+        ) from e
+
+    return xxhash.xxh3_128_hexdigest(data)
+
+
+_HEXDIGEST_FUNCTIONS: Dict[str, Callable[[bytes], str]] = {
+    ChecksumAlgorithm.SHA224: _sha224_hexdigest,
+    ChecksumAlgorithm.BLAKE2B: _blake2b_hexdigest,
+    ChecksumAlgorithm.XXH3: _xxh3_hexdigest,
+}
+
+
+def get_checksum(content: str, algorithm: str = ChecksumAlgorithm.SHA224) -> str:
+    """Returns the checksum of the content, prefixed with its algorithm (e.g. sha224:<hexdigest>)"""
+    ChecksumAlgorithm.validate_value(attr="checksum_algorithm", value=algorithm)
+    hexdigest = _HEXDIGEST_FUNCTIONS[algorithm](content.encode("utf-8"))
+    return f"{algorithm}{CHECKSUM_SEPARATOR}{hexdigest}"
+
+
+def get_file_checksum(
+    file_path: Path, algorithm: str = ChecksumAlgorithm.SHA224
+) -> str:
+    """Returns the checksum of the bytes of the file, e.g. a seed data file"""
+    ChecksumAlgorithm.validate_value(attr="checksum_algorithm", value=algorithm)
+    hexdigest = _HEXDIGEST_FUNCTIONS[algorithm](file_path.read_bytes())
+    return f"{algorithm}{CHECKSUM_SEPARATOR}{hexdigest}"
+
+
+def parse_checksum(checksum: str) -> Tuple[str, str]:
+    """
+    Splits a stored checksum into its algorithm and hexdigest.
+
+    Checksums recorded before algorithms were pluggable are bare sha224 hexdigests.
+    """
+    algorithm, separator, hexdigest = checksum.partition(CHECKSUM_SEPARATOR)
+    if separator and algorithm in ChecksumAlgorithm.items():
+        return algorithm, hexdigest
+    return ChecksumAlgorithm.SHA224, checksum
+
+
+def checksum_matches(stored_checksum: str | None, content: str) -> bool:
+    """Compares the content against a stored checksum, using the algorithm it was recorded with"""
+    if not stored_checksum:
+        return False
+    algorithm, hexdigest = parse_checksum(checksum=stored_checksum)
+    return get_checksum(content=content, algorithm=algorithm) == (
+        f"{algorithm}{CHECKSUM_SEPARATOR}{hexdigest}"
+    )
+
+
+def file_checksum_matches(stored_checksum: str | None, file_path: Path) -> bool:
+    """Compares the bytes of the file against a stored checksum, e.g. of a seed data file"""
+    if not stored_checksum:
+        return False
+    algorithm, hexdigest = parse_checksum(checksum=stored_checksum)
+    return get_file_checksum(file_path=file_path, algorithm=algorithm) == (
+        f"{algorithm}{CHECKSUM_SEPARATOR}{hexdigest}"
+    )
@@ -1,6 +1,7 @@
-from marshmallow import Schema, exceptions, fields, validates_schema
+from marshmallow import Schema, exceptions, fields, validate, validates_schema
 
 from schemachange.config.base import SubCommand
+from schemachange.session.result_handler import ResultPolicy
 
 OPTIONAL_ARGS = {"required": False, "allow_none": True}
 
@@ -277,7 +278,11 @@ class SnowflakeConnectorArgsSchema(Schema):
     converter_class = fields.Raw(**OPTIONAL_ARGS)
     validate_default_parameters = fields.Boolean(**OPTIONAL_ARGS)
     probe_connection = fields.Boolean(**OPTIONAL_ARGS)
-    paramstyle = fields.String(**OPTIONAL_ARGS)
+    # The change history statements bind %(name)s placeholders, interpolated client side
+    # by these paramstyles only, server side qmark and numeric binding is positional
+    paramstyle = fields.String(
+        validate=validate.OneOf(["pyformat", "format"]), **OPTIONAL_ARGS
+    )
     timezone = fields.String(**OPTIONAL_ARGS)
     consent_cache_id_token = fields.Boolean(**OPTIONAL_ARGS)
     service_name = fields.String(**OPTIONAL_ARGS)
@@ -365,8 +370,33 @@ class ConfigArgsSchema(Schema):
     query_tag = fields.String(**OPTIONAL_ARGS)
     batch_id = fields.String(**OPTIONAL_ARGS)
     force = fields.Boolean(**OPTIONAL_ARGS)
+    resume_batch_id = fields.String(**OPTIONAL_ARGS)
+    checkpoint_statements = fields.Boolean(**OPTIONAL_ARGS)
+    render_ahead = fields.Integer(**OPTIONAL_ARGS)
+    parallelism = fields.Integer(**OPTIONAL_ARGS)
+    infer_dependencies = fields.Boolean(**OPTIONAL_ARGS)
     from_version = fields.String(**OPTIONAL_ARGS)
     to_version = fields.String(**OPTIONAL_ARGS)
+    checksum_algorithm = fields.String(**OPTIONAL_ARGS)
+    connection_check_interval = fields.Integer(**OPTIONAL_ARGS)
+    connection_retries = fields.Integer(**OPTIONAL_ARGS)
+    statement_retries = fields.Integer(**OPTIONAL_ARGS)
+    retry_backoff = fields.Float(**OPTIONAL_ARGS)
+    statement_batch_size = fields.Integer(**OPTIONAL_ARGS)
+    insert_batch_size = fields.Integer(**OPTIONAL_ARGS)
+    parallel_connections = fields.Integer(**OPTIONAL_ARGS)
+    connection_pool_size = fields.Integer(**OPTIONAL_ARGS)
+    max_statements_per_second = fields.Float(**OPTIONAL_ARGS)
+    script_pause = fields.Float(**OPTIONAL_ARGS)
+    health_check_query = fields.String(**OPTIONAL_ARGS)
+    health_check_timeout = fields.Float(**OPTIONAL_ARGS)
+    transactional_scripts = fields.Boolean(**OPTIONAL_ARGS)
+    async_execution = fields.Boolean(**OPTIONAL_ARGS)
+    result_policy = fields.String(**OPTIONAL_ARGS)
+    result_preview_rows = fields.Integer(**OPTIONAL_ARGS)
+    result_export_folder = fields.String(**OPTIONAL_ARGS)
+    statement_timeout = fields.Float(**OPTIONAL_ARGS)
+    script_timeout = fields.Float(**OPTIONAL_ARGS)
 
     @validates_schema()
     def validate_args(self, data, **kwargs):
@@ -376,10 +406,78 @@ class ConfigArgsSchema(Schema):
         batch_id = data.get("batch_id")
         script_path = data.get("script_path")
         force = data.get("force")
+        resume_batch_id = data.get("resume_batch_id")
+        render_ahead = data.get("render_ahead")
+        parallelism = data.get("parallelism")
         from_version = data.get("from_version")
         to_version = data.get("to_version")
+        connection_retries = data.get("connection_retries")
+        statement_retries = data.get("statement_retries")
+        retry_backoff = data.get("retry_backoff")
+        statement_batch_size = data.get("statement_batch_size")
+        insert_batch_size = data.get("insert_batch_size")
+        parallel_connections = data.get("parallel_connections")
+        connection_pool_size = data.get("connection_pool_size")
+        max_statements_per_second = data.get("max_statements_per_second")
+        script_pause = data.get("script_pause")
+        health_check_timeout = data.get("health_check_timeout")
+        result_policy = data.get("result_policy")
+        result_preview_rows = data.get("result_preview_rows")
+        result_export_folder = data.get("result_export_folder")
+        statement_timeout = data.get("statement_timeout")
+        script_timeout = data.get("script_timeout")
         error_messages = []
 
+        if connection_retries is not None and connection_retries < 0:
+            error_messages.append("'connection_retries' should not be negative")
+
+        if statement_retries is not None and statement_retries < 0:
+            error_messages.append("'statement_retries' should not be negative")
+
+        if retry_backoff is not None and retry_backoff < 0:
+            error_messages.append("'retry_backoff' should not be negative")
+
+        if render_ahead is not None and render_ahead < 0:
+            error_messages.append("'render_ahead' should not be negative")
+
+        if parallelism is not None and parallelism < 1:
+            error_messages.append("'parallelism' should be at least 1")
+
+        if statement_timeout is not None and statement_timeout <= 0:
+            error_messages.append("'statement_timeout' should be positive")
+
+        if script_timeout is not None and script_timeout <= 0:
+            error_messages.append("'script_timeout' should be positive")
+
+        if statement_batch_size is not None and statement_batch_size < 1:
+            error_messages.append("'statement_batch_size' should be at least 1")
+
+        if insert_batch_size is not None and insert_batch_size < 1:
+            error_messages.append("'insert_batch_size' should be at least 1")
+
+        if parallel_connections is not None and parallel_connections < 1:
+            error_messages.append("'parallel_connections' should be at least 1")
+
+        if connection_pool_size is not None and connection_pool_size < 1:
+            error_messages.append("'connection_pool_size' should be at least 1")
+
+        if max_statements_per_second is not None and max_statements_per_second <= 0:
+            error_messages.append("'max_statements_per_second' should be positive")
+
+        if script_pause is not None and script_pause < 0:
+            error_messages.append("'script_pause' should not be negative")
+
+        if health_check_timeout is not None and health_check_timeout <= 0:
+            error_messages.append("'health_check_timeout' should be positive")
+
+        if result_preview_rows is not None and result_preview_rows < 1:
+            error_messages.append("'result_preview_rows' should be at least 1")
+
+        if result_policy == ResultPolicy.EXPORT and not result_export_folder:
+            error_messages.append(
+                "'result_export_folder' is required with the 'export' result policy"
+            )
+
         if subcommand == SubCommand.DEPLOY or subcommand == SubCommand.ROLLBACK:
             if not db_type:
                 error_messages.append(
@@ -398,6 +496,10 @@ class ConfigArgsSchema(Schema):
                         "Aggressive deployment requires from_version and to_version "
                         "of versioned scripts to be defined"
                     )
+                if resume_batch_id:
+                    error_messages.append(
+                        "Aggressive deployment cannot resume a failed batch"
+                    )
 
             if subcommand == SubCommand.ROLLBACK:
                 if not batch_id:
@@ -405,6 +507,12 @@ class ConfigArgsSchema(Schema):
                         "'batch_id' config is missing for rollback command. "
                         "Please specify in CLI parameters"
                     )
+        elif subcommand == SubCommand.LINT:
+            if not db_type:
+                error_messages.append(
+                    "'db_type' config is missing for lint command. "
+                    "Please specify either in CLI parameters or YAML config file"
+                )
         elif subcommand == SubCommand.RENDER:
             if not script_path:
                 error_messages.append(
@@ -18,6 +18,26 @@ logger = structlog.getLogger(__name__)
 identifier_pattern = re.compile(r"^[\w]+$")
 SECRET_KEYWORDS = ["SECRET", "PWD", "PASSWD", "PASSWORD", "TOKEN"]
 
+# Comment lines delimiting statements of a script run concurrently, e.g. "-- schemachange: parallel begin"
+PARALLEL_BLOCK_PATTERN = re.compile(
+    r"^--\s*schemachange:\s*parallel\s+(?P<marker>begin|end)\s*$", re.IGNORECASE
+)
+
+
+def get_parallel_markers(statement: str) -> List[str]:
+    """Reads the parallel block markers in the comment lines leading the statement"""
+    markers = []
+    for line in statement.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("--"):
+            break
+        match = PARALLEL_BLOCK_PATTERN.match(line)
+        if match:
+            markers.append(match.group("marker").lower())
+    return markers
+
 
 class BaseEnum:
     @classmethod
@@ -157,10 +177,17 @@ def get_connect_kwargs(connections_info: Dict[str, Any], supported_args_schema:
 
 def validate_script_content(script_name: str, script_content: str) -> List[str]:
     queries = sqlparse.split(sql=script_content)
-    for query in queries:
+    for query_index, query in enumerate(queries):
         formatted_query = sqlparse.format(
             query, strip_comments=True, strip_whitespace=True
         )
+        if (
+            not formatted_query
+            and query_index == len(queries) - 1
+            and get_parallel_markers(statement=query)
+        ):
+            # The comment closing a parallel block at the end of the script
+            continue
         if not formatted_query or formatted_query == ";":
             raise Exception(
                 f"Script {script_name} contains invalid statement: {formatted_query}"
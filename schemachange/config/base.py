@@ -8,6 +8,7 @@ from typing import Any, Dict, Literal, TypeVar
 
 import structlog
 
+from schemachange.common.checksum import ChecksumAlgorithm
 from schemachange.common.utils import BaseEnum, validate_config_vars, validate_directory
 
 logger = structlog.getLogger(__name__)
@@ -18,28 +19,35 @@ class SubCommand(BaseEnum):
     DEPLOY = "deploy"
     RENDER = "render"
     ROLLBACK = "rollback"
+    LINT = "lint"
 
 
 @dataclasses.dataclass(frozen=True)
 class BaseConfig(ABC):
-    subcommand: Literal["deploy", "render", "rollback"]
+    subcommand: Literal["deploy", "render", "rollback", "lint"]
     config_file_path: Path | None = None
     root_folder: Path | None = Path(".")
     modules_folder: Path | None = None
     config_vars: dict = dataclasses.field(default_factory=dict)
     log_level: int = logging.INFO
+    checksum_algorithm: str = ChecksumAlgorithm.SHA224
 
     @classmethod
     def factory(
         cls,
-        subcommand: Literal["deploy", "render", "rollback"],
+        subcommand: Literal["deploy", "render", "rollback", "lint"],
         config_file_path: Path,
         root_folder: Path | str | None = Path("."),
         modules_folder: Path | str | None = None,
         config_vars: str | dict | None = None,
         log_level: int = logging.INFO,
+        checksum_algorithm: str = ChecksumAlgorithm.SHA224,
         **kwargs,
     ):
+        ChecksumAlgorithm.validate_value(
+            attr="checksum_algorithm", value=checksum_algorithm
+        )
+
         return cls(
             subcommand=subcommand,
             config_file_path=config_file_path,
@@ -47,6 +55,7 @@ class BaseConfig(ABC):
             modules_folder=validate_directory(path=modules_folder),
             config_vars=validate_config_vars(config_vars=config_vars),
             log_level=log_level,
+            checksum_algorithm=checksum_algorithm,
             **kwargs,
         )
 
@@ -58,6 +67,9 @@ class BaseConfig(ABC):
             )
 
         logger.info("Using variables", vars=self.config_vars)
+        logger.info(
+            "Using checksum algorithm", checksum_algorithm=self.checksum_algorithm
+        )
 
     def get_session_kwargs(self) -> Dict[str, Any]:
         return {}
@@ -22,6 +22,11 @@ class ChangeHistoryTable:
             else f"{self.database_name}.{self.table_name}"
         )
 
+    @property
+    def checkpoint_table(self) -> "ChangeHistoryTable":
+        """Table recording where the scripts of failed batches stopped, next to this one"""
+        return dataclasses.replace(self, table_name=f"{self.table_name}_CHECKPOINT")
+
     @classmethod
     def from_str(cls, table_str: str, include_schema: bool):
         database_name = cls._default_database_name
@@ -14,6 +14,7 @@ from schemachange.common.utils import (
 )
 from schemachange.config.base import SubCommand
 from schemachange.config.deploy_config import DeployConfig
+from schemachange.config.lint_config import LintConfig
 from schemachange.config.parse_cli_args import parse_cli_args
 from schemachange.config.render_config import RenderConfig
 from schemachange.config.rollback_config import RollbackConfig
@@ -38,7 +39,7 @@ def get_yaml_config_kwargs(config_file_path: Optional[Path]) -> Dict:
 
 def get_merged_config(
     logger: structlog.BoundLogger,
-) -> Union[DeployConfig, RenderConfig, RollbackConfig]:
+) -> Union[DeployConfig, RenderConfig, RollbackConfig, LintConfig]:
     cli_kwargs = parse_cli_args(sys.argv[1:])
     logger.debug("cli_kwargs", **cli_kwargs)
 
@@ -93,3 +94,5 @@ def get_merged_config(
         return RollbackConfig.factory(**kwargs)
     elif cli_kwargs["subcommand"] == SubCommand.RENDER:
         return RenderConfig.factory(**kwargs)
+    elif cli_kwargs["subcommand"] == SubCommand.LINT:
+        return LintConfig.factory(**kwargs)
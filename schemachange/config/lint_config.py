@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Literal
+
+from schemachange.config.base import BaseConfig, SubCommand
+from schemachange.session.base import DatabaseType
+
+
+@dataclasses.dataclass(frozen=True)
+class LintConfig(BaseConfig):
+    subcommand: Literal["lint"] = SubCommand.LINT
+    db_type: str | None = None
+
+    @classmethod
+    def factory(
+        cls,
+        db_type: str | None = None,
+        **kwargs,
+    ):
+        # Ignore Deploy arguments
+        field_names = [field.name for field in dataclasses.fields(LintConfig)]
+        kwargs = {k: v for k, v in kwargs.items() if k in field_names}
+
+        if "subcommand" in kwargs:
+            kwargs.pop("subcommand")
+
+        DatabaseType.validate_value(attr="db_type", value=db_type)
+
+        return super().factory(
+            subcommand=SubCommand.LINT,
+            db_type=db_type,
+            **kwargs,
+        )
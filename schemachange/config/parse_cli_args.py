@@ -10,9 +10,11 @@ from typing import Dict
 
 import structlog
 
+from schemachange.common.checksum import ChecksumAlgorithm
 from schemachange.common.utils import get_not_none_key_value
 from schemachange.config.base import SubCommand
 from schemachange.session.base import DatabaseType
+from schemachange.session.result_handler import ResultPolicy
 
 logger = structlog.getLogger(__name__)
 
@@ -84,6 +86,140 @@ def add_common_deploy_arguments(parser: ArgumentParser) -> None:
         help="Run schemachange in dry run mode (the default is False)",
         required=False,
     )
+    parser.add_argument(
+        "--connection-check-interval",
+        type=int,
+        help="Probe the connection before a query only after it has been idle for this many seconds, "
+        "0 probes before every query and a negative value never probes (the default is 300)",
+        required=False,
+    )
+    parser.add_argument(
+        "--connection-retries",
+        type=int,
+        help="Number of times a query failing with a connection error is retried on a new connection, "
+        "when it is idempotent or its transaction was rolled back (the default is 1)",
+        required=False,
+    )
+    parser.add_argument(
+        "--statement-retries",
+        type=int,
+        help="Number of times a statement failing with a transient error (e.g. deadlock, serialization failure) "
+        "is retried (the default is 2)",
+        required=False,
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        help="Base delay in seconds between two attempts of a statement, doubled on each retry with random "
+        "jitter (the default is 1.0)",
+        required=False,
+    )
+    parser.add_argument(
+        "--statement-timeout",
+        type=float,
+        help="Seconds after which a statement of a script is cancelled, overridden per script with a "
+        "'-- schemachange: statement-timeout=<seconds>' header (the default is no timeout)",
+        required=False,
+    )
+    parser.add_argument(
+        "--script-timeout",
+        type=float,
+        help="Seconds after which the running statement of a script is cancelled and the script fails, "
+        "overridden per script with a '-- schemachange: script-timeout=<seconds>' header (the default is no timeout)",
+        required=False,
+    )
+    parser.add_argument(
+        "--statement-batch-size",
+        type=int,
+        help="Maximum number of consecutive statements of a script sent in one round trip, on databases "
+        "supporting it (Postgres, MySQL, Oracle, Snowflake). 1 sends each statement on its own (the default is 1)",
+        required=False,
+    )
+    parser.add_argument(
+        "--insert-batch-size",
+        type=int,
+        help="Maximum number of consecutive INSERT ... VALUES statements into the same table and columns "
+        "coalesced into one multi-row statement. 1 runs each statement on its own (the default is 1)",
+        required=False,
+    )
+    parser.add_argument(
+        "--parallel-connections",
+        type=int,
+        help="Number of connections running the statements of the parallel blocks of scripts concurrently. "
+        "1 runs them one by one (the default is 4)",
+        required=False,
+    )
+    parser.add_argument(
+        "--connection-pool-size",
+        type=int,
+        help="Maximum number of connections opened next to the main connection, shared by the "
+        "statements running concurrently (the default is 4)",
+        required=False,
+    )
+    parser.add_argument(
+        "--max-statements-per-second",
+        type=float,
+        help="Maximum number of statements of scripts started per second (the default is no limit)",
+        required=False,
+    )
+    parser.add_argument(
+        "--script-pause",
+        type=float,
+        help="Minimum number of seconds between the end of a script and the start of the next one "
+        "(the default is no pause)",
+        required=False,
+    )
+    parser.add_argument(
+        "--health-check-query",
+        type=str,
+        help="Query evaluated between statements of scripts, the deploy pauses while its first value is "
+        'not truthy (e.g. "SELECT COUNT(*) < 50 FROM pg_stat_activity")',
+        required=False,
+    )
+    parser.add_argument(
+        "--health-check-timeout",
+        type=float,
+        help="Seconds after which a deploy paused by the health check fails (the default is 600)",
+        required=False,
+    )
+    parser.add_argument(
+        "--async-execution",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Submit statements and poll for their completion with backoff instead of waiting on the connection, "
+        "on databases supporting it (Snowflake, Databricks) (the default is False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--transactional-scripts",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Run each script and its change history record in one transaction, committed once, on databases "
+        "with transactional DDL (Postgres, SQL Server). A failing script is rolled back entirely (the default is False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--result-policy",
+        type=str,
+        choices=ResultPolicy.items(),
+        help="What to do with the rows returned by SELECT/WITH/SHOW statements of scripts: discard them without "
+        "fetching, log a preview of the first rows or export them to CSV files (the default is discard)",
+        required=False,
+    )
+    parser.add_argument(
+        "--result-preview-rows",
+        type=int,
+        help="Number of rows logged per statement with the preview result policy (the default is 10)",
+        required=False,
+    )
+    parser.add_argument(
+        "--result-export-folder",
+        type=str,
+        help="Folder receiving one CSV file per row-returning statement with the export result policy",
+        required=False,
+    )
     # Support aggressive deployment for specific versioned scripts
     parser.add_argument(
         "--force",
@@ -153,6 +289,13 @@ def parse_cli_args(args) -> Dict:
         '"value1", "variable2": "value2"})',
         required=False,
     )
+    parent_parser.add_argument(
+        "--checksum-algorithm",
+        type=str,
+        help="Algorithm used to compute script checksums (the default is sha224)",
+        required=False,
+        choices=ChecksumAlgorithm.items(),
+    )
     parent_parser.add_argument(
         "-v",
         "--verbose",
@@ -174,8 +317,54 @@ def parse_cli_args(args) -> Dict:
         parents=[parent_parser],
     )
 
+    parser_lint = subcommands.add_parser(
+        SubCommand.LINT,
+        description="Reports DDL in change scripts that would take long exclusive locks or rewrite tables.",
+        parents=[parent_parser],
+    )
+
     # Set deploy subcommand arguments
     add_common_deploy_arguments(parser=parser_deploy)
+    parser_deploy.add_argument(
+        "--resume",
+        type=str,
+        dest="resume_batch_id",
+        help="ID of a failed or killed batch to resume, from the first statement not applied of its unfinished scripts",
+        required=False,  # YAML file is for static config, this deploy argument should only be available through CLI
+    )
+    parser_deploy.add_argument(
+        "--checkpoint-statements",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Save the checkpoint of each script as its statements are committed, so a killed deploy can be "
+        "resumed, at the cost of one more round trip per statement. Otherwise the checkpoint is only recorded "
+        "when a script fails (the default is False)",
+        required=False,
+    )
+    parser_deploy.add_argument(
+        "--render-ahead",
+        type=int,
+        help="Number of scripts rendered ahead of the script being applied, "
+        "0 rendering each script just before applying it (the default is 2)",
+        required=False,
+    )
+    parser_deploy.add_argument(
+        "--parallelism",
+        type=int,
+        help="Maximum number of scripts applied at the same time, once the scripts they depend on "
+        "are applied, on connections of the connection pool (the default is 1)",
+        required=False,
+    )
+    parser_deploy.add_argument(
+        "--infer-dependencies",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Make repeatable scripts depend on the repeatable scripts creating the objects they read "
+        "in FROM and JOIN clauses, failing on circular dependencies (the default is False)",
+        required=False,
+    )
     # Set rollback subcommand arguments
     add_common_deploy_arguments(parser=parser_rollback)
     parser_rollback.add_argument(
@@ -189,6 +378,15 @@ def parse_cli_args(args) -> Dict:
         "--script-path", type=str, help="Path to the script to render"
     )
 
+    # Set lint subcommand arguments
+    parser_lint.add_argument(
+        "--db-type",
+        type=str,
+        help="Database type whose locking behaviour the scripts are checked against",
+        required=False,
+        choices=DatabaseType.items(),
+    )
+
     # The original parameters did not support subcommands. Check if a subcommand has been supplied
     # if not default to deploy to match original behaviour.
     if len(args) == 0 or not any(
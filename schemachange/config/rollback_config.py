@@ -7,7 +7,22 @@ from typing import Any, Dict, Literal
 from schemachange.common.utils import get_not_none_key_value, load_yaml_config
 from schemachange.config.base import BaseConfig, SubCommand
 from schemachange.config.change_history_table import ChangeHistoryTable
-from schemachange.session.base import DatabaseType
+from schemachange.session.base import (
+    DEFAULT_CONNECTION_CHECK_INTERVAL,
+    DEFAULT_CONNECTION_RETRIES,
+    DEFAULT_PARALLEL_CONNECTIONS,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_STATEMENT_BATCH_SIZE,
+    DEFAULT_STATEMENT_RETRIES,
+    DatabaseType,
+)
+from schemachange.session.insert_batching import DEFAULT_INSERT_BATCH_SIZE
+from schemachange.session.pool import DEFAULT_CONNECTION_POOL_SIZE
+from schemachange.session.result_handler import (
+    DEFAULT_RESULT_PREVIEW_ROWS,
+    ResultPolicy,
+)
+from schemachange.session.throttle import DEFAULT_HEALTH_CHECK_TIMEOUT
 
 
 @dataclasses.dataclass(frozen=True)
@@ -23,6 +38,25 @@ class RollbackConfig(BaseConfig):
     db_type: str | None = None
     query_tag: str | None = None
     batch_id: str | None = None
+    connection_check_interval: int = DEFAULT_CONNECTION_CHECK_INTERVAL
+    connection_retries: int = DEFAULT_CONNECTION_RETRIES
+    statement_retries: int = DEFAULT_STATEMENT_RETRIES
+    retry_backoff: float = DEFAULT_RETRY_BACKOFF
+    statement_batch_size: int = DEFAULT_STATEMENT_BATCH_SIZE
+    insert_batch_size: int = DEFAULT_INSERT_BATCH_SIZE
+    parallel_connections: int = DEFAULT_PARALLEL_CONNECTIONS
+    connection_pool_size: int = DEFAULT_CONNECTION_POOL_SIZE
+    max_statements_per_second: float | None = None
+    script_pause: float | None = None
+    health_check_query: str | None = None
+    health_check_timeout: float = DEFAULT_HEALTH_CHECK_TIMEOUT
+    transactional_scripts: bool = False
+    async_execution: bool = False
+    result_policy: str = ResultPolicy.DISCARD
+    result_preview_rows: int = DEFAULT_RESULT_PREVIEW_ROWS
+    result_export_folder: str | None = None
+    statement_timeout: float | None = None
+    script_timeout: float | None = None
 
     @classmethod
     def factory(
@@ -58,6 +92,26 @@ class RollbackConfig(BaseConfig):
             "autocommit": self.autocommit,
             "db_type": self.db_type,
             "query_tag": self.query_tag,
+            "checksum_algorithm": self.checksum_algorithm,
+            "connection_check_interval": self.connection_check_interval,
+            "connection_retries": self.connection_retries,
+            "statement_retries": self.statement_retries,
+            "retry_backoff": self.retry_backoff,
+            "statement_batch_size": self.statement_batch_size,
+            "insert_batch_size": self.insert_batch_size,
+            "parallel_connections": self.parallel_connections,
+            "connection_pool_size": self.connection_pool_size,
+            "max_statements_per_second": self.max_statements_per_second,
+            "script_pause": self.script_pause,
+            "health_check_query": self.health_check_query,
+            "health_check_timeout": self.health_check_timeout,
+            "transactional_scripts": self.transactional_scripts,
+            "async_execution": self.async_execution,
+            "result_policy": self.result_policy,
+            "result_preview_rows": self.result_preview_rows,
+            "result_export_folder": self.result_export_folder,
+            "statement_timeout": self.statement_timeout,
+            "script_timeout": self.script_timeout,
         }
 
         # Load YAML inputs and convert kebabs to snakes
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import jinja2.ext
+
+from schemachange.session.chunking import CHUNK_RANGE_PLACEHOLDER
+
+
+class JinjaChunkRange(jinja2.ext.Extension):
+    """
+    Extends Jinja Templates with the chunk_range condition of chunked scripts,
+    replaced by the key range of each chunk when the script is applied
+    """
+
+    def __init__(self, environment: jinja2.Environment):
+        super().__init__(environment)
+
+        # add globals
+        environment.globals["chunk_range"] = CHUNK_RANGE_PLACEHOLDER
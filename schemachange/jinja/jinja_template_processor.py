@@ -8,6 +8,7 @@ import jinja2.ext
 import structlog
 from jinja2.loaders import BaseLoader
 
+from schemachange.jinja.jinja_chunk_range import JinjaChunkRange
 from schemachange.jinja.jinja_env_var import JinjaEnvVar
 
 logger = structlog.getLogger(__name__)
@@ -17,7 +18,7 @@ class JinjaTemplateProcessor:
     _env_args = {
         "undefined": jinja2.StrictUndefined,
         "autoescape": False,
-        "extensions": [JinjaEnvVar],
+        "extensions": [JinjaEnvVar, JinjaChunkRange],
     }
 
     def __init__(self, project_root: Path, modules_folder: Path = None):
@@ -0,0 +1,554 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from textwrap import dedent, indent
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import sqlparse
+import structlog
+
+from schemachange.common.checksum import ChecksumAlgorithm, get_checksum
+from schemachange.common.utils import get_parallel_markers
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import (
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_STATEMENT_RETRIES,
+    DML,
+    DQL,
+    DDL,
+    MAX_RETRY_BACKOFF,
+    DatabaseType,
+    ScriptStatementError,
+    StatementTimeoutError,
+    get_timeout_header,
+    is_timeout,
+)
+from schemachange.session.change_history import (
+    ApplyStatus,
+    ChangeHistoryBookkeeping,
+    CheckpointError,
+    ScriptCheckpoint,
+    Steps,
+    T,
+)
+from schemachange.session.chunking import get_chunk_settings
+from schemachange.session.insert_batching import (
+    DEFAULT_INSERT_BATCH_SIZE,
+    coalesce_inserts,
+)
+from schemachange.session.result_handler import ResultPolicy
+from schemachange.session.result_set import ResultRow, ResultSet
+from schemachange.session.script import (
+    DEPLOYABLE_SCRIPT_TYPES,
+    AlwaysScript,
+    RepeatableScript,
+    RollbackScript,
+    VersionedScript,
+    get_script_headers,
+)
+
+# The statements of a script run on one connection, independent metadata queries
+# run concurrently on the others
+DEFAULT_ASYNC_CONNECTIONS = 2
+
+
+class AsyncBaseSession(ChangeHistoryBookkeeping):
+    """
+    Asynchronous counterpart of BaseSession, for drivers with an asyncio API. Queries
+    are awaited on the event loop of the caller instead of blocking a thread, and the
+    connections of the session are shared through a queue
+    """
+
+    def __init__(
+        self,
+        session_kwargs: Dict[str, Any],
+        logger: structlog.BoundLogger,
+        connections: int = DEFAULT_ASYNC_CONNECTIONS,
+    ):
+        self.logger = logger
+        self.init_bookkeeping(session_kwargs=session_kwargs)
+        self.autocommit = session_kwargs.get("autocommit")
+        self.db_type = session_kwargs.get("db_type")
+        self.connections_info = session_kwargs.get("connections_info")
+        self.checksum_algorithm = session_kwargs.get(
+            "checksum_algorithm", ChecksumAlgorithm.SHA224
+        )
+        self.include_schema = self.db_type not in DatabaseType.get_no_schema_databases()
+        self.statement_retries = session_kwargs.get(
+            "statement_retries", DEFAULT_STATEMENT_RETRIES
+        )
+        self.retry_backoff = session_kwargs.get("retry_backoff", DEFAULT_RETRY_BACKOFF)
+        self.statement_timeout = session_kwargs.get("statement_timeout")
+        self.script_timeout = session_kwargs.get("script_timeout")
+        self.insert_batch_size = session_kwargs.get(
+            "insert_batch_size", DEFAULT_INSERT_BATCH_SIZE
+        )
+        unsupported = {
+            "transactional scripts": session_kwargs.get("transactional_scripts"),
+            "statement batching": (session_kwargs.get("statement_batch_size") or 1) > 1,
+            "statement throttling": session_kwargs.get("max_statements_per_second")
+            or session_kwargs.get("script_pause"),
+            "health checks": session_kwargs.get("health_check_query"),
+            "result policies other than discard": session_kwargs.get("result_policy")
+            not in (None, ResultPolicy.DISCARD),
+            "asynchronous execution": session_kwargs.get("async_execution"),
+        }
+        for setting, configured in unsupported.items():
+            if configured:
+                raise ValueError(f"{type(self).__name__} does not support {setting}")
+        self.user = None
+        self.retries = 0
+        self.connection_count = connections
+        self._connections: List[Any] = []
+        self._available: Optional[asyncio.Queue] = None
+
+    async def _connect(self) -> Any:
+        """Opens a new driver connection, committing each statement on its own"""
+        raise NotImplementedError
+
+    async def _close_connection(self, connection: Any) -> None:
+        await connection.close()
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        """Errors after which the database rolled the statement back, e.g. deadlocks"""
+        return False
+
+    async def connect(self) -> None:
+        """Opens the connections of the session concurrently"""
+        if self._available is not None:
+            return
+        self._connections = list(
+            await asyncio.gather(
+                *(self._connect() for _ in range(self.connection_count))
+            )
+        )
+        self._available = asyncio.Queue()
+        for connection in self._connections:
+            self._available.put_nowait(connection)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Lends a connection of the session, waiting for one to be returned if needed"""
+        await self.connect()
+        connection = await self._available.get()
+        try:
+            yield connection
+        finally:
+            self._available.put_nowait(connection)
+
+    async def close(self) -> None:
+        connections, self._connections = self._connections, []
+        self._available = None
+        await asyncio.gather(
+            *(self._close_connection(connection) for connection in connections)
+        )
+
+    async def _execute_query(
+        self,
+        connection: Any,
+        query: str,
+        params: Optional[Tuple | Dict[str, Any]] = None,
+        fetch_rows: bool = True,
+    ) -> Any:
+        normalized_query = query.strip().upper()
+        async with connection.cursor() as cursor:
+            if params:
+                await cursor.execute(query, params)
+            else:
+                await cursor.execute(query)
+            if normalized_query.startswith(tuple([*DQL.items(), DDL.SHOW])):
+                # The rows of script statements are discarded without being fetched
+                if fetch_rows:
+                    return await ResultSet.from_async_cursor(cursor=cursor)
+            elif normalized_query.startswith(tuple(DML.items())):
+                return cursor.rowcount
+        return None
+
+    async def execute_query(
+        self,
+        query: str,
+        params: Optional[Tuple | Dict[str, Any]] = None,
+        connection: Any = None,
+        timeout: Optional[float] = None,
+        fetch_rows: bool = True,
+    ) -> Any:
+        """
+        Runs the query on the connection, or on any connection of the session, and retries
+        it when it fails with a transient error. A query past its timeout is cancelled
+        """
+        if connection is None:
+            async with self.acquire() as connection:
+                return await self.execute_query(
+                    query=query,
+                    params=params,
+                    connection=connection,
+                    timeout=timeout,
+                    fetch_rows=fetch_rows,
+                )
+
+        self.logger.debug("Executing query", query=indent(query, prefix="\t"))
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(
+                    self._execute_query(
+                        connection=connection,
+                        query=query,
+                        params=params,
+                        fetch_rows=fetch_rows,
+                    ),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError as e:
+                raise StatementTimeoutError(
+                    f"Statement exceeded its timeout of {timeout} seconds"
+                ) from e
+            except Exception as e:
+                if attempt >= self.statement_retries or not self._is_transient_error(
+                    error=e
+                ):
+                    raise e
+                attempt += 1
+                self.retries += 1
+                # Exponential backoff with full jitter, as in BaseSession
+                delay = random.uniform(
+                    0, min(MAX_RETRY_BACKOFF, self.retry_backoff * 2 ** (attempt - 1))
+                )
+                self.logger.warning(
+                    "Query failed with a retryable error, retrying",
+                    attempt=attempt,
+                    max_attempts=self.statement_retries,
+                    delay=round(delay, 3),
+                    error=str(e),
+                )
+                await asyncio.sleep(delay)
+
+    async def execute_query_with_debug(self, query: str, dry_run: bool) -> None:
+        if dry_run:
+            self.logger.debug(
+                "Running in dry-run mode. Skipping execution.",
+                query=indent(dedent(query), prefix="\t"),
+            )
+        else:
+            await self.execute_query(query=dedent(query))
+
+    async def execute_statements(
+        self,
+        statements: List[str],
+        connection: Any,
+        statement_timeout: Optional[float] = None,
+        script_timeout: Optional[float] = None,
+        start_statement_index: int = 0,
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        """
+        Runs the statements of a script from start_statement_index, moving the checkpoint
+        of the script past each statement once it is committed. Raises
+        ScriptStatementError with the index of the first statement not applied
+        """
+        deadline = None if script_timeout is None else time.monotonic() + script_timeout
+        coalesced = [
+            (start_statement_index + index, statement)
+            for index, statement in coalesce_inserts(
+                statements=statements[start_statement_index:],
+                batch_size=self.insert_batch_size,
+            )
+        ]
+        next_indexes = [index for index, _ in coalesced[1:]] + [len(statements)]
+        for (statement_index, statement), next_index in zip(coalesced, next_indexes):
+            timeout = statement_timeout
+            try:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise StatementTimeoutError("Script exceeded its timeout")
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                await self.execute_query(
+                    query=statement,
+                    connection=connection,
+                    timeout=timeout,
+                    fetch_rows=False,
+                )
+            except Exception as e:
+                raise ScriptStatementError(
+                    statement_index=statement_index, statement=statement
+                ) from e
+            await self.save_checkpoint(
+                checkpoint=checkpoint,
+                statement_index=next_index,
+                connection=connection,
+            )
+
+    async def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> ResultSet:
+        raise NotImplementedError
+
+    async def create_change_history_schema(self, dry_run: bool) -> None:
+        pass
+
+    async def create_change_history_table(self, dry_run: bool) -> None:
+        await self.execute_query_with_debug(
+            query=self.change_history_table_ddl(), dry_run=dry_run
+        )
+
+    async def run_steps(self, steps: Steps[T]) -> T:
+        """Runs the steps of a ChangeHistoryBookkeeping method, awaiting each call"""
+        result: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                name, kwargs = (
+                    steps.send(result) if error is None else steps.throw(error)
+                )
+            except StopIteration as stop:
+                return stop.value
+            try:
+                result, error = await getattr(self, name)(**kwargs), None
+            except Exception as e:
+                result, error = None, e
+
+    async def fetch_concurrently(self, queries: List[str]) -> List[ResultSet]:
+        """Runs independent queries, in flight at the same time on different connections"""
+        return list(
+            await asyncio.gather(
+                *(self.execute_query(query=query) for query in queries)
+            )
+        )
+
+    async def change_history_table_exists(
+        self, create_change_history_table: bool, dry_run: bool
+    ) -> bool:
+        return await self.run_steps(
+            self.change_history_table_exists_steps(
+                create_change_history_table=create_change_history_table,
+                dry_run=dry_run,
+            )
+        )
+
+    async def get_script_metadata(
+        self, create_change_history_table: bool, dry_run: bool
+    ) -> Tuple[
+        Dict[str, Dict[str, str | int]] | None,
+        Dict[str, List[str]] | None,
+        str | int | None,
+    ]:
+        return await self.run_steps(
+            self.script_metadata_steps(
+                create_change_history_table=create_change_history_table,
+                dry_run=dry_run,
+            )
+        )
+
+    async def log_change_script(
+        self,
+        script: VersionedScript | RepeatableScript | AlwaysScript | RollbackScript,
+        checksum: str,
+        execution_time: int,
+        status: str,
+        batch_id: str,
+        batch_status: str,
+        force: bool,
+    ) -> None:
+        query, params = self.log_change_script_statement(
+            script=script,
+            checksum=checksum,
+            execution_time=execution_time,
+            status=status,
+            batch_id=batch_id,
+            batch_status=batch_status,
+            force=force,
+        )
+        await self.execute_query(query=query, params=params)
+
+    async def apply_change_script(
+        self,
+        script: VersionedScript | RepeatableScript | AlwaysScript | RollbackScript,
+        script_content: str,
+        dry_run: bool,
+        logger: structlog.BoundLogger,
+        batch_id: str,
+        force: bool = False,
+        start_statement_index: int = 0,
+    ) -> None:
+        if dry_run:
+            logger.debug("Running in dry-run mode. Skipping execution")
+            return
+        if start_statement_index > 0:
+            logger.info(
+                "Resuming change script",
+                start_statement=start_statement_index + 1,
+            )
+        else:
+            logger.info("Applying change script")
+        checksum = get_checksum(
+            content=script_content, algorithm=self.checksum_algorithm
+        )
+        headers = get_script_headers(script_content=script_content)
+        if get_chunk_settings(headers=headers, script_content=script_content):
+            raise ValueError(
+                f"Chunked script {script.name} is not supported by deploy_async"
+            )
+        statements = sqlparse.split(sql=script_content)
+        if any(get_parallel_markers(statement=statement) for statement in statements):
+            raise ValueError(
+                f"Parallel blocks of script {script.name} are not supported by deploy_async"
+            )
+        statement_timeout = get_timeout_header(
+            headers=headers, key="statement-timeout", default=self.statement_timeout
+        )
+        script_timeout = get_timeout_header(
+            headers=headers, key="script-timeout", default=self.script_timeout
+        )
+        checkpoint = None
+        if script.type in DEPLOYABLE_SCRIPT_TYPES:
+            checkpoint = await self.start_checkpoint(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=start_statement_index,
+            )
+        start = time.time()
+
+        try:
+            # The statements of the script run in order on one connection
+            async with self.acquire() as connection:
+                await self.execute_statements(
+                    statements=statements,
+                    connection=connection,
+                    statement_timeout=statement_timeout,
+                    script_timeout=script_timeout,
+                    start_statement_index=start_statement_index,
+                    checkpoint=checkpoint,
+                )
+        except (ScriptStatementError, CheckpointError) as e:
+            if script.type in DEPLOYABLE_SCRIPT_TYPES:
+                if is_timeout(error=e):
+                    logger.error(
+                        "Change script exceeded its timeout",
+                        statement_timeout=statement_timeout,
+                        script_timeout=script_timeout,
+                    )
+                    await self.log_change_script(
+                        script=script,
+                        checksum=checksum,
+                        execution_time=round(time.time() - start),
+                        status=ApplyStatus.TIMED_OUT,
+                        batch_id=batch_id,
+                        batch_status=ApplyStatus.IN_PROGRESS,
+                        force=force,
+                    )
+                await self.record_checkpoint(
+                    batch_id=batch_id,
+                    script=script,
+                    checksum=checksum,
+                    statement_index=e.statement_index,
+                    logger=logger,
+                )
+            raise Exception(f"Failed to execute {script.name}") from e
+
+        if script.type in DEPLOYABLE_SCRIPT_TYPES:
+            await self.log_change_script(
+                script=script,
+                checksum=checksum,
+                execution_time=round(time.time() - start),
+                status=ApplyStatus.SUCCESS,
+                batch_id=batch_id,
+                batch_status=ApplyStatus.IN_PROGRESS,
+                force=force,
+            )
+        if checkpoint is not None and checkpoint.saved:
+            await self.delete_checkpoint(
+                batch_id=batch_id, script_name=checkpoint.script_name
+            )
+
+    async def start_checkpoint(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+    ) -> ScriptCheckpoint:
+        return await self.run_steps(
+            self.start_checkpoint_steps(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=statement_index,
+            )
+        )
+
+    async def save_checkpoint(
+        self,
+        checkpoint: Optional[ScriptCheckpoint],
+        statement_index: int,
+        connection: Any = None,
+    ) -> None:
+        # Saved on the connection running the script, which it holds
+        await self.run_steps(
+            self.save_checkpoint_steps(
+                checkpoint=checkpoint,
+                statement_index=statement_index,
+                connection=connection,
+            )
+        )
+
+    async def record_checkpoint(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        logger: structlog.BoundLogger,
+    ) -> None:
+        await self.run_steps(
+            self.record_checkpoint_steps(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=statement_index,
+                logger=logger,
+            )
+        )
+
+    async def create_checkpoint_table(self) -> None:
+        await self.execute_query(query=self.checkpoint_table_ddl())
+
+    async def fetch_checkpoints(self, batch_id: str) -> List[ResultRow]:
+        return await self.run_steps(self.fetch_checkpoints_steps(batch_id=batch_id))
+
+    async def delete_checkpoint(
+        self, batch_id: str, script_name: Optional[str] = None
+    ) -> None:
+        query, params = self.delete_checkpoint_statement(
+            batch_id=batch_id, script_name=script_name
+        )
+        await self.execute_query(query=query, params=params)
+
+    async def update_batch_status(self, batch_id: str, batch_status: str) -> None:
+        query, params = self.update_batch_status_statement(
+            batch_id=batch_id, batch_status=batch_status
+        )
+        await self.execute_query(query=query, params=params)
+
+    async def update_script_checksum(
+        self,
+        script_name: str,
+        script_type: str,
+        checksum: str,
+        checksum_current: str,
+    ) -> None:
+        query, params = self.update_script_checksum_statement(
+            script_name=script_name,
+            script_type=script_type,
+            checksum=checksum,
+            checksum_current=checksum_current,
+        )
+        await self.execute_query(query=query, params=params)
+
+    async def get_batch_by_id(self, batch_id: str) -> ResultSet:
+        query, params = self.get_batch_by_id_statement(batch_id=batch_id)
+        return await self.execute_query(query=query, params=params)
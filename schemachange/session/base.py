@@ -1,25 +1,161 @@
-import datetime
-import hashlib
+from __future__ import annotations
+
+import queue
+import random
+import re
+import threading
 import time
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from itertools import groupby
 from textwrap import dedent, indent
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Collection, Dict, Iterator, List, Optional, Pattern, Tuple
 
 import sqlparse
 import structlog
 
+from schemachange.common.checksum import ChecksumAlgorithm, get_checksum
 from schemachange.common.utils import BaseEnum
 from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.change_history import (
+    ApplyStatus,
+    ChangeHistoryBookkeeping,
+    CheckpointError,
+    ScriptCheckpoint,
+    Steps,
+    T,
+    collect_repeatable_scripts,
+    collect_versioned_scripts,
+)
+from schemachange.session.chunking import (
+    ChunkSettings,
+    get_chunk_settings,
+    get_key_value,
+)
+from schemachange.session.insert_batching import (
+    DEFAULT_INSERT_BATCH_SIZE,
+    DEFAULT_MAX_STATEMENT_LENGTH,
+    build_multi_row_insert,
+    coalesce_inserts,
+)
+from schemachange.session.pool import DEFAULT_CONNECTION_POOL_SIZE, SessionPool
+from schemachange.session.result_handler import (
+    DEFAULT_RESULT_PREVIEW_ROWS,
+    ResultHandler,
+    ResultPolicy,
+    get_result_handler,
+)
+from schemachange.session.result_set import ResultRow, ResultSet
 from schemachange.session.script import (
     DEPLOYABLE_SCRIPT_TYPES,
     AlwaysScript,
     RepeatableScript,
     RollbackScript,
-    ScriptType,
+    SeedScript,
     VersionedScript,
+    get_script_headers,
+    split_parallel_blocks,
 )
+from schemachange.session.seed import iter_seed_batches, read_seed_columns
+from schemachange.session.throttle import DEFAULT_HEALTH_CHECK_TIMEOUT, Throttle
+
+DEFAULT_CONNECTION_CHECK_INTERVAL = 300
+DEFAULT_CONNECTION_RETRIES = 1
+DEFAULT_STATEMENT_BATCH_SIZE = 1
+DEFAULT_PARALLEL_CONNECTIONS = 4
+DEFAULT_STATEMENT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 1.0
+# Upper bound of the delay between two attempts of a statement, in seconds
+MAX_RETRY_BACKOFF = 30.0
+# Delays between two status polls of a statement submitted asynchronously, in seconds
+ASYNC_POLL_INITIAL_DELAY = 0.1
+ASYNC_POLL_MAX_DELAY = 5.0
+
+# Statements switching the session context (e.g. USE SCHEMA, ALTER SESSION SET CURRENT_SCHEMA)
+SESSION_CONTEXT_PATTERN = re.compile(
+    r"^(\s*(--[^\n]*(\n|$)|/\*.*?\*/))*\s*(USE|ALTER\s+SESSION)\b", re.DOTALL
+)
+
+# Statements having the same effect when executed again, they can be retried on a new
+# connection even though their outcome on the lost connection is unknown
+IDEMPOTENT_STATEMENT_PATTERN = re.compile(
+    r"^(SELECT|WITH|SHOW|DESCRIBE|DESC|EXPLAIN|USE|SET|ALTER SESSION)\b"
+    r"|^CREATE (OR REPLACE\b|.* IF NOT EXISTS\b)"
+    r"|^DROP .* IF EXISTS\b"
+)
+
+
+def normalize_statement(statement: str) -> str:
+    """Strips comments and collapses whitespace, for keyword matching"""
+    formatted_statement = sqlparse.format(statement, strip_comments=True)
+    return " ".join(formatted_statement.split()).upper()
 
-DEFAULT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def terminate_statement(statement: str) -> str:
+    """Ends the statement with a semicolon, on a new line in case it ends with a comment"""
+    statement = statement.strip()
+    if statement.endswith(";"):
+        return statement
+    return f"{statement}\n;"
+
+
+class BatchStatementError(Exception):
+    """Raised when a statement sent as part of a multi-statement round trip fails"""
+
+    def __init__(self, statement_index: int, statement: str, message: str):
+        indented_statement = indent(statement, prefix="\t")
+        super().__init__(
+            f"Failed to execute statement {statement_index + 1} of the batch: {message}"
+            f"\n{indented_statement}"
+        )
+        self.statement_index = statement_index
+        self.statement = statement
+        # Whether the statements of the batch before the failing one were rolled back
+        # with it, see execute_batch
+        self.rolled_back = False
+
+
+class StatementTimeoutError(Exception):
+    """Raised when a statement, or the script running it, exceeds its timeout"""
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether the error was caused by a statement or script timeout"""
+    while error is not None:
+        if isinstance(error, StatementTimeoutError):
+            return True
+        error = error.__cause__
+    return False
+
+
+def get_timeout_header(
+    headers: Dict[str, str], key: str, default: Optional[float]
+) -> Optional[float]:
+    if key not in headers:
+        return default
+    try:
+        timeout = float(headers[key])
+    except ValueError:
+        raise ValueError(f"Invalid {key} script header: {headers[key]}")
+    # A header of 0 removes the configured timeout
+    return timeout if timeout > 0 else None
+
+
+class ScriptStatementError(Exception):
+    """
+    Raised when a statement of a change script fails, with its index in the script,
+    and the lower key of the failed chunk for chunked scripts
+    """
+
+    def __init__(
+        self, statement_index: int, statement: str, chunk_key: Optional[int] = None
+    ):
+        super().__init__(
+            f"Failed to execute statement {statement_index + 1} of the script"
+        )
+        self.statement_index = statement_index
+        self.statement = statement
+        self.chunk_key = chunk_key
 
 
 class DDL(BaseEnum):
@@ -71,66 +207,386 @@ class DatabaseType(BaseEnum):
     def get_no_schema_databases(cls):
         return [DatabaseType.MYSQL, DatabaseType.ORACLE]
 
+    @classmethod
+    def get_transactional_ddl_databases(cls):
+        return [DatabaseType.POSTGRES, DatabaseType.SQL_SERVER]
+
+
+# Statements that cannot run inside a transaction block, per database. They are
+# executed in autocommit mode, outside of any open script transaction
+NON_TRANSACTIONAL_STATEMENT_PATTERNS: Dict[str, Pattern[str]] = {
+    DatabaseType.POSTGRES: re.compile(
+        r"\bCONCURRENTLY\b"
+        r"|^(VACUUM|REINDEX (SYSTEM|DATABASE)|ALTER SYSTEM)\b"
+        r"|^(CREATE|DROP) (DATABASE|TABLESPACE|SUBSCRIPTION)\b"
+        r"|^ALTER DATABASE .* SET TABLESPACE\b"
+        r"|^ALTER TYPE .* ADD VALUE\b"
+    ),
+    DatabaseType.SQL_SERVER: re.compile(
+        r"^((CREATE|ALTER|DROP) DATABASE|BACKUP|RESTORE|RECONFIGURE)\b"
+        r"|^(CREATE|ALTER|DROP) FULLTEXT (CATALOG|INDEX)\b"
+    ),
+}
+
+
+class BaseSession(ChangeHistoryBookkeeping):
+    liveness_query = "SELECT 1"
+    # Whether the driver can send several statements in one round trip, see _execute_batch
+    supports_statement_batching = False
+    # Whether statements can be submitted and polled for completion, see _submit_statement
+    supports_async_execution = False
+    # Whether the database enforces statement timeouts, see set_statement_timeout.
+    # Otherwise, statements running past their timeout are cancelled by a watchdog thread
+    supports_statement_timeout = False
+    # Limits of the multi-row statements coalescing INSERT statements, see coalesce_inserts
+    max_statement_length = DEFAULT_MAX_STATEMENT_LENGTH
+    max_insert_rows: Optional[int] = None
 
-class ApplyStatus(BaseEnum):
-    IN_PROGRESS = "IN_PROGRESS"
-    SUCCESS = "SUCCESS"
-    FAILED = "FAILED"
-    ROLLED_BACK = "ROLLED_BACK"
-    ROLLED_BACK_FAILED = "ROLLED_BACK_FAILED"
-
-
-class Singleton(type):
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
-
-    def clear(cls):
-        _ = cls._instances.pop(cls, None)
-
-    def clear_all(*args, **kwargs):
-        Singleton._instances = {}
-
-
-class BaseSession(metaclass=Singleton):
     def __init__(self, session_kwargs: Dict[str, Any], logger: structlog.BoundLogger):
+        self.session_kwargs = session_kwargs
         self.logger = logger
-        self.change_history_table: ChangeHistoryTable = session_kwargs.get(
-            "change_history_table"
-        )
+        self.init_bookkeeping(session_kwargs=session_kwargs)
         self.autocommit = session_kwargs.get("autocommit")
         self.db_type = session_kwargs.get("db_type")
         self.connections_info = session_kwargs.get("connections_info")
+        self.checksum_algorithm = session_kwargs.get(
+            "checksum_algorithm", ChecksumAlgorithm.SHA224
+        )
         self.include_schema = self.db_type not in DatabaseType.get_no_schema_databases()
+        # Probe the connection only after it has been idle for this many seconds,
+        # 0 probes on every cursor access and a negative value never probes
+        self.connection_check_interval = session_kwargs.get(
+            "connection_check_interval", DEFAULT_CONNECTION_CHECK_INTERVAL
+        )
+        # Reconnect and re-run a statement that failed with a connection error
+        self.connection_retries = session_kwargs.get(
+            "connection_retries", DEFAULT_CONNECTION_RETRIES
+        )
+        # Retry a statement that failed with a transient error, the database rolled it back
+        self.statement_retries = session_kwargs.get(
+            "statement_retries", DEFAULT_STATEMENT_RETRIES
+        )
+        # Base delay between two attempts, doubled on each retry
+        self.retry_backoff = session_kwargs.get("retry_backoff", DEFAULT_RETRY_BACKOFF)
+        # Upper bounds in seconds of a statement and of a script, unbounded when None.
+        # Scripts override them with headers
+        self.statement_timeout = session_kwargs.get("statement_timeout")
+        self.script_timeout = session_kwargs.get("script_timeout")
+        # Maximum number of consecutive INSERT statements coalesced into one multi-row
+        # statement, 1 disables it
+        self.insert_batch_size = session_kwargs.get(
+            "insert_batch_size", DEFAULT_INSERT_BATCH_SIZE
+        )
+        # Maximum number of statements sent in one round trip, 1 disables batching
+        self.statement_batch_size = session_kwargs.get(
+            "statement_batch_size", DEFAULT_STATEMENT_BATCH_SIZE
+        )
+        # Number of connections running the statements of a parallel block of a script,
+        # below 2 the blocks run sequentially
+        self.parallel_connections = session_kwargs.get(
+            "parallel_connections", DEFAULT_PARALLEL_CONNECTIONS
+        )
+        # Maximum number of connections of the sessions lent by the pool
+        self.connection_pool_size = session_kwargs.get(
+            "connection_pool_size", DEFAULT_CONNECTION_POOL_SIZE
+        )
+        # Pace of the statements of change scripts, and the health check pausing them
+        self.health_check_query = session_kwargs.get("health_check_query")
+        self.throttle = Throttle(
+            logger=logger,
+            max_statements_per_second=session_kwargs.get("max_statements_per_second"),
+            script_pause=session_kwargs.get("script_pause"),
+            health_check=self.is_healthy if self.health_check_query else None,
+            health_check_timeout=session_kwargs.get(
+                "health_check_timeout", DEFAULT_HEALTH_CHECK_TIMEOUT
+            ),
+        )
+        # What happens to the rows returned by the statements of change scripts
+        self.result_policy = session_kwargs.get("result_policy", ResultPolicy.DISCARD)
+        self.result_preview_rows = session_kwargs.get(
+            "result_preview_rows", DEFAULT_RESULT_PREVIEW_ROWS
+        )
+        self.result_export_folder = session_kwargs.get("result_export_folder")
+        # Run each script and its change history row in one transaction, on databases
+        # with transactional DDL
+        self.transactional_scripts = bool(session_kwargs.get("transactional_scripts"))
+        if (
+            self.transactional_scripts
+            and self.db_type not in DatabaseType.get_transactional_ddl_databases()
+        ):
+            self.logger.warning(
+                "Transactional scripts are not supported, scripts run statement by statement",
+                db_type=self.db_type,
+            )
+            self.transactional_scripts = False
+        # Submit statements and poll for their completion instead of waiting on the
+        # connection, on databases supporting it
+        self.async_execution = bool(session_kwargs.get("async_execution"))
+        if self.async_execution and not self.supports_async_execution:
+            self.logger.warning(
+                "Asynchronous execution is not supported, statements run synchronously",
+                db_type=self.db_type,
+            )
+            self.async_execution = False
+        self.liveness_probes = 0
+        self.reconnects = 0
+        self.retries = 0
         self.user = None
         self._connection = None
         self._cursor = None
+        self._last_activity_time = time.monotonic()
+        # Client-side view of the session state, None/False until known
+        self._autocommit_state: Optional[bool] = None
+        self._session_context_valid = False
+        self._in_transaction = False
+        # Whether the last failed statement ran in a transaction that was never committed,
+        # the database rolls it back when the connection is lost
+        self._statement_rolled_back = False
+        # Timeout of the statements of the running script, and its deadline
+        self._statement_timeout: Optional[float] = None
+        self._script_deadline: Optional[float] = None
+        self._statement_timeout_state: Optional[float] = None
+        self._statement_timeout_valid = True
+        # Set by the watchdog thread when it cancels the running statement, or when a
+        # statement failed past its deadline
+        self._statement_cancelled = False
+        # Deadline of the running statement, and the statement the watchdogs may cancel,
+        # guarded by the lock so a late watchdog never cancels the following statement
+        self._statement_deadline: Optional[float] = None
+        self._running_statement: Optional[int] = None
+        self._statement_count = 0
+        self._cancel_lock = threading.Lock()
+        # Sessions running the statements of parallel blocks, opened on first use
+        self._pool: Optional[SessionPool] = None
 
     @property
     def connection(self):
-        if self._connection is None or not self._is_connection_alive():
+        if self._connection is None:
+            # A new connection starts from the driver defaults
+            self._autocommit_state = None
+            self._session_context_valid = False
+            # A new connection starts without statement timeout
+            self._statement_timeout_state = None
+            self._statement_timeout_valid = True
             self._connect()
+            self._last_activity_time = time.monotonic()
         return self._connection
 
     @property
     def cursor(self):
-        if self._cursor is None or not self._is_connection_alive():
+        self.check_connection()
+        if self._cursor is None:
             self._cursor = self.connection.cursor()
         return self._cursor
 
+    @property
+    def pool(self) -> SessionPool:
+        if self._pool is None:
+            self._pool = SessionPool(owner=self, size=self.connection_pool_size)
+        return self._pool
+
     def _connect(self) -> None:
         pass
 
+    def check_connection(self) -> None:
+        """Reconnects when the connection was idle and no longer answers the liveness query"""
+        if (
+            self._connection is not None
+            and self._is_liveness_check_due()
+            and not self._is_connection_alive()
+        ):
+            self._reconnect()
+
+    def _reconnect(self) -> None:
+        self.logger.info("Reconnecting to database", reconnects=self.reconnects + 1)
+        try:
+            self._close_connection()
+        except Exception:
+            # The connection is already unusable, closing it is best effort
+            self._cursor = None
+            self._connection = None
+        self.reconnects += 1
+        _ = self.connection
+
+    def _is_liveness_check_due(self) -> bool:
+        # The probe commits, it must not run inside a script transaction
+        if self.connection_check_interval < 0 or self._in_transaction:
+            return False
+        idle_time = time.monotonic() - self._last_activity_time
+        return idle_time >= self.connection_check_interval
+
+    def _is_connection_error(self, error: Exception) -> bool:
+        return type(error).__name__ in ("OperationalError", "InterfaceError")
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        """Errors after which the database rolled the statement back, e.g. deadlocks"""
+        return False
+
+    def _is_transaction_rollback_error(self, error: Exception) -> bool:
+        """
+        Errors after which the database rolled back the whole open transaction, not only
+        the failing statement
+        """
+        return False
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        """Errors raised when the database cancelled a statement past its timeout"""
+        return False
+
+    def set_statement_timeout(self, timeout: Optional[float]) -> None:
+        """Sets the timeout of the following statements, None removes it"""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support statement timeouts"
+        )
+
+    def ensure_statement_timeout(self, timeout: Optional[float]) -> None:
+        """Sets the statement timeout only when the tracked one differs, saving a round trip"""
+        if self._statement_timeout_valid and self._statement_timeout_state == timeout:
+            return
+        self.set_statement_timeout(timeout=timeout)
+        self._statement_timeout_state = timeout
+        self._statement_timeout_valid = True
+
+    def _cancel_statement(self) -> None:
+        """Cancels the running statement, called from the watchdog thread"""
+        if hasattr(self._connection, "cancel"):
+            self._connection.cancel()
+        elif hasattr(self._cursor, "cancel"):
+            self._cursor.cancel()
+        else:
+            self.logger.warning(
+                "Cancelling a running statement is not supported",
+                db_type=self.db_type,
+            )
+
+    def _cancel_running_statement(self, statement: Optional[int] = None) -> None:
+        """
+        Cancels the running statement, only the given one when set. Between two
+        statements there is nothing to cancel, the deadlines stop the next one.
+        """
+        with self._cancel_lock:
+            if self._running_statement is None or statement not in (
+                None,
+                self._running_statement,
+            ):
+                return
+            self._statement_cancelled = True
+            try:
+                self._cancel_statement()
+            except Exception as e:
+                self.logger.warning("Failed to cancel statement", error=str(e))
+
+    @contextmanager
+    def _watchdog(
+        self, timeout: Optional[float], statement: Optional[int] = None
+    ) -> Iterator[None]:
+        """Cancels the statements still running after the timeout"""
+        if timeout is None:
+            yield
+            return
+        timer = threading.Timer(
+            timeout, self._cancel_running_statement, kwargs={"statement": statement}
+        )
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    @contextmanager
+    def script_timeouts(
+        self, statement_timeout: Optional[float], script_timeout: Optional[float]
+    ) -> Iterator[None]:
+        """
+        Bounds each statement run in the block, natively or with a watchdog, and the
+        block as a whole with a watchdog cancelling the statement running at its deadline
+        """
+        self._statement_timeout = statement_timeout
+        if script_timeout is not None:
+            self._script_deadline = time.monotonic() + script_timeout
+        try:
+            with self._watchdog(timeout=script_timeout):
+                yield
+        finally:
+            self._statement_timeout = None
+            self._script_deadline = None
+
+    def _deadline_passed(self) -> bool:
+        now = time.monotonic()
+        return any(
+            deadline is not None and now >= deadline
+            for deadline in (self._script_deadline, self._statement_deadline)
+        )
+
+    @contextmanager
+    def _bounded_statement(self) -> Iterator[None]:
+        """Applies the timeouts of the running script to the statement run in the block"""
+        # A watchdog may fire between two statements, when there is nothing to cancel
+        if (
+            self._script_deadline is not None
+            and time.monotonic() >= self._script_deadline
+        ):
+            raise StatementTimeoutError("Script exceeded its timeout")
+        if self._running_statement is not None:
+            # The statements of a failed batch replayed one by one run within its bounds
+            yield
+            return
+        with self._cancel_lock:
+            self._statement_count += 1
+            statement = self._running_statement = self._statement_count
+            self._statement_cancelled = False
+        self._statement_deadline = (
+            None
+            if self._statement_timeout is None
+            else time.monotonic() + self._statement_timeout
+        )
+        failed = True
+        try:
+            if self.supports_statement_timeout:
+                self.ensure_statement_timeout(timeout=self._statement_timeout)
+                yield
+            else:
+                with self._watchdog(
+                    timeout=self._statement_timeout, statement=statement
+                ):
+                    yield
+            failed = False
+        finally:
+            with self._cancel_lock:
+                self._running_statement = None
+                # A statement failing past its deadline timed out, even when the
+                # watchdog has not cancelled it yet
+                self._statement_cancelled = failed and (
+                    self._statement_cancelled or self._deadline_passed()
+                )
+                self._statement_deadline = None
+
+    def _is_timed_out(self, error: BaseException) -> bool:
+        return self._statement_cancelled or self._is_timeout_error(error=error)
+
+    def _raise_if_timed_out(self, error: Exception) -> None:
+        if self._is_timed_out(error=error):
+            raise StatementTimeoutError(
+                f"Statement exceeded its timeout: {error}"
+            ) from error
+
     def reset_session(self) -> None:
+        """Restores the configured session context, unless it is known to be unchanged"""
+        if self._session_context_valid:
+            return
+        self._apply_session_context()
+        self._session_context_valid = True
+
+    def _apply_session_context(self) -> None:
         pass
 
     def reset_query_tag(self, extra_tag=None) -> None:
         pass
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
         pass
 
     def create_change_history_schema(self, dry_run: bool) -> None:
@@ -139,12 +595,46 @@ class BaseSession(metaclass=Singleton):
     def set_autocommit(self, autocommit: bool) -> None:
         self._connection.autocommit = autocommit
 
+    def ensure_autocommit(self, autocommit: bool) -> None:
+        """Switches autocommit only when the tracked state differs, saving a round trip"""
+        if self._autocommit_state == autocommit:
+            return
+        self.set_autocommit(autocommit=autocommit)
+        self._autocommit_state = autocommit
+
     def _commit(self):
         self.connection.commit()
 
     def _rollback(self):
         self.connection.rollback()
 
+    @contextmanager
+    def script_transaction(self) -> Iterator[None]:
+        """
+        Runs the enclosed statements in one transaction committed once at the end,
+        or rolled back entirely on failure, when transactional scripts are enabled
+        """
+        if not self.transactional_scripts:
+            yield
+            return
+
+        _ = self.cursor
+        self.ensure_autocommit(autocommit=False)
+        self._in_transaction = True
+        try:
+            yield
+        except Exception as e:
+            self._in_transaction = False
+            try:
+                self._rollback()
+            except Exception as rollback_error:
+                self.logger.warning(
+                    "Failed to roll back script transaction", error=str(rollback_error)
+                )
+            raise e
+        self._in_transaction = False
+        self._commit()
+
     def execute_query_with_debug(self, query: str, dry_run: bool) -> None:
         if dry_run:
             self.logger.debug(
@@ -157,64 +647,768 @@ class BaseSession(metaclass=Singleton):
     def _is_connection_alive(self):
         if self._connection is None:
             return False
+        self.liveness_probes += 1
         try:
-            self._cursor.execute("SELECT 1")
+            self._cursor.execute(self.liveness_query)
             self.get_executed_query_data(self._cursor)
             if not self.autocommit:
                 self._connection.commit()
+            self._last_activity_time = time.monotonic()
             return True
         except Exception:
             return False
 
-    def get_executed_query_data(self, cursor) -> List[Dict[str, Any]]:
-        columns = list(cursor.description)
-        rows = cursor.fetchall()
-        data = []
-        for r in rows:
-            tmp = {}
-            for i, col in enumerate(columns):
-                tmp[col[0].lower()] = r[i]
-            data.append(tmp)
+    def get_executed_query_data(self, cursor) -> ResultSet:
+        return ResultSet.from_cursor(cursor=cursor)
+
+    def get_result_handler(self, script_name: str) -> ResultHandler:
+        return get_result_handler(
+            result_policy=self.result_policy,
+            script_name=script_name,
+            logger=self.logger,
+            preview_rows=self.result_preview_rows,
+            export_folder=self.result_export_folder,
+        )
 
-        return data
+    def _discard_remaining_rows(self, cursor) -> None:
+        """Hook for drivers requiring unread rows to be consumed before the next statement"""
+        pass
 
-    def execute_query(self, query: str, params: Optional[Tuple] = None) -> Any:
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[Tuple | Dict[str, Any]] = None,
+        result_handler: Optional[ResultHandler] = None,
+    ) -> Any:
         self.logger.debug(
             "Executing query",
             query=indent(query, prefix="\t"),
         )
+        attempt = 0
+        while True:
+            try:
+                data = self._execute_query(
+                    query=query, params=params, result_handler=result_handler
+                )
+                self._last_activity_time = time.monotonic()
+                return data
+            except Exception as e:
+                # A statement timeout set in a transaction is rolled back with it
+                self._statement_timeout_valid = False
+                if isinstance(e, StatementTimeoutError):
+                    raise e
+                self._raise_if_timed_out(error=e)
+                is_transient_error = self._is_transient_error(error=e)
+                is_connection_error = (
+                    not is_transient_error and self._is_connection_error(error=e)
+                )
+                max_attempts = (
+                    self.connection_retries
+                    if is_connection_error
+                    else self.statement_retries
+                )
+                if attempt >= max_attempts or not self._is_retryable(
+                    query=query,
+                    is_transient_error=is_transient_error,
+                    is_connection_error=is_connection_error,
+                ):
+                    raise e
+                attempt += 1
+                self.retries += 1
+                delay = self._get_retry_delay(attempt=attempt)
+                self.logger.warning(
+                    "Query failed with a retryable error, retrying",
+                    attempt=attempt,
+                    max_attempts=max_attempts,
+                    delay=round(delay, 3),
+                    reconnect=is_connection_error,
+                    error=str(e),
+                )
+                time.sleep(delay)
+                if is_connection_error:
+                    self._reconnect()
+
+    def _is_retryable(
+        self, query: str, is_transient_error: bool, is_connection_error: bool
+    ) -> bool:
+        # A new attempt would not see the statements before it in an open script
+        # transaction, which the database may have rolled back as well
+        if self._in_transaction:
+            return False
+        if is_transient_error:
+            return True
+        if is_connection_error:
+            # The statement may have been applied before the connection was lost
+            return self._statement_rolled_back or bool(
+                IDEMPOTENT_STATEMENT_PATTERN.match(normalize_statement(query))
+            )
+        return False
+
+    def _get_retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, so concurrent deploys do not retry in lockstep"""
+        backoff = min(MAX_RETRY_BACKOFF, self.retry_backoff * 2 ** (attempt - 1))
+        return random.uniform(0, backoff)
+
+    def _execute_query(
+        self,
+        query: str,
+        params: Optional[Tuple | Dict[str, Any]] = None,
+        result_handler: Optional[ResultHandler] = None,
+    ) -> Any:
+        """
+        Returns the rows of row-returning statements, or hands them to the result handler
+        of the change script, and the row count of DML statements
+        """
         cursor = self.cursor
         normalized_query = query.strip().upper()
         is_ddl = normalized_query.startswith(tuple(DDL.items()))
+        is_non_transactional = self._is_non_transactional(statement=query)
+        if is_non_transactional and self._in_transaction:
+            # The statement cannot run in the script transaction, the statements
+            # before it are committed first
+            self.logger.warning(
+                "Committing the script transaction before a statement that cannot run in a transaction",
+                query=query,
+            )
+            self._commit()
+        # Within a script transaction, script_transaction commits all statements at once
+        commit_statement = (
+            not self._in_transaction
+            and not is_ddl
+            and not is_non_transactional
+            and not self.autocommit
+        )
+        self._statement_rolled_back = False
+        committing = False
         try:
             data = None
 
-            if is_ddl:
-                self.set_autocommit(autocommit=True)
+            # DDL and non-transactional statements run in autocommit, other statements
+            # in the configured mode. Autocommit is restored lazily, before the next
+            # statement needing another mode
+            if is_non_transactional:
+                self.ensure_autocommit(autocommit=True)
+            elif not self._in_transaction:
+                self.ensure_autocommit(autocommit=True if is_ddl else self.autocommit)
+
+            if SESSION_CONTEXT_PATTERN.match(normalized_query):
+                self._session_context_valid = False
+
+            with self._bounded_statement():
+                self._execute_cursor(cursor=cursor, query=query, params=params)
+
+                if normalized_query.startswith(tuple([*DQL.items(), DDL.SHOW])):
+                    if result_handler is None:
+                        data = self.get_executed_query_data(cursor)
+                    else:
+                        result_handler.handle(cursor=cursor, query=query)
+                        self._discard_remaining_rows(cursor=cursor)
+                elif normalized_query.startswith(tuple(DML.items())):
+                    data = cursor.rowcount
+
+            if commit_statement:
+                committing = True
+                self._commit()
+
+            return data
+        except Exception as e:
+            if commit_statement:
+                # A failed commit may still have been applied by the database
+                self._statement_rolled_back = not committing
+                self._rollback()
+            raise e
+        finally:
+            if is_non_transactional and self._in_transaction:
+                # Following statements of the script run in a new transaction
+                self.ensure_autocommit(autocommit=False)
 
+    def _execute_cursor(
+        self, cursor, query: str, params: Optional[Tuple | Dict[str, Any]] = None
+    ) -> None:
+        if not self.async_execution:
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
+            return
+        query_id = self._submit_statement(cursor=cursor, query=query, params=params)
+        self._wait_for_statement(cursor=cursor, query_id=query_id)
+        self._fetch_statement_result(cursor=cursor, query_id=query_id)
 
-            if is_ddl:
-                self.set_autocommit(autocommit=self.autocommit)
+    def _submit_statement(
+        self, cursor, query: str, params: Optional[Tuple | Dict[str, Any]]
+    ) -> Optional[str]:
+        """Submits the statement without waiting for it, returns its query id"""
+        raise NotImplementedError
 
-            if normalized_query.startswith(tuple([*DQL.items(), DDL.SHOW])):
-                data = self.get_executed_query_data(cursor)
-            elif normalized_query.startswith(tuple(DML.items())):
-                data = cursor.rowcount
+    def _is_statement_running(self, cursor, query_id: Optional[str]) -> bool:
+        """Raises the error of the statement when it failed"""
+        raise NotImplementedError
 
-            if not is_ddl and not self.autocommit:
-                self._commit()
+    def _fetch_statement_result(self, cursor, query_id: Optional[str]) -> None:
+        """Attaches the result of the completed statement to the cursor"""
+        raise NotImplementedError
 
-            return data
+    def _is_poll_error(self, error: Exception) -> bool:
+        """Errors of a status poll not telling anything about the statement, e.g. network errors"""
+        return self._is_connection_error(error=error)
+
+    def _wait_for_statement(self, cursor, query_id: Optional[str]) -> None:
+        """
+        Polls the statement with exponential backoff, so that short statements are seen
+        completed quickly and long ones are polled rarely. The statement keeps running
+        on the database when a poll fails, polls failing with a network error are retried
+        """
+        delay = ASYNC_POLL_INITIAL_DELAY
+        failed_polls = 0
+        while True:
+            try:
+                if not self._is_statement_running(cursor=cursor, query_id=query_id):
+                    return
+                failed_polls = 0
+            except Exception as e:
+                if failed_polls >= self.connection_retries or not self._is_poll_error(
+                    error=e
+                ):
+                    raise e
+                failed_polls += 1
+                self.logger.warning(
+                    "Failed to poll statement status, polling again",
+                    query_id=query_id,
+                    error=str(e),
+                )
+            time.sleep(delay)
+            delay = min(ASYNC_POLL_MAX_DELAY, delay * 2)
+
+    def fetch_concurrently(self, queries: List[str]) -> List[ResultSet]:
+        """
+        Runs independent read-only queries, all in flight at the same time on the
+        database with asynchronous execution, and returns their rows in order
+        """
+        if not self.async_execution:
+            return [self.execute_query(query=query) for query in queries]
+        submitted = []
+        for query in queries:
+            self.logger.debug("Submitting query", query=indent(query, prefix="\t"))
+            cursor = self.connection.cursor()
+            submitted.append(
+                (
+                    cursor,
+                    self._submit_statement(cursor=cursor, query=query, params=None),
+                )
+            )
+        results = []
+        try:
+            for cursor, query_id in submitted:
+                self._wait_for_statement(cursor=cursor, query_id=query_id)
+                self._fetch_statement_result(cursor=cursor, query_id=query_id)
+                results.append(self.get_executed_query_data(cursor))
+        finally:
+            for cursor, _ in submitted:
+                cursor.close()
+        self._last_activity_time = time.monotonic()
+        return results
+
+    def execute_statements(
+        self,
+        statements: List[str],
+        result_handler: Optional[ResultHandler] = None,
+        start_statement_index: int = 0,
+        completed_statements: Collection[int] = (),
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        """
+        Runs the statements of a script from start_statement_index, except those applied
+        by a parallel block of a previous run, moving the checkpoint of the script past
+        the statements as they are committed. Raises ScriptStatementError with the index
+        of the first statement not applied
+        """
+        for block_start, block, parallel in split_parallel_blocks(
+            statements=statements
+        ):
+            if block_start + len(block) <= start_statement_index:
+                continue
+            if block_start < start_statement_index:
+                block = block[start_statement_index - block_start :]
+                block_start = start_statement_index
+            if parallel:
+                pending = [
+                    (statement_index, statement)
+                    for statement_index, statement in enumerate(
+                        block, start=block_start
+                    )
+                    if statement_index not in completed_statements
+                ]
+                if not pending:
+                    continue
+                statement_indexes, block = map(list, zip(*pending))
+                block_start = statement_indexes[0]
+            if parallel and len(block) > 1:
+                self.execute_parallel_block(
+                    statements=block,
+                    statement_indexes=statement_indexes,
+                    checkpoint=checkpoint,
+                )
+            else:
+                self._execute_sequential_statements(
+                    statements=block,
+                    block_start=block_start,
+                    result_handler=result_handler,
+                    checkpoint=checkpoint,
+                )
+
+    def _execute_sequential_statements(
+        self,
+        statements: List[str],
+        block_start: int = 0,
+        result_handler: Optional[ResultHandler] = None,
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        block_end = block_start + len(statements)
+        # Index in the script of the first statement covered by each statement to run,
+        # and of the statement following it
+        statement_indexes, statements = self.coalesce_inserts(statements=statements)
+        statement_indexes = [block_start + index for index in statement_indexes]
+        next_indexes = [*statement_indexes[1:], block_end]
+        if self.statement_batch_size <= 1 or not self.supports_statement_batching:
+            for statement_index, next_index, statement in zip(
+                statement_indexes, next_indexes, statements
+            ):
+                self._execute_script_statement(
+                    statement_index=statement_index,
+                    statement=statement,
+                    result_handler=result_handler,
+                )
+                self.save_checkpoint(checkpoint=checkpoint, statement_index=next_index)
+            return
+
+        # Row-returning statements are never batched, they run on their own
+        batch_start = 0
+        for batch in self._get_statement_batches(statements=statements):
+            if len(batch) == 1:
+                self._execute_script_statement(
+                    statement_index=statement_indexes[batch_start],
+                    statement=batch[0],
+                    result_handler=result_handler,
+                )
+                self.save_checkpoint(
+                    checkpoint=checkpoint, statement_index=next_indexes[batch_start]
+                )
+                batch_start += 1
+                continue
+            try:
+                self.throttle.before_statements(statements=len(batch))
+                self.execute_batch(queries=batch)
+            except BatchStatementError as e:
+                failed_position = batch_start + e.statement_index
+                if (
+                    self._in_transaction
+                    or e.__cause__ is None
+                    or not self._is_transient_error(error=e.__cause__)
+                ):
+                    raise ScriptStatementError(
+                        statement_index=statement_indexes[failed_position],
+                        statement=e.statement,
+                    ) from e
+                # The remaining statements run one by one with the retry policy of
+                # execute_query, from the failing one when the statements before it
+                # were applied, else from the start of the batch
+                resume_position = batch_start if e.rolled_back else failed_position
+                for position, statement in enumerate(
+                    batch[resume_position - batch_start :], start=resume_position
+                ):
+                    self._execute_script_statement(
+                        statement_index=statement_indexes[position],
+                        statement=statement,
+                    )
+                    self.save_checkpoint(
+                        checkpoint=checkpoint, statement_index=next_indexes[position]
+                    )
+            except Exception as e:
+                # The failing statement is unknown, none of the batch is considered applied
+                raise ScriptStatementError(
+                    statement_index=statement_indexes[batch_start], statement=batch[0]
+                ) from e
+            batch_start += len(batch)
+            self.save_checkpoint(
+                checkpoint=checkpoint, statement_index=next_indexes[batch_start - 1]
+            )
+
+    def coalesce_inserts(self, statements: List[str]) -> Tuple[List[int], List[str]]:
+        """
+        Coalesces consecutive single-table INSERT ... VALUES statements into multi-row
+        statements, returns the statements to run and the index in the script of the
+        first statement each one covers
+        """
+        coalesced = coalesce_inserts(
+            statements=statements,
+            batch_size=self.insert_batch_size,
+            max_statement_length=self.max_statement_length,
+            max_insert_rows=self.max_insert_rows,
+            build_insert=self.build_multi_row_insert,
+        )
+        if len(coalesced) < len(statements):
+            self.logger.debug(
+                "Coalesced INSERT statements",
+                statements=len(statements),
+                coalesced_statements=len(coalesced),
+            )
+        return [index for index, _ in coalesced], [
+            statement for _, statement in coalesced
+        ]
+
+    def build_multi_row_insert(self, target: str, rows: List[str]) -> str:
+        return build_multi_row_insert(target=target, rows=rows)
+
+    def fork(self) -> BaseSession:
+        """New session with the same settings and its own connection"""
+        session = type(self)(session_kwargs=self.session_kwargs, logger=self.logger)
+        # The limits apply to the statements of all sessions, which share one pool
+        session.throttle = self.throttle
+        session._pool = self.pool
+        return session
+
+    def is_healthy(self) -> bool:
+        """Whether the first value returned by the health check query is truthy"""
+        data = self.execute_query(query=self.health_check_query)
+        healthy = bool(data) and bool(data.rows[0][0])
+        if not healthy:
+            self.logger.info("Health check failed", query=self.health_check_query)
+        return healthy
+
+    def execute_parallel_block(
+        self,
+        statements: List[str],
+        statement_indexes: List[int],
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        """
+        Runs the statements concurrently, each on one of up to parallel_connections
+        sessions of the pool. Every statement runs, and each failure is logged before
+        ScriptStatementError is raised for the first failing statement. The statements
+        applied are added to the checkpoint, so they are not run again on resume
+        """
+        sessions: List[BaseSession] = []
+        if self.parallel_connections >= 2 and not self._in_transaction:
+            # The statements of a script transaction must run on its connection
+            while len(sessions) < min(self.parallel_connections, len(statements)):
+                session = self.pool.acquire(block=False)
+                if session is None:
+                    break
+                sessions.append(session)
+        if len(sessions) < 2:
+            for session in sessions:
+                self.pool.release(session=session)
+            # Runs of consecutive statements, those applied by a previous run left out
+            for _, run in groupby(
+                enumerate(zip(statement_indexes, statements)),
+                key=lambda item: item[1][0] - item[0],
+            ):
+                run_indexes, run_statements = zip(*(item for _, item in run))
+                self._execute_sequential_statements(
+                    statements=list(run_statements),
+                    block_start=run_indexes[0],
+                    checkpoint=checkpoint,
+                )
+            return
+        try:
+            self._execute_parallel_statements(
+                statements=statements,
+                statement_indexes=statement_indexes,
+                sessions=sessions,
+                checkpoint=checkpoint,
+            )
+        finally:
+            for session in sessions:
+                self.pool.release(session=session)
+        self.save_checkpoint(
+            checkpoint=checkpoint, statement_index=statement_indexes[-1] + 1
+        )
+
+    def _execute_parallel_statements(
+        self,
+        statements: List[str],
+        statement_indexes: List[int],
+        sessions: List[BaseSession],
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        available: queue.Queue = queue.Queue()
+        for session in sessions:
+            available.put(session)
+        self.logger.debug(
+            "Executing parallel block",
+            statements=len(statements),
+            connections=len(sessions),
+        )
+
+        # The sessions run with the timeouts of the running script
+        statement_timeout = self._statement_timeout
+        script_deadline = self._script_deadline
+
+        def run(statement: str) -> None:
+            session = available.get()
+            try:
+                script_timeout = (
+                    None
+                    if script_deadline is None
+                    else script_deadline - time.monotonic()
+                )
+                self.throttle.before_statements()
+                with session.script_timeouts(
+                    statement_timeout=statement_timeout, script_timeout=script_timeout
+                ):
+                    session.reset_session()
+                    session.execute_query(query=statement)
+            finally:
+                available.put(session)
+
+        with ThreadPoolExecutor(
+            max_workers=len(sessions),
+            thread_name_prefix="schemachange-parallel",
+        ) as executor:
+            futures = [executor.submit(run, statement) for statement in statements]
+            if checkpoint is not None:
+                # The checkpoint stays on the first statement of the block not applied,
+                # with the statements applied after it
+                future_indexes = dict(zip(futures, statement_indexes))
+                for future in as_completed(futures):
+                    if future.exception() is not None:
+                        continue
+                    checkpoint.completed_statements.add(future_indexes[future])
+                    self.save_checkpoint(
+                        checkpoint=checkpoint,
+                        statement_index=min(
+                            (
+                                statement_index
+                                for statement_index in statement_indexes
+                                if statement_index
+                                not in checkpoint.completed_statements
+                            ),
+                            default=statement_indexes[-1] + 1,
+                        ),
+                    )
+
+        failures = []
+        for statement_index, statement, future in zip(
+            statement_indexes, statements, futures
+        ):
+            error = future.exception()
+            if error is None:
+                continue
+            self.logger.error(
+                "Statement of parallel block failed",
+                statement_number=statement_index + 1,
+                error=str(error),
+            )
+            failures.append((statement_index, statement, error))
+        self._last_activity_time = time.monotonic()
+        if failures:
+            statement_index, statement, error = failures[0]
+            raise ScriptStatementError(
+                statement_index=statement_index, statement=statement
+            ) from error
+
+    def _execute_script_statement(
+        self,
+        statement_index: int,
+        statement: str,
+        result_handler: Optional[ResultHandler] = None,
+    ) -> None:
+        try:
+            self.throttle.before_statements()
+            self.execute_query(query=statement, result_handler=result_handler)
         except Exception as e:
-            if not is_ddl and not self.autocommit:
+            raise ScriptStatementError(
+                statement_index=statement_index, statement=statement
+            ) from e
+
+    def execute_chunked_statements(
+        self,
+        statements: List[str],
+        chunk: ChunkSettings,
+        start_statement_index: int = 0,
+        start_chunk_key: Optional[int] = None,
+        checkpoint: Optional[ScriptCheckpoint] = None,
+    ) -> None:
+        """
+        Runs the statements once per key range of the chunk table, each statement
+        committed on its own, so locks and undo are bounded by the chunk size.
+        Resumes from start_statement_index of the chunk starting at start_chunk_key,
+        the checkpoint following the statements and chunks as they are committed
+        """
+        data = self.execute_query(query=chunk.key_range_query())
+        min_key, max_key = (
+            (get_key_value(value) for value in data.rows[0]) if data else (None, None)
+        )
+        if min_key is None or max_key is None:
+            self.logger.info("Chunk table is empty, skipping chunks", table=chunk.table)
+            return
+
+        def next_key(key: int) -> Optional[int]:
+            data = self.execute_query(
+                query=chunk.next_key_query(key=key, max_key=max_key)
+            )
+            return get_key_value(data.rows[0][0]) if data else None
+
+        chunks = chunk.get_chunks(
+            min_key=min_key,
+            max_key=max_key,
+            start_key=start_chunk_key,
+            next_key=next_key,
+        )
+        for chunk_index, (lower, upper) in enumerate(chunks):
+            if chunk_index > 0 and chunk.pause:
+                time.sleep(chunk.pause)
+            first_statement_index = start_statement_index if chunk_index == 0 else 0
+            for statement_index in range(first_statement_index, len(statements)):
+                statement = statements[statement_index]
+                try:
+                    self.throttle.before_statements()
+                    self.execute_query(
+                        query=chunk.bind_chunk(
+                            statement=statement, lower=lower, upper=upper
+                        )
+                    )
+                except Exception as e:
+                    raise ScriptStatementError(
+                        statement_index=statement_index,
+                        statement=statement,
+                        chunk_key=lower,
+                    ) from e
+                # The last statement of a chunk moves the checkpoint to the next chunk
+                if statement_index + 1 < len(statements):
+                    self.save_checkpoint(
+                        checkpoint=checkpoint,
+                        statement_index=statement_index + 1,
+                        chunk_key=lower,
+                    )
+                else:
+                    self.save_checkpoint(
+                        checkpoint=checkpoint, statement_index=0, chunk_key=upper
+                    )
+            self.logger.info(
+                "Applied chunk", lower_key=lower, upper_key=upper, max_key=max_key
+            )
+
+    def _is_non_transactional(self, statement: str) -> bool:
+        pattern = NON_TRANSACTIONAL_STATEMENT_PATTERNS.get(self.db_type)
+        if pattern is None:
+            return False
+        return pattern.search(normalize_statement(statement=statement)) is not None
+
+    def _is_batchable(self, normalized_query: str) -> bool:
+        """
+        Row-returning, session context and non-transactional statements
+        are always sent on their own
+        """
+        if normalized_query.startswith(tuple([*DQL.items(), DDL.SHOW])):
+            return False
+        if SESSION_CONTEXT_PATTERN.match(normalized_query):
+            return False
+        return not self._is_non_transactional(statement=normalized_query)
+
+    def _get_statement_batches(self, statements: List[str]) -> List[List[str]]:
+        # Consecutive batchable statements are grouped, DDL and other statements
+        # are never mixed since they run with different autocommit modes
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        batch_is_ddl = False
+        for statement in statements:
+            normalized_query = normalize_statement(statement=statement)
+            is_ddl = normalized_query.startswith(tuple(DDL.items()))
+            if not self._is_batchable(normalized_query=normalized_query):
+                if batch:
+                    batches.append(batch)
+                    batch = []
+                batches.append([statement])
+                continue
+
+            if batch and (
+                is_ddl != batch_is_ddl or len(batch) >= self.statement_batch_size
+            ):
+                batches.append(batch)
+                batch = []
+            batch.append(statement)
+            batch_is_ddl = is_ddl
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def execute_batch(self, queries: List[str]) -> None:
+        self.logger.debug(
+            "Executing batch",
+            statements=len(queries),
+            query=indent("\n".join(queries), prefix="\t"),
+        )
+        is_ddl = normalize_statement(statement=queries[0]).startswith(
+            tuple(DDL.items())
+        )
+        commit_batch = not self._in_transaction and not is_ddl and not self.autocommit
+        # Connect, or reconnect an idle connection, before switching autocommit
+        _ = self.cursor
+        if not self._in_transaction:
+            self.ensure_autocommit(autocommit=True if is_ddl else self.autocommit)
+        try:
+            with self._bounded_statement():
+                self._execute_batch(queries=queries)
+        except BatchStatementError as e:
+            self._statement_timeout_valid = False
+            cause = e.__cause__
+            if (
+                commit_batch
+                and cause is not None
+                and self._is_transaction_rollback_error(error=cause)
+            ):
+                # The statements before the failing one were rolled back with it
+                e.rolled_back = True
+                self._rollback()
+            elif commit_batch:
+                # Statements before the failing one were applied, commit them
+                # as if the statements had been sent one by one
+                self._commit()
+            if (
+                cause is not None
+                and not is_timeout(error=cause)
+                and self._is_timed_out(error=cause)
+            ):
+                # Keep the index of the failing statement, recording why it failed
+                timeout = StatementTimeoutError(
+                    f"Statement exceeded its timeout: {cause}"
+                )
+                timeout.__cause__ = cause
+                e.__cause__ = timeout
+            raise e
+        except Exception as e:
+            self._statement_timeout_valid = False
+            if commit_batch:
                 self._rollback()
+            if isinstance(e, StatementTimeoutError):
+                raise e
+            self._raise_if_timed_out(error=e)
             raise e
 
+        if commit_batch:
+            self._commit()
+        self._last_activity_time = time.monotonic()
+
+    def _execute_batch(self, queries: List[str]) -> None:
+        """
+        Sends the queries in one round trip, raising BatchStatementError
+        with the index of the failing statement
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support statement batching"
+        )
+
     def close(self) -> None:
+        # Sessions forked by the pool share it, it is closed with the session owning it
+        if self._pool is not None and self._pool.owner is self:
+            self._pool.close()
+            self._pool = None
+        self._close_connection()
+
+    def _close_connection(self) -> None:
         if self._cursor:
             self._cursor.close()
             self._cursor = None
@@ -224,45 +1418,35 @@ class BaseSession(metaclass=Singleton):
             self._connection = None
 
     def create_change_history_table(self, dry_run: bool) -> None:
-        query = f"""\
-            CREATE TABLE {self.change_history_table.fully_qualified} (
-                VERSION VARCHAR(1000),
-                DESCRIPTION VARCHAR(1000),
-                SCRIPT VARCHAR(1000),
-                SCRIPT_TYPE VARCHAR(1000),
-                CHECKSUM VARCHAR(1000),
-                EXECUTION_TIME BIGINT,
-                STATUS VARCHAR(1000),
-                BATCH_ID VARCHAR(1000),
-                BATCH_STATUS VARCHAR(1000),
-                IS_FORCED VARCHAR(1000),
-                INSTALLED_BY VARCHAR(1000),
-                INSTALLED_ON TIMESTAMP
-            )
-        """
-        self.execute_query_with_debug(query=query, dry_run=dry_run)
+        self.execute_query_with_debug(
+            query=self.change_history_table_ddl(), dry_run=dry_run
+        )
+
+    def run_steps(self, steps: Steps[T]) -> T:
+        """Runs the steps of a ChangeHistoryBookkeeping method, see its docstring"""
+        result: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                name, kwargs = (
+                    steps.send(result) if error is None else steps.throw(error)
+                )
+            except StopIteration as stop:
+                return stop.value
+            try:
+                result, error = getattr(self, name)(**kwargs), None
+            except Exception as e:
+                result, error = None, e
 
     def change_history_table_exists(
         self, create_change_history_table: bool, dry_run: bool
     ) -> bool:
-        change_history_metadata = self.fetch_change_history_metadata()
-        if change_history_metadata:
-            self.logger.info(
-                f"Using existing change history table {self.change_history_table.fully_qualified}",
-                last_altered=change_history_metadata[0].get("update_time"),
-            )
-            return True
-        elif create_change_history_table:
-            self.create_change_history_schema(dry_run=dry_run)
-            self.create_change_history_table(dry_run=dry_run)
-            if dry_run:
-                return False
-            self.logger.info("Created change history table")
-            return True
-        else:
-            raise ValueError(
-                f"Unable to find change history table {self.change_history_table.fully_qualified}"
+        return self.run_steps(
+            self.change_history_table_exists_steps(
+                create_change_history_table=create_change_history_table,
+                dry_run=dry_run,
             )
+        )
 
     def get_script_metadata(
         self, create_change_history_table: bool, dry_run: bool
@@ -271,75 +1455,22 @@ class BaseSession(metaclass=Singleton):
         Dict[str, List[str]] | None,
         str | int | None,
     ]:
-        change_history_table_exists = self.change_history_table_exists(
-            create_change_history_table=create_change_history_table,
-            dry_run=dry_run,
-        )
-        if not change_history_table_exists:
-            return {}, {}, None
-
-        change_history, max_published_version = self.fetch_versioned_scripts()
-        r_scripts_checksum = self.fetch_repeatable_scripts()
-
-        self.logger.info(
-            "Max applied change script version %(max_published_version)s"
-            % {"max_published_version": max_published_version}
+        return self.run_steps(
+            self.script_metadata_steps(
+                create_change_history_table=create_change_history_table,
+                dry_run=dry_run,
+            )
         )
-        return change_history, r_scripts_checksum, max_published_version
 
     def fetch_repeatable_scripts(self) -> Dict[str, List[str]]:
-        query = f"""\
-        SELECT DISTINCT
-            SCRIPT,
-            FIRST_VALUE(CHECKSUM) OVER (
-                PARTITION BY SCRIPT
-                ORDER BY INSTALLED_ON DESC
-            ) AS CHECKSUM
-        FROM {self.change_history_table.fully_qualified}
-        WHERE SCRIPT_TYPE = '{ScriptType.REPEATABLE}'
-            AND STATUS = '{ApplyStatus.SUCCESS}'
-            AND BATCH_STATUS = '{ApplyStatus.SUCCESS}'
-        """
-        data = self.execute_query(query=dedent(query))
-
-        script_checksums: Dict[str, List[str]] = defaultdict(list)
-        for item in data:
-            script = item["script"]
-            checksum = item["checksum"]
-
-            script_checksums[script].append(checksum)
-
-        return script_checksums
+        data = self.execute_query(query=self.repeatable_scripts_query())
+        return collect_repeatable_scripts(data=data)
 
     def fetch_versioned_scripts(
         self,
     ) -> Tuple[Dict[str, Dict[str, str | int]], str | int | None]:
-        query = f"""\
-        SELECT VERSION, SCRIPT, CHECKSUM
-        FROM {self.change_history_table.fully_qualified}
-        WHERE SCRIPT_TYPE = '{ScriptType.VERSIONED}'
-            AND STATUS = '{ApplyStatus.SUCCESS}'
-            AND BATCH_STATUS = '{ApplyStatus.SUCCESS}'
-            AND IS_FORCED = 'N'
-        ORDER BY INSTALLED_ON DESC
-        """
-        data = self.execute_query(query=dedent(query))
-
-        versioned_scripts: Dict[str, Dict[str, str | int]] = defaultdict(dict)
-        versions: List[str | int | None] = []
-        for item in data:
-            version = item["version"]
-            script = item["script"]
-            checksum = item["checksum"]
-
-            versions.append(version if version != "" else None)
-            versioned_scripts[script] = {
-                "version": version,
-                "script": script,
-                "checksum": checksum,
-            }
-
-        return versioned_scripts, versions[0] if versions else None
+        data = self.execute_query(query=self.versioned_scripts_query())
+        return collect_versioned_scripts(data=data)
 
     def log_change_script(
         self,
@@ -351,37 +1482,16 @@ class BaseSession(metaclass=Singleton):
         batch_status: str,
         force: bool,
     ) -> None:
-        apply_user = f"'{self.user}'" if self.user else "NULL"
-        query = f"""\
-            INSERT INTO {self.change_history_table.fully_qualified} (
-                VERSION,
-                DESCRIPTION,
-                SCRIPT,
-                SCRIPT_TYPE,
-                CHECKSUM,
-                EXECUTION_TIME,
-                STATUS,
-                BATCH_ID,
-                BATCH_STATUS,
-                IS_FORCED,
-                INSTALLED_BY,
-                INSTALLED_ON
-            ) VALUES (
-                '{getattr(script, "version", "")}',
-                '{script.description}',
-                '{script.name}',
-                '{script.type}',
-                '{checksum}',
-                {execution_time},
-                '{status}',
-                '{batch_id}',
-                '{batch_status}',
-                '{"Y" if force and script.type == ScriptType.VERSIONED else "N"}',
-                {apply_user},
-                '{datetime.datetime.now().strftime(DEFAULT_DATETIME_FORMAT)}'
-            )
-        """
-        self.execute_query(query=dedent(query))
+        query, params = self.log_change_script_statement(
+            script=script,
+            checksum=checksum,
+            execution_time=execution_time,
+            status=status,
+            batch_id=batch_id,
+            batch_status=batch_status,
+            force=force,
+        )
+        self.execute_query(query=query, params=params)
 
     def apply_change_script(
         self,
@@ -391,48 +1501,299 @@ class BaseSession(metaclass=Singleton):
         logger: structlog.BoundLogger,
         batch_id: str,
         force: bool = False,
+        start_statement_index: int = 0,
+        start_chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
     ) -> None:
         if dry_run:
             logger.debug("Running in dry-run mode. Skipping execution")
             return
-        logger.info("Applying change script")
+        if start_statement_index > 0 or start_chunk_key is not None:
+            logger.info(
+                "Resuming change script",
+                start_statement=start_statement_index + 1,
+                start_chunk_key=start_chunk_key,
+            )
+        else:
+            logger.info("Applying change script")
+        self.throttle.before_script()
         # Define a few other change related variables
-        checksum = hashlib.sha224(script_content.encode("utf-8")).hexdigest()
+        checksum = get_checksum(
+            content=script_content, algorithm=self.checksum_algorithm
+        )
         execution_time = 0
+        failed_statement_index = None
+        failed_chunk_key = None
+        headers = get_script_headers(script_content=script_content)
+        chunk = get_chunk_settings(headers=headers, script_content=script_content)
+        statement_timeout = get_timeout_header(
+            headers=headers, key="statement-timeout", default=self.statement_timeout
+        )
+        script_timeout = get_timeout_header(
+            headers=headers, key="script-timeout", default=self.script_timeout
+        )
+        # A script transaction rolls back the statements it ran, it is resumed from
+        # its start, otherwise the checkpoint follows the committed statements
+        rolled_back = self.transactional_scripts and chunk is None
+        checkpoint = None
+        if script.type in DEPLOYABLE_SCRIPT_TYPES and not rolled_back:
+            checkpoint = self.start_checkpoint(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=start_statement_index,
+                chunk_key=start_chunk_key,
+                completed_statements=completed_statements,
+            )
+        start = time.time()
 
-        # Execute the contents of the script
-        if len(script_content) > 0:
-            start = time.time()
-            self.reset_session()
-            self.reset_query_tag(extra_tag=script.name)
-            try:
-                for command in sqlparse.split(sql=script_content):
-                    self.execute_query(query=command)
-            except Exception as e:
-                raise Exception(f"Failed to execute {script.name}") from e
-            self.reset_query_tag()
-            self.reset_session()
-            end = time.time()
-            execution_time = round(end - start)
-
-        if script.type in DEPLOYABLE_SCRIPT_TYPES:
-            self.log_change_script(
+        try:
+            # Chunked scripts commit each chunk, never in one script transaction
+            with nullcontext() if chunk is not None else self.script_transaction():
+                # Execute the contents of the script
+                if len(script_content) > 0:
+                    self.reset_session()
+                    self.reset_query_tag(extra_tag=script.name)
+                    try:
+                        with self.script_timeouts(
+                            statement_timeout=statement_timeout,
+                            script_timeout=script_timeout,
+                        ):
+                            if chunk is None:
+                                self.execute_statements(
+                                    statements=sqlparse.split(sql=script_content),
+                                    result_handler=self.get_result_handler(
+                                        script_name=script.name
+                                    ),
+                                    start_statement_index=start_statement_index,
+                                    completed_statements=completed_statements,
+                                    checkpoint=checkpoint,
+                                )
+                            else:
+                                self.execute_chunked_statements(
+                                    statements=sqlparse.split(sql=script_content),
+                                    chunk=chunk,
+                                    start_statement_index=start_statement_index,
+                                    start_chunk_key=start_chunk_key,
+                                    checkpoint=checkpoint,
+                                )
+                    except (ScriptStatementError, CheckpointError) as e:
+                        failed_statement_index = e.statement_index
+                        failed_chunk_key = e.chunk_key
+                        raise Exception(f"Failed to execute {script.name}") from e
+                    self.reset_query_tag()
+                    self.reset_session()
+                    execution_time = round(time.time() - start)
+
+                if script.type in DEPLOYABLE_SCRIPT_TYPES:
+                    self.log_change_script(
+                        script=script,
+                        checksum=checksum,
+                        execution_time=execution_time,
+                        status=ApplyStatus.SUCCESS,
+                        batch_id=batch_id,
+                        batch_status=ApplyStatus.IN_PROGRESS,
+                        force=force,
+                    )
+            if checkpoint is not None and checkpoint.saved:
+                self.delete_checkpoint(
+                    batch_id=batch_id, script_name=checkpoint.script_name
+                )
+        except Exception as e:
+            if (
+                failed_statement_index is not None
+                and script.type in DEPLOYABLE_SCRIPT_TYPES
+            ):
+                if is_timeout(error=e):
+                    logger.error(
+                        "Change script exceeded its timeout",
+                        statement_timeout=statement_timeout,
+                        script_timeout=script_timeout,
+                    )
+                    self.log_change_script(
+                        script=script,
+                        checksum=checksum,
+                        execution_time=round(time.time() - start),
+                        status=ApplyStatus.TIMED_OUT,
+                        batch_id=batch_id,
+                        batch_status=ApplyStatus.IN_PROGRESS,
+                        force=force,
+                    )
+                self.record_checkpoint(
+                    batch_id=batch_id,
+                    script=script,
+                    checksum=checksum,
+                    statement_index=(
+                        start_statement_index if rolled_back else failed_statement_index
+                    ),
+                    logger=logger,
+                    chunk_key=failed_chunk_key,
+                    completed_statements=(
+                        completed_statements
+                        if checkpoint is None
+                        else checkpoint.completed_statements
+                    ),
+                )
+            raise e
+        finally:
+            self.throttle.after_script()
+
+    def apply_seed_script(
+        self,
+        script: SeedScript,
+        checksum: str,
+        dry_run: bool,
+        logger: structlog.BoundLogger,
+        batch_id: str,
+        force: bool = False,
+    ) -> None:
+        """
+        Replaces the rows of the table of the seed script with the rows of its file,
+        so a changed or failed seed file is reloaded entirely by the next deploy
+        """
+        if dry_run:
+            logger.debug("Running in dry-run mode. Skipping execution")
+            return
+        logger.info("Loading seed file", table=script.table)
+        self.throttle.before_script()
+        start = time.time()
+        try:
+            with self.script_transaction():
+                self.reset_session()
+                self.reset_query_tag(extra_tag=script.name)
+                self.throttle.before_statements()
+                rows = self._replace_seed_rows(script=script)
+                self.reset_query_tag()
+                self.log_change_script(
+                    script=script,
+                    checksum=checksum,
+                    execution_time=round(time.time() - start),
+                    status=ApplyStatus.SUCCESS,
+                    batch_id=batch_id,
+                    batch_status=ApplyStatus.IN_PROGRESS,
+                    force=force,
+                )
+        finally:
+            self.throttle.after_script()
+        logger.info("Loaded seed file", table=script.table, rows=rows)
+
+    def _replace_seed_rows(self, script: SeedScript) -> int:
+        """
+        Deletes the rows of the table and loads the seed file in one transaction,
+        so a failed load leaves the table unchanged unless autocommit is enabled
+        """
+        commit = not self._in_transaction and not self.autocommit
+        cursor = self.cursor
+        if not self._in_transaction:
+            self.ensure_autocommit(autocommit=self.autocommit)
+        try:
+            cursor.execute(f"DELETE FROM {script.table}")
+            rows = self.load_seed(script=script)
+        except Exception as e:
+            if commit:
+                self._rollback()
+            raise Exception(f"Failed to load {script.name}") from e
+        if commit:
+            self._commit()
+        return rows
+
+    def load_seed(self, script: SeedScript) -> int:
+        """
+        Loads the rows of the seed file with array-bound INSERT statements, overridden
+        with the native bulk loader of the database. Returns the number of rows loaded
+        """
+        columns = read_seed_columns(
+            file_path=script.file_path, seed_format=script.format
+        )
+        names = [f"c{i}" for i in range(len(columns))]
+        query = (
+            f"INSERT INTO {script.table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(self.bind(name) for name in names)})"
+        )
+        cursor = self.cursor
+        rows = 0
+        for batch in iter_seed_batches(
+            file_path=script.file_path, seed_format=script.format
+        ):
+            cursor.executemany(query, [dict(zip(names, row)) for row in batch])
+            rows += len(batch)
+        return rows
+
+    def start_checkpoint(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> ScriptCheckpoint:
+        return self.run_steps(
+            self.start_checkpoint_steps(
+                batch_id=batch_id,
                 script=script,
                 checksum=checksum,
-                execution_time=execution_time,
-                status=ApplyStatus.SUCCESS,
+                statement_index=statement_index,
+                chunk_key=chunk_key,
+                completed_statements=completed_statements,
+            )
+        )
+
+    def save_checkpoint(
+        self,
+        checkpoint: Optional[ScriptCheckpoint],
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+    ) -> None:
+        self.run_steps(
+            self.save_checkpoint_steps(
+                checkpoint=checkpoint,
+                statement_index=statement_index,
+                chunk_key=chunk_key,
+            )
+        )
+
+    def record_checkpoint(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        logger: structlog.BoundLogger,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> None:
+        self.run_steps(
+            self.record_checkpoint_steps(
                 batch_id=batch_id,
-                batch_status=ApplyStatus.IN_PROGRESS,
-                force=force,
+                script=script,
+                checksum=checksum,
+                statement_index=statement_index,
+                logger=logger,
+                chunk_key=chunk_key,
+                completed_statements=completed_statements,
             )
+        )
+
+    def create_checkpoint_table(self) -> None:
+        self.execute_query(query=self.checkpoint_table_ddl())
+
+    def fetch_checkpoints(self, batch_id: str) -> List[ResultRow]:
+        return self.run_steps(self.fetch_checkpoints_steps(batch_id=batch_id))
+
+    def delete_checkpoint(
+        self, batch_id: str, script_name: Optional[str] = None
+    ) -> None:
+        query, params = self.delete_checkpoint_statement(
+            batch_id=batch_id, script_name=script_name
+        )
+        self.execute_query(query=query, params=params)
 
     def update_batch_status(self, batch_id: str, batch_status: str) -> None:
-        query = f"""\
-            UPDATE {self.change_history_table.fully_qualified}
-            SET BATCH_STATUS = '{batch_status}'
-            WHERE BATCH_ID = '{batch_id}'
-        """
-        self.execute_query(query=dedent(query))
+        query, params = self.update_batch_status_statement(
+            batch_id=batch_id, batch_status=batch_status
+        )
+        self.execute_query(query=query, params=params)
 
     def update_batch_script_status(
         self,
@@ -442,28 +1803,30 @@ class BaseSession(metaclass=Singleton):
         status: str,
         batch_id: str,
     ) -> None:
-        query = f"""\
-            UPDATE {self.change_history_table.fully_qualified}
-            SET STATUS = '{status}'
-            WHERE BATCH_ID = '{batch_id}'
-                AND SCRIPT = '{script_name}'
-                AND SCRIPT_TYPE = '{script_type}'
-                AND CHECKSUM = '{checksum}'
-        """
-        self.execute_query(query=dedent(query))
-
-    def get_batch_by_id(self, batch_id: str) -> List[Dict[str, str]]:
-        applied_script_types = [
-            f"'{item}'"
-            for item in ScriptType.items()
-            if item in DEPLOYABLE_SCRIPT_TYPES
-        ]
-        query = f"""\
-            SELECT SCRIPT, SCRIPT_TYPE, CHECKSUM, BATCH_ID, BATCH_STATUS
-            FROM {self.change_history_table.fully_qualified}
-            WHERE BATCH_ID = '{batch_id}'
-                AND SCRIPT_TYPE IN ({', '.join(applied_script_types)})
-                AND BATCH_STATUS != '{ApplyStatus.ROLLED_BACK}'
-            ORDER BY INSTALLED_ON DESC
-        """
-        return self.execute_query(query=dedent(query))
+        query, params = self.update_batch_script_status_statement(
+            script_name=script_name,
+            script_type=script_type,
+            checksum=checksum,
+            status=status,
+            batch_id=batch_id,
+        )
+        self.execute_query(query=query, params=params)
+
+    def update_script_checksum(
+        self,
+        script_name: str,
+        script_type: str,
+        checksum: str,
+        checksum_current: str,
+    ) -> None:
+        query, params = self.update_script_checksum_statement(
+            script_name=script_name,
+            script_type=script_type,
+            checksum=checksum,
+            checksum_current=checksum_current,
+        )
+        self.execute_query(query=query, params=params)
+
+    def get_batch_by_id(self, batch_id: str) -> ResultSet:
+        query, params = self.get_batch_by_id_statement(batch_id=batch_id)
+        return self.execute_query(query=query, params=params)
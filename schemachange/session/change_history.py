@@ -0,0 +1,711 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+from collections import defaultdict
+from textwrap import dedent
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+import structlog
+
+from schemachange.common.utils import BaseEnum
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.result_set import ResultRow, ResultSet
+from schemachange.session.script import (
+    DEPLOYABLE_SCRIPT_TYPES,
+    AlwaysScript,
+    RepeatableScript,
+    RollbackScript,
+    ScriptType,
+    VersionedScript,
+)
+
+DEFAULT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Query text and its bind parameters
+Statement = Tuple[str, Dict[str, Any]]
+# Name of a session method and its arguments, see ChangeHistoryBookkeeping
+Operation = Tuple[str, Dict[str, Any]]
+T = TypeVar("T")
+# Generator yielding the operations of a bookkeeping step and returning its result
+Steps = Generator[Operation, Any, T]
+
+
+class ApplyStatus(BaseEnum):
+    IN_PROGRESS = "IN_PROGRESS"
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+    TIMED_OUT = "TIMED_OUT"
+    ROLLED_BACK = "ROLLED_BACK"
+    ROLLED_BACK_FAILED = "ROLLED_BACK_FAILED"
+
+
+class CheckpointError(Exception):
+    """
+    Raised when the checkpoint of a running script cannot be moved forward, with the
+    first statement of the script not applied and the lower key of its chunk
+    """
+
+    def __init__(self, statement_index: int, chunk_key: Optional[int] = None):
+        super().__init__(
+            f"Failed to save the checkpoint at statement {statement_index + 1} of the script"
+        )
+        self.statement_index = statement_index
+        self.chunk_key = chunk_key
+
+
+@dataclasses.dataclass
+class ScriptCheckpoint:
+    """
+    Checkpoint of a running script, with the statements past its first statement not
+    applied already applied by parallel blocks. When saved, its row is moved forward as
+    the statements are committed, otherwise it is only recorded if the script fails
+    """
+
+    batch_id: str
+    script_name: str
+    completed_statements: Set[int] = dataclasses.field(default_factory=set)
+    saved: bool = False
+
+
+def format_statement_indexes(
+    statement_indexes: Collection[int], start: int
+) -> Optional[str]:
+    """Comma-separated indexes of the statements from start, None without any"""
+    indexes = sorted(index for index in statement_indexes if index >= start)
+    return ",".join(str(index) for index in indexes) if indexes else None
+
+
+def parse_statement_indexes(value: Optional[str]) -> List[int]:
+    if not value:
+        return []
+    return [int(index) for index in value.split(",")]
+
+
+class ChangeHistoryStatements:
+    """
+    Statements on the change history and checkpoint tables, shared by the sessions
+    running them synchronously and asynchronously
+    """
+
+    # Placeholder style of bind parameters, "pyformat" (%(name)s) or "named" (:name)
+    paramstyle = "pyformat"
+
+    change_history_table: ChangeHistoryTable
+    user: Optional[str]
+    # Text of the parameterised statements, built once per session
+    _prepared_statements: Dict[Tuple[str, str], str]
+
+    def bind(self, name: str) -> str:
+        """Placeholder of a named bind parameter, in the paramstyle of the driver"""
+        if self.paramstyle == "named":
+            return f":{name}"
+        return f"%({name})s"
+
+    def prepare_statement(
+        self, name: str, table: ChangeHistoryTable, build_query: Callable[[], str]
+    ) -> str:
+        """
+        Returns the text of a parameterised statement on the table, built once per session.
+        The text stays the same across calls, so the driver statement cache and the
+        database plan cache reuse the parsed statement instead of parsing each literal
+        """
+        key = (name, table.fully_qualified)
+        query = self._prepared_statements.get(key)
+        if query is None:
+            query = self._prepared_statements[key] = dedent(build_query())
+        return query
+
+    def change_history_table_ddl(self) -> str:
+        query = f"""\
+            CREATE TABLE {self.change_history_table.fully_qualified} (
+                VERSION VARCHAR(1000),
+                DESCRIPTION VARCHAR(1000),
+                SCRIPT VARCHAR(1000),
+                SCRIPT_TYPE VARCHAR(1000),
+                CHECKSUM VARCHAR(1000),
+                EXECUTION_TIME BIGINT,
+                STATUS VARCHAR(1000),
+                BATCH_ID VARCHAR(1000),
+                BATCH_STATUS VARCHAR(1000),
+                IS_FORCED VARCHAR(1000),
+                INSTALLED_BY VARCHAR(1000),
+                INSTALLED_ON TIMESTAMP
+            )
+        """
+        return dedent(query)
+
+    def checkpoint_table_ddl(self) -> str:
+        query = f"""\
+            CREATE TABLE {self.change_history_table.checkpoint_table.fully_qualified} (
+                BATCH_ID VARCHAR(1000),
+                SCRIPT VARCHAR(1000),
+                SCRIPT_TYPE VARCHAR(1000),
+                CHECKSUM VARCHAR(1000),
+                STATEMENT_INDEX INTEGER,
+                CHUNK_KEY VARCHAR(1000),
+                COMPLETED_STATEMENTS VARCHAR(4000)
+            )
+        """
+        return dedent(query)
+
+    def repeatable_scripts_query(self) -> str:
+        # Seed files are reloaded when their checksum changes, as repeatable scripts
+        query = f"""\
+        SELECT DISTINCT
+            SCRIPT,
+            FIRST_VALUE(CHECKSUM) OVER (
+                PARTITION BY SCRIPT
+                ORDER BY INSTALLED_ON DESC
+            ) AS CHECKSUM
+        FROM {self.change_history_table.fully_qualified}
+        WHERE SCRIPT_TYPE IN ('{ScriptType.REPEATABLE}', '{ScriptType.SEED}')
+            AND STATUS = '{ApplyStatus.SUCCESS}'
+            AND BATCH_STATUS = '{ApplyStatus.SUCCESS}'
+        """
+        return dedent(query)
+
+    def versioned_scripts_query(self) -> str:
+        query = f"""\
+        SELECT VERSION, SCRIPT, CHECKSUM
+        FROM {self.change_history_table.fully_qualified}
+        WHERE SCRIPT_TYPE = '{ScriptType.VERSIONED}'
+            AND STATUS = '{ApplyStatus.SUCCESS}'
+            AND BATCH_STATUS = '{ApplyStatus.SUCCESS}'
+            AND IS_FORCED = 'N'
+        ORDER BY INSTALLED_ON DESC
+        """
+        return dedent(query)
+
+    def log_change_script_statement(
+        self,
+        script: VersionedScript | RepeatableScript | AlwaysScript | RollbackScript,
+        checksum: str,
+        execution_time: int,
+        status: str,
+        batch_id: str,
+        batch_status: str,
+        force: bool,
+    ) -> Statement:
+        table = self.change_history_table
+        query = self.prepare_statement(
+            name="log_change_script",
+            table=table,
+            build_query=lambda: f"""\
+                INSERT INTO {table.fully_qualified} (
+                    VERSION,
+                    DESCRIPTION,
+                    SCRIPT,
+                    SCRIPT_TYPE,
+                    CHECKSUM,
+                    EXECUTION_TIME,
+                    STATUS,
+                    BATCH_ID,
+                    BATCH_STATUS,
+                    IS_FORCED,
+                    INSTALLED_BY,
+                    INSTALLED_ON
+                ) VALUES (
+                    {self.bind("version")},
+                    {self.bind("description")},
+                    {self.bind("script")},
+                    {self.bind("script_type")},
+                    {self.bind("checksum")},
+                    {self.bind("execution_time")},
+                    {self.bind("status")},
+                    {self.bind("batch_id")},
+                    {self.bind("batch_status")},
+                    {self.bind("is_forced")},
+                    {self.bind("installed_by")},
+                    {self.bind("installed_on")}
+                )
+            """,
+        )
+        params = {
+            "version": getattr(script, "version", ""),
+            "description": script.description,
+            "script": script.name,
+            "script_type": script.type,
+            "checksum": checksum,
+            "execution_time": execution_time,
+            "status": status,
+            "batch_id": batch_id,
+            "batch_status": batch_status,
+            "is_forced": "Y" if force and script.type == ScriptType.VERSIONED else "N",
+            "installed_by": self.user or None,
+            "installed_on": datetime.datetime.now().strftime(DEFAULT_DATETIME_FORMAT),
+        }
+        return query, params
+
+    def record_checkpoint_statement(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> Statement:
+        checkpoint_table = self.change_history_table.checkpoint_table
+        query = self.prepare_statement(
+            name="record_checkpoint",
+            table=checkpoint_table,
+            build_query=lambda: f"""\
+                INSERT INTO {checkpoint_table.fully_qualified} (
+                    BATCH_ID,
+                    SCRIPT,
+                    SCRIPT_TYPE,
+                    CHECKSUM,
+                    STATEMENT_INDEX,
+                    CHUNK_KEY,
+                    COMPLETED_STATEMENTS
+                ) VALUES (
+                    {self.bind("batch_id")},
+                    {self.bind("script")},
+                    {self.bind("script_type")},
+                    {self.bind("checksum")},
+                    {self.bind("statement_index")},
+                    {self.bind("chunk_key")},
+                    {self.bind("completed_statements")}
+                )
+            """,
+        )
+        params = {
+            "batch_id": batch_id,
+            "script": script.name,
+            "script_type": script.type,
+            "checksum": checksum,
+            "statement_index": statement_index,
+            # Stored as text, chunk keys may exceed the range of INTEGER columns
+            "chunk_key": None if chunk_key is None else str(chunk_key),
+            "completed_statements": format_statement_indexes(
+                statement_indexes=completed_statements, start=statement_index
+            ),
+        }
+        return query, params
+
+    def update_checkpoint_statement(
+        self,
+        checkpoint: ScriptCheckpoint,
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+    ) -> Statement:
+        checkpoint_table = self.change_history_table.checkpoint_table
+        query = self.prepare_statement(
+            name="update_checkpoint",
+            table=checkpoint_table,
+            build_query=lambda: f"""\
+                UPDATE {checkpoint_table.fully_qualified}
+                SET STATEMENT_INDEX = {self.bind("statement_index")},
+                    CHUNK_KEY = {self.bind("chunk_key")},
+                    COMPLETED_STATEMENTS = {self.bind("completed_statements")}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+                    AND SCRIPT = {self.bind("script")}
+            """,
+        )
+        params = {
+            "statement_index": statement_index,
+            "chunk_key": None if chunk_key is None else str(chunk_key),
+            "completed_statements": format_statement_indexes(
+                statement_indexes=checkpoint.completed_statements,
+                start=statement_index,
+            ),
+            "batch_id": checkpoint.batch_id,
+            "script": checkpoint.script_name,
+        }
+        return query, params
+
+    def fetch_checkpoint_statement(self, batch_id: str) -> Statement:
+        checkpoint_table = self.change_history_table.checkpoint_table
+        query = self.prepare_statement(
+            name="fetch_checkpoint",
+            table=checkpoint_table,
+            build_query=lambda: f"""\
+                SELECT SCRIPT, SCRIPT_TYPE, CHECKSUM, STATEMENT_INDEX, CHUNK_KEY,
+                    COMPLETED_STATEMENTS
+                FROM {checkpoint_table.fully_qualified}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+            """,
+        )
+        return query, {"batch_id": batch_id}
+
+    def delete_checkpoint_statement(
+        self, batch_id: str, script_name: Optional[str] = None
+    ) -> Statement:
+        checkpoint_table = self.change_history_table.checkpoint_table
+        if script_name is not None:
+            query = self.prepare_statement(
+                name="delete_script_checkpoint",
+                table=checkpoint_table,
+                build_query=lambda: f"""\
+                    DELETE FROM {checkpoint_table.fully_qualified}
+                    WHERE BATCH_ID = {self.bind("batch_id")}
+                        AND SCRIPT = {self.bind("script")}
+                """,
+            )
+            return query, {"batch_id": batch_id, "script": script_name}
+        query = self.prepare_statement(
+            name="delete_checkpoint",
+            table=checkpoint_table,
+            build_query=lambda: f"""\
+                DELETE FROM {checkpoint_table.fully_qualified}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+            """,
+        )
+        return query, {"batch_id": batch_id}
+
+    def update_batch_status_statement(
+        self, batch_id: str, batch_status: str
+    ) -> Statement:
+        table = self.change_history_table
+        query = self.prepare_statement(
+            name="update_batch_status",
+            table=table,
+            build_query=lambda: f"""\
+                UPDATE {table.fully_qualified}
+                SET BATCH_STATUS = {self.bind("batch_status")}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+            """,
+        )
+        return query, {"batch_status": batch_status, "batch_id": batch_id}
+
+    def update_batch_script_status_statement(
+        self,
+        script_name: str,
+        script_type: str,
+        checksum: str,
+        status: str,
+        batch_id: str,
+    ) -> Statement:
+        table = self.change_history_table
+        query = self.prepare_statement(
+            name="update_batch_script_status",
+            table=table,
+            build_query=lambda: f"""\
+                UPDATE {table.fully_qualified}
+                SET STATUS = {self.bind("status")}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+                    AND SCRIPT = {self.bind("script")}
+                    AND SCRIPT_TYPE = {self.bind("script_type")}
+                    AND CHECKSUM = {self.bind("checksum")}
+            """,
+        )
+        params = {
+            "status": status,
+            "batch_id": batch_id,
+            "script": script_name,
+            "script_type": script_type,
+            "checksum": checksum,
+        }
+        return query, params
+
+    def update_script_checksum_statement(
+        self,
+        script_name: str,
+        script_type: str,
+        checksum: str,
+        checksum_current: str,
+    ) -> Statement:
+        table = self.change_history_table
+        # Only the latest successful row of the script is re-recorded, earlier rows keep
+        # the checksum they were applied with. The latest row is selected through a
+        # derived table, as MySQL does not read the updated table in a plain subquery
+        query = self.prepare_statement(
+            name="update_script_checksum",
+            table=table,
+            build_query=lambda: f"""\
+                UPDATE {table.fully_qualified}
+                SET CHECKSUM = {self.bind("checksum_current")}
+                WHERE SCRIPT = {self.bind("script")}
+                    AND SCRIPT_TYPE = {self.bind("script_type")}
+                    AND CHECKSUM = {self.bind("checksum")}
+                    AND STATUS = '{ApplyStatus.SUCCESS}'
+                    AND INSTALLED_ON = (
+                        SELECT MAX(LATEST.INSTALLED_ON)
+                        FROM (
+                            SELECT INSTALLED_ON
+                            FROM {table.fully_qualified}
+                            WHERE SCRIPT = {self.bind("script")}
+                                AND SCRIPT_TYPE = {self.bind("script_type")}
+                                AND STATUS = '{ApplyStatus.SUCCESS}'
+                        ) LATEST
+                    )
+            """,
+        )
+        params = {
+            "checksum_current": checksum_current,
+            "script": script_name,
+            "script_type": script_type,
+            "checksum": checksum,
+        }
+        return query, params
+
+    def get_batch_by_id_statement(self, batch_id: str) -> Statement:
+        applied_script_types = [
+            f"'{item}'"
+            for item in ScriptType.items()
+            if item in DEPLOYABLE_SCRIPT_TYPES
+        ]
+        table = self.change_history_table
+        # The script types and statuses are constants, only the batch id is bound
+        query = self.prepare_statement(
+            name="get_batch_by_id",
+            table=table,
+            build_query=lambda: f"""\
+                SELECT SCRIPT, SCRIPT_TYPE, CHECKSUM, BATCH_ID, BATCH_STATUS
+                FROM {table.fully_qualified}
+                WHERE BATCH_ID = {self.bind("batch_id")}
+                    AND SCRIPT_TYPE IN ({', '.join(applied_script_types)})
+                    AND BATCH_STATUS != '{ApplyStatus.ROLLED_BACK}'
+                    AND STATUS != '{ApplyStatus.TIMED_OUT}'
+                ORDER BY INSTALLED_ON DESC
+            """,
+        )
+        return query, {"batch_id": batch_id}
+
+
+class ChangeHistoryBookkeeping(ChangeHistoryStatements):
+    """
+    Reads and writes of the change history and checkpoint tables, shared by the sessions
+    running them synchronously and asynchronously. Each step is a generator yielding the
+    session methods to call, with their arguments, and receiving their results or
+    errors. The sessions run the steps with run_steps, awaiting each call when
+    asynchronous
+    """
+
+    logger: structlog.BoundLogger
+    # Whether the checkpoint table is created with the change history table, and the
+    # checkpoint saved as the statements of scripts are committed
+    create_metadata_tables: bool
+    checkpoint_statements: bool
+    # Whether the checkpoint table is known to exist, checked once per session
+    _checkpoint_table_exists: bool
+
+    def init_bookkeeping(self, session_kwargs: Dict[str, Any]) -> None:
+        self.change_history_table = session_kwargs.get("change_history_table")
+        self.create_metadata_tables = bool(
+            session_kwargs.get("create_change_history_table")
+        )
+        self.checkpoint_statements = bool(session_kwargs.get("checkpoint_statements"))
+        self._prepared_statements = {}
+        self._checkpoint_table_exists = False
+
+    def change_history_table_exists_steps(
+        self, create_change_history_table: bool, dry_run: bool
+    ) -> Steps[bool]:
+        change_history_metadata = yield "fetch_change_history_metadata", {}
+        if change_history_metadata:
+            self.logger.info(
+                f"Using existing change history table {self.change_history_table.fully_qualified}",
+                last_altered=change_history_metadata[0].get("update_time"),
+            )
+            return True
+        elif create_change_history_table:
+            yield "create_change_history_schema", {"dry_run": dry_run}
+            yield "create_change_history_table", {"dry_run": dry_run}
+            if dry_run:
+                return False
+            self.logger.info("Created change history table")
+            return True
+        else:
+            raise ValueError(
+                f"Unable to find change history table {self.change_history_table.fully_qualified}"
+            )
+
+    def script_metadata_steps(
+        self, create_change_history_table: bool, dry_run: bool
+    ) -> Steps[
+        Tuple[
+            Dict[str, Dict[str, str | int]] | None,
+            Dict[str, List[str]] | None,
+            str | int | None,
+        ]
+    ]:
+        change_history_table_exists = yield from self.change_history_table_exists_steps(
+            create_change_history_table=create_change_history_table,
+            dry_run=dry_run,
+        )
+        if not change_history_table_exists:
+            return {}, {}, None
+
+        # Independent queries, in flight at the same time when the session can
+        versioned_data, repeatable_data = yield "fetch_concurrently", {
+            "queries": [self.versioned_scripts_query(), self.repeatable_scripts_query()]
+        }
+        change_history, max_published_version = collect_versioned_scripts(
+            data=versioned_data
+        )
+        r_scripts_checksum = collect_repeatable_scripts(data=repeatable_data)
+
+        self.logger.info(
+            "Max applied change script version %(max_published_version)s"
+            % {"max_published_version": max_published_version}
+        )
+        return change_history, r_scripts_checksum, max_published_version
+
+    def insert_checkpoint_steps(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> Steps[None]:
+        if not self._checkpoint_table_exists:
+            checkpoint_table = self.change_history_table.checkpoint_table
+            if not (yield "fetch_change_history_metadata", {"table": checkpoint_table}):
+                if not self.create_metadata_tables:
+                    raise ValueError(
+                        f"Unable to find checkpoint table {checkpoint_table.fully_qualified}"
+                    )
+                yield "create_checkpoint_table", {}
+            self._checkpoint_table_exists = True
+        # Scripts running concurrently keep one checkpoint each
+        yield "delete_checkpoint", {"batch_id": batch_id, "script_name": script.name}
+        query, params = self.record_checkpoint_statement(
+            batch_id=batch_id,
+            script=script,
+            checksum=checksum,
+            statement_index=statement_index,
+            chunk_key=chunk_key,
+            completed_statements=completed_statements,
+        )
+        yield "execute_query", {"query": query, "params": params}
+
+    def start_checkpoint_steps(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> Steps[ScriptCheckpoint]:
+        """
+        Checkpoint of a script about to run. With checkpoint_statements, its row is
+        recorded and moved forward by save_checkpoint_steps, so a deploy killed while
+        running the script can be resumed
+        """
+        if self.checkpoint_statements:
+            yield from self.insert_checkpoint_steps(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=statement_index,
+                chunk_key=chunk_key,
+                completed_statements=completed_statements,
+            )
+        return ScriptCheckpoint(
+            batch_id=batch_id,
+            script_name=script.name,
+            completed_statements=set(completed_statements),
+            saved=self.checkpoint_statements,
+        )
+
+    def save_checkpoint_steps(
+        self,
+        checkpoint: Optional[ScriptCheckpoint],
+        statement_index: int,
+        chunk_key: Optional[int] = None,
+        **execute_kwargs: Any,
+    ) -> Steps[None]:
+        """
+        Moves the saved checkpoint of the running script to its first statement not
+        applied. A failure stops the script, its checkpoint would be stale otherwise
+        """
+        if checkpoint is None or not checkpoint.saved:
+            return
+        query, params = self.update_checkpoint_statement(
+            checkpoint=checkpoint, statement_index=statement_index, chunk_key=chunk_key
+        )
+        try:
+            yield "execute_query", {"query": query, "params": params, **execute_kwargs}
+        except Exception as e:
+            raise CheckpointError(
+                statement_index=statement_index, chunk_key=chunk_key
+            ) from e
+
+    def record_checkpoint_steps(
+        self,
+        batch_id: str,
+        script: VersionedScript | RepeatableScript | AlwaysScript,
+        checksum: str,
+        statement_index: int,
+        logger: structlog.BoundLogger,
+        chunk_key: Optional[int] = None,
+        completed_statements: Collection[int] = (),
+    ) -> Steps[None]:
+        """
+        Records the first statement of the failed script not applied, the chunk it
+        belongs to for chunked scripts, and the statements after it applied by a
+        parallel block, for deploy --resume
+        """
+        try:
+            yield from self.insert_checkpoint_steps(
+                batch_id=batch_id,
+                script=script,
+                checksum=checksum,
+                statement_index=statement_index,
+                chunk_key=chunk_key,
+                completed_statements=completed_statements,
+            )
+        except Exception as e:
+            # The deploy error is raised, a resumed deploy would run the statements
+            # of the script applied since its last saved checkpoint again
+            logger.error(
+                "Failed to record checkpoint, the script must not be resumed",
+                batch_id=batch_id,
+                statement=statement_index + 1,
+                error=str(e),
+            )
+            return
+        logger.info(
+            "Recorded checkpoint, the batch can be resumed with deploy --resume",
+            batch_id=batch_id,
+            statement=statement_index + 1,
+            chunk_key=chunk_key,
+        )
+
+    def fetch_checkpoints_steps(self, batch_id: str) -> Steps[List[ResultRow]]:
+        """Checkpoints of the scripts of the batch that failed, one per script"""
+        checkpoint_table = self.change_history_table.checkpoint_table
+        if not (yield "fetch_change_history_metadata", {"table": checkpoint_table}):
+            return []
+        query, params = self.fetch_checkpoint_statement(batch_id=batch_id)
+        return list((yield "execute_query", {"query": query, "params": params}) or [])
+
+
+def collect_repeatable_scripts(data: ResultSet) -> Dict[str, List[str]]:
+    script_checksums: Dict[str, List[str]] = defaultdict(list)
+    for script, checksum in data.iter_values("script", "checksum"):
+        script_checksums[script].append(checksum)
+
+    return script_checksums
+
+
+def collect_versioned_scripts(
+    data: ResultSet,
+) -> Tuple[Dict[str, Dict[str, str | int]], str | int | None]:
+    versioned_scripts: Dict[str, Dict[str, str | int]] = defaultdict(dict)
+    versions: List[str | int | None] = []
+    for version, script, checksum in data.iter_values("version", "script", "checksum"):
+        versions.append(version if version != "" else None)
+        versioned_scripts[script] = {
+            "version": version,
+            "script": script,
+            "checksum": checksum,
+        }
+
+    return versioned_scripts, versions[0] if versions else None
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import sqlparse
+
+DEFAULT_CHUNK_SIZE = 10000
+# Rendered by the chunk_range Jinja global, replaced by the key range of each chunk
+CHUNK_RANGE_PLACEHOLDER = "/* schemachange: chunk_range */ 1 = 1"
+
+
+@dataclasses.dataclass(frozen=True)
+class ChunkSettings:
+    """Key range chunking of the DML statements of a script, read from its headers"""
+
+    table: str
+    key: str
+    size: int = DEFAULT_CHUNK_SIZE
+    # Seconds between two chunks
+    pause: Optional[float] = None
+
+    @classmethod
+    def from_headers(cls, headers: Dict[str, str]) -> Optional[ChunkSettings]:
+        """Chunk settings of a script declaring a chunk-key header, None otherwise"""
+        if "chunk-key" not in headers:
+            return None
+        if "chunk-table" not in headers:
+            raise ValueError("Chunked scripts require a chunk-table script header")
+        try:
+            size = int(headers.get("chunk-size", DEFAULT_CHUNK_SIZE))
+            pause = float(headers["chunk-pause"]) if "chunk-pause" in headers else None
+        except ValueError:
+            raise ValueError(
+                "Invalid chunk-size or chunk-pause script header: "
+                f"{headers.get('chunk-size')}, {headers.get('chunk-pause')}"
+            )
+        if size < 1:
+            raise ValueError(f"Invalid chunk-size script header: {size}")
+        return cls(
+            table=headers["chunk-table"],
+            key=headers["chunk-key"],
+            size=size,
+            pause=pause,
+        )
+
+    def key_range_query(self) -> str:
+        return f"SELECT MIN({self.key}), MAX({self.key}) FROM {self.table}"
+
+    def next_key_query(self, key: int, max_key: int) -> str:
+        """The first key of the range from the key, None when there is none"""
+        return (
+            f"SELECT MIN({self.key}) FROM {self.table} "
+            f"WHERE {self.key} >= {int(key)} AND {self.key} <= {int(max_key)}"
+        )
+
+    def get_chunks(
+        self,
+        min_key: int,
+        max_key: int,
+        start_key: Optional[int] = None,
+        next_key: Optional[Callable[[int], Optional[int]]] = None,
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the [lower, upper) key ranges covering the keys from start_key or min_key.
+        Each chunk starts at the key returned by next_key for the upper key of the
+        previous one, skipping the empty ranges between sparse keys
+        """
+        lower = min_key if start_key is None else max(min_key, start_key)
+        while lower <= max_key:
+            upper = lower + self.size
+            yield lower, upper
+            if upper > max_key:
+                return
+            lower = upper if next_key is None else next_key(upper)
+            if lower is None:
+                return
+            lower = max(lower, upper)
+
+    def bind_chunk(self, statement: str, lower: int, upper: int) -> str:
+        """The statement restricted to the keys of the chunk"""
+        return statement.replace(
+            CHUNK_RANGE_PLACEHOLDER,
+            f"{self.key} >= {int(lower)} AND {self.key} < {int(upper)}",
+        )
+
+
+def get_key_value(value) -> Optional[int]:
+    """Integer key value returned by the database (e.g. int, Decimal), None for no rows"""
+    if value is None:
+        return None
+    if int(value) != value:
+        raise ValueError(f"Chunk keys must be integers, got {value!r}")
+    return int(value)
+
+
+def get_chunk_settings(
+    headers: Dict[str, str], script_content: str
+) -> Optional[ChunkSettings]:
+    """
+    Chunk settings of a script, checking every statement of a chunked script is
+    restricted with chunk_range, which would otherwise run on the whole table per chunk
+    """
+    chunk = ChunkSettings.from_headers(headers=headers)
+    if chunk is None:
+        if CHUNK_RANGE_PLACEHOLDER in script_content:
+            raise ValueError("chunk_range requires a chunk-key script header")
+        return None
+    for statement in sqlparse.split(sql=script_content):
+        if CHUNK_RANGE_PLACEHOLDER not in statement:
+            raise ValueError(
+                "Every statement of a chunked script must be restricted with "
+                f"{{{{ chunk_range }}}}: {statement}"
+            )
+    return chunk
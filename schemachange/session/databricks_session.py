@@ -1,13 +1,19 @@
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 from databricks import sql
+from databricks.sql.exc import RequestError
 
 from schemachange.common.schema import DatabricksConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
+from schemachange.config.change_history_table import ChangeHistoryTable
 from schemachange.session.base import BaseSession
 
 
 class DatabricksSession(BaseSession):
+    # Native query parameters of the SQL connector
+    paramstyle = "named"
+    supports_async_execution = True
+
     def _get_credentials_provider_config(self):
         from databricks.sdk.core import Config, oauth_service_principal
 
@@ -78,8 +84,30 @@ class DatabricksSession(BaseSession):
         # No-op because Databricks does not support transactions
         pass
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
-        schemachange_database = self.change_history_table.database_name
+    def _is_connection_error(self, error: Exception) -> bool:
+        if isinstance(error, RequestError):
+            return True
+        return self._connection is not None and not self._connection.open
+
+    def _submit_statement(
+        self, cursor, query: str, params: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        # The cursor tracks the operation, it has no query id to poll
+        cursor.execute_async(query, params)
+        return None
+
+    def _is_statement_running(self, cursor, query_id: Optional[str]) -> bool:
+        return cursor.is_query_pending()
+
+    def _fetch_statement_result(self, cursor, query_id: Optional[str]) -> None:
+        # Raises the error of a failed or cancelled statement
+        cursor.get_async_execution_result()
+
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        table = table or self.change_history_table
+        schemachange_database = table.database_name
 
         # Check if database exists yet
         database_data = self.execute_query(
@@ -92,15 +120,15 @@ class DatabricksSession(BaseSession):
             SELECT
                 CREATED AS CREATE_TIME,
                 LAST_ALTERED AS UPDATE_TIME
-            FROM {self.change_history_table.database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE UPPER(TABLE_SCHEMA) = UPPER('{self.change_history_table.schema_name}')
-                AND UPPER(TABLE_NAME) = UPPER('{self.change_history_table.table_name}')
+            FROM {table.database_name}.INFORMATION_SCHEMA.TABLES
+            WHERE UPPER(TABLE_SCHEMA) = UPPER('{table.schema_name}')
+                AND UPPER(TABLE_NAME) = UPPER('{table.table_name}')
         """
         data = self.execute_query(query=query)
 
         return data
 
-    def reset_session(self):
+    def _apply_session_context(self):
         reset_query = []
         if self.catalog:
             reset_query.append(f"USE CATALOG IDENTIFIER('{self.catalog}');")
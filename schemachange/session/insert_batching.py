@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import sqlparse
+from sqlparse import sql
+from sqlparse import tokens as T
+
+# Maximum number of consecutive INSERT statements coalesced into one, 1 disables it
+DEFAULT_INSERT_BATCH_SIZE = 1
+# Upper bound of the text of a coalesced statement, in characters, below the limit
+# of every supported database (e.g. 1 MB on Snowflake, max_allowed_packet on MySQL)
+DEFAULT_MAX_STATEMENT_LENGTH = 1_000_000
+
+
+@dataclass(frozen=True)
+class InsertValues:
+    """A `INSERT INTO <target> VALUES (...), ...` statement, split in its parts"""
+
+    # Table and column list, e.g. "s.t (a, b)"
+    target: str
+    # Text of the row constructors, e.g. ["(1, 'x')", "(2, 'y')"]
+    rows: List[str]
+    terminated: bool
+
+
+def parse_insert_values(statement: str) -> Optional[InsertValues]:
+    """
+    Splits a plain INSERT ... VALUES statement, None for any other statement,
+    including inserts with a SELECT, RETURNING, ON CONFLICT or comments between rows
+    """
+    parsed = sqlparse.parse(statement)
+    if len(parsed) != 1:
+        return None
+    tokens = [
+        token
+        for token in parsed[0].tokens
+        if not token.is_whitespace and not isinstance(token, sql.Comment)
+    ]
+    terminated = bool(tokens) and tokens[-1].match(T.Punctuation, ";")
+    if terminated:
+        tokens = tokens[:-1]
+    if (
+        len(tokens) < 4
+        or not tokens[0].match(T.DML, "INSERT")
+        or not tokens[1].match(T.Keyword, "INTO")
+        or not isinstance(tokens[-1], sql.Values)
+    ):
+        return None
+    target_tokens = tokens[2:-1]
+    if not all(
+        isinstance(token, (sql.Identifier, sql.Function, sql.Parenthesis))
+        for token in target_tokens
+    ):
+        return None
+
+    rows = []
+    values_tokens = tokens[-1].tokens
+    if not values_tokens[0].match(T.Keyword, "VALUES"):
+        return None
+    for token in values_tokens[1:]:
+        if token.is_whitespace or token.match(T.Punctuation, ","):
+            continue
+        if not isinstance(token, sql.Parenthesis):
+            return None
+        rows.append(str(token))
+    if not rows:
+        return None
+
+    target = " ".join(" ".join(str(token).split()) for token in target_tokens)
+    return InsertValues(target=target, rows=rows, terminated=terminated)
+
+
+def build_multi_row_insert(target: str, rows: List[str]) -> str:
+    row_list = ",\n".join(rows)
+    return f"INSERT INTO {target} VALUES\n{row_list}"
+
+
+def coalesce_inserts(
+    statements: List[str],
+    batch_size: int,
+    max_statement_length: int = DEFAULT_MAX_STATEMENT_LENGTH,
+    max_insert_rows: Optional[int] = None,
+    build_insert: Callable[[str, List[str]], str] = build_multi_row_insert,
+) -> List[Tuple[int, str]]:
+    """
+    Coalesces up to batch_size consecutive INSERT ... VALUES statements into the same
+    table and columns into one multi-row statement. Returns the statements to run, each
+    with the index of the first statement of the script it covers. A coalesced statement
+    is applied entirely or not at all, so a failure is attributed to its first statement
+    """
+    if batch_size <= 1:
+        return list(enumerate(statements))
+
+    coalesced: List[Tuple[int, str]] = []
+    # Script statements of the group being coalesced, and their parts
+    group: List[Tuple[int, str, InsertValues]] = []
+    group_length = 0
+    group_rows = 0
+
+    def flush() -> None:
+        if len(group) == 1:
+            # A lone statement keeps its text, comments included
+            coalesced.append(group[0][:2])
+        elif group:
+            rows = [row for _, _, insert in group for row in insert.rows]
+            statement = build_insert(group[0][2].target, rows)
+            if group[0][2].terminated:
+                statement = f"{statement};"
+            coalesced.append((group[0][0], statement))
+        group.clear()
+
+    for statement_index, statement in enumerate(statements):
+        insert = parse_insert_values(statement=statement)
+        if insert is None:
+            flush()
+            coalesced.append((statement_index, statement))
+            continue
+
+        length = sum(len(row) + 2 for row in insert.rows)
+        if group and (
+            insert.target != group[0][2].target
+            or len(group) >= batch_size
+            or group_length + length > max_statement_length
+            or (
+                max_insert_rows is not None
+                and group_rows + len(insert.rows) > max_insert_rows
+            )
+        ):
+            flush()
+        if not group:
+            group_length = len(insert.target) + 64
+            group_rows = 0
+        group.append((statement_index, statement, insert))
+        group_length += length
+        group_rows += len(insert.rows)
+
+    flush()
+    return coalesced
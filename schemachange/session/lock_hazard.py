@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import dataclasses
+import re
+from typing import List, Optional, Pattern, Tuple
+
+import sqlparse
+
+from schemachange.session.base import DDL, DatabaseType, normalize_statement
+
+# Maintenance statements that rewrite a table but are not classified as DDL
+MAINTENANCE_STATEMENTS = ("VACUUM", "CLUSTER", "OPTIMIZE")
+
+# Defaults evaluated per row force Postgres to rewrite the table when adding a column
+POSTGRES_VOLATILE_FUNCTIONS = (
+    "RANDOM",
+    "CLOCK_TIMESTAMP",
+    "TIMEOFDAY",
+    "GEN_RANDOM_UUID",
+    "UUID_GENERATE_V1",
+    "UUID_GENERATE_V4",
+    "NEXTVAL",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class LockHazardRule:
+    name: str
+    db_types: Tuple[str, ...]
+    pattern: Pattern[str]
+    message: str
+    # The statement is not a hazard if it also matches the safe pattern
+    safe_pattern: Optional[Pattern[str]] = None
+
+    def matches(self, db_type: str, normalized_statement: str) -> bool:
+        if db_type not in self.db_types:
+            return False
+        if not self.pattern.search(normalized_statement):
+            return False
+        return self.safe_pattern is None or not self.safe_pattern.search(
+            normalized_statement
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class LockHazard:
+    rule: str
+    statement: str
+    message: str
+
+
+LOCK_HAZARD_RULES: List[LockHazardRule] = [
+    # Postgres
+    LockHazardRule(
+        name="postgres-create-index-without-concurrently",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(r"^CREATE (UNIQUE )?INDEX "),
+        safe_pattern=re.compile(r"^CREATE (UNIQUE )?INDEX CONCURRENTLY "),
+        message="CREATE INDEX blocks writes to the table for the whole build, "
+        "use CREATE INDEX CONCURRENTLY",
+    ),
+    LockHazardRule(
+        name="postgres-drop-index-without-concurrently",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(r"^DROP INDEX "),
+        safe_pattern=re.compile(r"^DROP INDEX CONCURRENTLY "),
+        message="DROP INDEX takes an ACCESS EXCLUSIVE lock on the table, "
+        "use DROP INDEX CONCURRENTLY",
+    ),
+    LockHazardRule(
+        name="postgres-add-column-volatile-default",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(
+            r"^ALTER TABLE .* ADD (COLUMN )?.* DEFAULT .*\b("
+            + "|".join(POSTGRES_VOLATILE_FUNCTIONS)
+            + r")\s*\("
+        ),
+        message="Adding a column with a volatile default rewrites the whole table "
+        "under an ACCESS EXCLUSIVE lock, add the column without default and backfill it",
+    ),
+    LockHazardRule(
+        name="postgres-alter-column-type",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(r"^ALTER TABLE .* ALTER (COLUMN )?\S+ (SET DATA )?TYPE "),
+        message="Changing a column type may rewrite the whole table "
+        "under an ACCESS EXCLUSIVE lock",
+    ),
+    LockHazardRule(
+        name="postgres-add-constraint-without-not-valid",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(
+            r"^ALTER TABLE .* ADD (CONSTRAINT \S+ )?(FOREIGN KEY|CHECK)"
+        ),
+        safe_pattern=re.compile(r" NOT VALID\s*;?$"),
+        message="Adding a FOREIGN KEY or CHECK constraint scans the whole table while "
+        "holding the lock, add it NOT VALID and VALIDATE CONSTRAINT separately",
+    ),
+    LockHazardRule(
+        name="postgres-set-not-null",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(r"^ALTER TABLE .* ALTER (COLUMN )?\S+ SET NOT NULL"),
+        message="SET NOT NULL scans the whole table under an ACCESS EXCLUSIVE lock, "
+        "validate a CHECK (... IS NOT NULL) NOT VALID constraint first",
+    ),
+    LockHazardRule(
+        name="postgres-table-rewrite",
+        db_types=(DatabaseType.POSTGRES,),
+        pattern=re.compile(r"^(VACUUM (\(.*\bFULL\b.*\)|FULL)|CLUSTER\b)"),
+        message="VACUUM FULL and CLUSTER rewrite the table "
+        "under an ACCESS EXCLUSIVE lock",
+    ),
+    # MySQL
+    LockHazardRule(
+        name="mysql-alter-table-without-online-algorithm",
+        db_types=(DatabaseType.MYSQL,),
+        pattern=re.compile(r"^ALTER TABLE "),
+        safe_pattern=re.compile(r"\bALGORITHM\s*=\s*(INSTANT|INPLACE)\b"),
+        message="ALTER TABLE may fall back to a table copy that blocks writes, "
+        "specify ALGORITHM=INSTANT or ALGORITHM=INPLACE",
+    ),
+    LockHazardRule(
+        name="mysql-optimize-table",
+        db_types=(DatabaseType.MYSQL,),
+        pattern=re.compile(r"^OPTIMIZE (NO_WRITE_TO_BINLOG |LOCAL )?TABLE "),
+        message="OPTIMIZE TABLE rebuilds the whole table",
+    ),
+    # SQL Server
+    LockHazardRule(
+        name="sqlserver-index-build-without-online",
+        db_types=(DatabaseType.SQL_SERVER,),
+        pattern=re.compile(
+            r"^(CREATE (UNIQUE )?((NON)?CLUSTERED )?INDEX |ALTER INDEX .* REBUILD)"
+        ),
+        safe_pattern=re.compile(r"\bONLINE\s*=\s*ON\b"),
+        message="Index builds hold a schema modification lock for the whole build, "
+        "specify WITH (ONLINE = ON)",
+    ),
+    LockHazardRule(
+        name="sqlserver-alter-column",
+        db_types=(DatabaseType.SQL_SERVER,),
+        pattern=re.compile(r"^ALTER TABLE .* ALTER COLUMN "),
+        safe_pattern=re.compile(r"\bONLINE\s*=\s*ON\b"),
+        message="ALTER COLUMN may update every row under a schema modification lock, "
+        "specify WITH (ONLINE = ON)",
+    ),
+    # Oracle
+    LockHazardRule(
+        name="oracle-create-index-without-online",
+        db_types=(DatabaseType.ORACLE,),
+        pattern=re.compile(r"^CREATE (UNIQUE |BITMAP )?INDEX "),
+        safe_pattern=re.compile(r"\bONLINE\b"),
+        message="CREATE INDEX blocks DML on the table for the whole build, "
+        "specify ONLINE",
+    ),
+    LockHazardRule(
+        name="oracle-move-table-without-online",
+        db_types=(DatabaseType.ORACLE,),
+        pattern=re.compile(r"^ALTER TABLE .* MOVE\b"),
+        safe_pattern=re.compile(r"\bONLINE\b"),
+        message="ALTER TABLE ... MOVE blocks DML on the table, specify ONLINE",
+    ),
+]
+
+
+def find_lock_hazards(statement: str, db_type: str) -> List[LockHazard]:
+    normalized_statement = normalize_statement(statement=statement)
+    if not normalized_statement.startswith((*DDL.items(), *MAINTENANCE_STATEMENTS)):
+        return []
+
+    return [
+        LockHazard(rule=rule.name, statement=statement, message=rule.message)
+        for rule in LOCK_HAZARD_RULES
+        if rule.matches(db_type=db_type, normalized_statement=normalized_statement)
+    ]
+
+
+def lint_script_content(script_content: str, db_type: str) -> List[LockHazard]:
+    lock_hazards = []
+    for statement in sqlparse.split(sql=script_content):
+        lock_hazards.extend(find_lock_hazards(statement=statement, db_type=db_type))
+    return lock_hazards
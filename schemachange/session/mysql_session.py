@@ -1,24 +1,141 @@
-from typing import Dict, List
+import re
+from textwrap import dedent
+from typing import Dict, List, Optional
 
 import mysql.connector
 
 from schemachange.common.schema import MySQLConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
-from schemachange.session.base import BaseSession
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import (
+    BaseSession,
+    BatchStatementError,
+    terminate_statement,
+)
+from schemachange.session.result_handler import RESULT_FETCH_SIZE
+from schemachange.session.script import SeedScript
+from schemachange.session.seed import (
+    SeedFormat,
+    get_csv_line_terminator,
+    read_seed_columns,
+)
+
+# CR_SERVER_GONE_ERROR, CR_SERVER_LOST, CR_SERVER_LOST_EXTENDED
+MYSQL_CONNECTION_ERRNOS = (2006, 2013, 2055)
+# ER_LOCK_DEADLOCK rolls the transaction back, ER_LOCK_WAIT_TIMEOUT the statement
+MYSQL_TRANSIENT_ERRNOS = (1213, 1205)
+MYSQL_TRANSACTION_ROLLBACK_ERRNOS = (1213,)
+# ER_QUERY_TIMEOUT, the statement exceeded a max_execution_time set by the script
+MYSQL_TIMEOUT_ERRNO = 3024
+
+# Compound statements whose body contains semicolons
+MYSQL_COMPOUND_STATEMENT_PATTERN = re.compile(
+    r"^(CREATE|ALTER) (.* )?(PROCEDURE|FUNCTION|TRIGGER|EVENT)\b|^(BEGIN|DELIMITER)\b"
+)
 
 
 class MySQLSession(BaseSession):
-    def _connect(self):
-        self.database = self.connections_info.get("database")
-        self.user = self.connections_info.get("user")
-        self._connection = mysql.connector.connect(
+    supports_statement_batching = True
+    # max_execution_time only bounds read-only SELECT statements, the watchdog bounds
+    # every statement with KILL QUERY, see _cancel_statement
+    supports_statement_timeout = False
+
+    def _open_connection(self):
+        return mysql.connector.connect(
             **get_connect_kwargs(
                 connections_info=self.connections_info,
                 supported_args_schema=MySQLConnectorArgsSchema,
             )
         )
+
+    def _connect(self):
+        self.database = self.connections_info.get("database")
+        self.user = self.connections_info.get("user")
+        self._connection = self._open_connection()
         self._cursor = self._connection.cursor()
 
+    def _is_connection_error(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) in MYSQL_CONNECTION_ERRNOS
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) in MYSQL_TRANSIENT_ERRNOS
+
+    def _is_transaction_rollback_error(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) in MYSQL_TRANSACTION_ROLLBACK_ERRNOS
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) == MYSQL_TIMEOUT_ERRNO
+
+    def _cancel_statement(self) -> None:
+        # The connection running the statement is busy, the statement is killed from
+        # a short-lived second connection. The connection itself stays open
+        connection_id = self._connection.connection_id
+        connection = self._open_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+            cursor.close()
+        finally:
+            connection.close()
+
+    def _discard_remaining_rows(self, cursor) -> None:
+        # Unread rows of an unbuffered cursor fail the next statement, they are drained
+        # in chunks to keep the memory bounded, a short chunk is the last one
+        while len(cursor.fetchmany(RESULT_FETCH_SIZE)) == RESULT_FETCH_SIZE:
+            pass
+
+    def _is_batchable(self, normalized_query: str) -> bool:
+        if MYSQL_COMPOUND_STATEMENT_PATTERN.match(normalized_query):
+            return False
+        return super()._is_batchable(normalized_query=normalized_query)
+
+    def _execute_batch(self, queries: List[str]) -> None:
+        cursor = self.cursor
+        # Statements run in order and the server stops at the first failing one,
+        # each result set received means one more statement succeeded
+        statement_index = 0
+        try:
+            cursor.execute("\n".join(terminate_statement(q) for q in queries))
+            statement_index += 1
+            while cursor.nextset():
+                statement_index += 1
+        except Exception as e:
+            raise BatchStatementError(
+                statement_index=statement_index,
+                statement=queries[statement_index],
+                message=str(e),
+            ) from e
+
+    def load_seed(self, script: SeedScript) -> int:
+        # LOAD DATA LOCAL INFILE has to be enabled on the connection and the server
+        if script.format != SeedFormat.CSV or not self.connections_info.get(
+            "allow_local_infile"
+        ):
+            return super().load_seed(script=script)
+
+        columns = read_seed_columns(
+            file_path=script.file_path, seed_format=script.format
+        )
+        variables = ", ".join(f"@c{i}" for i in range(len(columns)))
+        # Empty fields are loaded as NULL, as the other loaders do
+        assignments = ", ".join(
+            f"{column} = NULLIF(@c{i}, '')" for i, column in enumerate(columns)
+        )
+        line_terminator = get_csv_line_terminator(file_path=script.file_path)
+        query = f"""\
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE {script.table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '{line_terminator.encode("unicode_escape").decode()}'
+            IGNORE 1 LINES
+            ({variables})
+            SET {assignments}
+        """
+        cursor = self.cursor
+        cursor.execute(dedent(query), (str(script.file_path.resolve()),))
+        return cursor.rowcount
+
     def create_change_history_table(self, dry_run: bool) -> None:
         query = f"""\
             CREATE TABLE {self.change_history_table.fully_qualified} (
@@ -38,20 +155,23 @@ class MySQLSession(BaseSession):
         """
         self.execute_query_with_debug(query=query, dry_run=dry_run)
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        table = table or self.change_history_table
         query = f"""\
             SELECT
                 CREATE_TIME,
                 UPDATE_TIME
             FROM INFORMATION_SCHEMA.TABLES
-            WHERE UPPER(TABLE_SCHEMA) = '{self.change_history_table.database_name}'
-                AND UPPER(TABLE_NAME) = '{self.change_history_table.table_name}'
+            WHERE UPPER(TABLE_SCHEMA) = '{table.database_name}'
+                AND UPPER(TABLE_NAME) = '{table.table_name}'
         """
         data = self.execute_query(query=query)
 
         return data
 
-    def reset_session(self):
+    def _apply_session_context(self):
         if self.database:
             self.execute_query(query=f"USE {self.database}")
 
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import dataclasses
+import re
+from typing import FrozenSet, Tuple
+
+import sqlparse
+
+# Dotted object name, each part plain or quoted, e.g. sales."Orders", [dbo].[orders]
+_NAME = r'(?:[\w$]+|"[^"]+"|`[^`]+`|\[[^\]]+\])(?:\s*\.\s*(?:[\w$]+|"[^"]+"|`[^`]+`|\[[^\]]+\]))*'
+CREATED_OBJECT_PATTERN = re.compile(
+    r"\bCREATE\s+(?:OR\s+(?:REPLACE|ALTER)\s+)?"
+    r"(?:(?:SECURE|MATERIALIZED|RECURSIVE|TEMP|TEMPORARY|TRANSIENT|FORCE|EDITIONABLE"
+    r"|NONEDITIONABLE|DYNAMIC)\s+)*"
+    r"(?:VIEW|TABLE|FUNCTION|PROCEDURE|PROC)\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    rf"(?P<name>{_NAME})",
+    re.IGNORECASE,
+)
+REFERENCED_OBJECT_PATTERN = re.compile(
+    rf"\b(?:FROM|JOIN)\s+(?P<name>{_NAME})", re.IGNORECASE
+)
+# Names of common table expressions, e.g. "WITH recent AS (", ", totals AS ("
+CTE_NAME_PATTERN = re.compile(
+    rf"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*(?P<name>{_NAME})\s+AS\s*\(", re.IGNORECASE
+)
+_STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_NAME_PART_PATTERN = re.compile(r'[\w$]+|"[^"]+"|`[^`]+`|\[[^\]]+\]')
+
+# Parts of an object name, normalized, e.g. ("SALES", "ORDERS")
+ObjectName = Tuple[str, ...]
+
+
+def parse_object_name(name: str) -> ObjectName:
+    """Parts of the name without quotes, upper-cased as unquoted identifiers are"""
+    return tuple(
+        part.strip('"`[]').upper() for part in _NAME_PART_PATTERN.findall(name)
+    )
+
+
+def names_match(name: ObjectName, other: ObjectName) -> bool:
+    """Whether both names can designate the same object, one being qualified further"""
+    shortest = min(len(name), len(other))
+    return shortest > 0 and name[-shortest:] == other[-shortest:]
+
+
+@dataclasses.dataclass(frozen=True)
+class ScriptObjects:
+    """Objects created by a script and objects its statements read from"""
+
+    created: FrozenSet[ObjectName]
+    referenced: FrozenSet[ObjectName]
+
+
+def get_script_objects(script_content: str) -> ScriptObjects:
+    """
+    Finds the views, tables, functions and procedures a rendered script creates, and the
+    objects it reads in FROM and JOIN clauses, common table expressions excluded. The
+    parsing is lexical: names in dynamic SQL are not found
+    """
+    content = sqlparse.format(script_content, strip_comments=True)
+    content = _STRING_LITERAL_PATTERN.sub("''", content)
+    created = {
+        parse_object_name(match.group("name"))
+        for match in CREATED_OBJECT_PATTERN.finditer(content)
+    }
+    cte_names = {
+        parse_object_name(match.group("name"))
+        for match in CTE_NAME_PATTERN.finditer(content)
+    }
+    referenced = {
+        parse_object_name(match.group("name"))
+        for match in REFERENCED_OBJECT_PATTERN.finditer(content)
+    }
+    return ScriptObjects(
+        created=frozenset(created),
+        referenced=frozenset(referenced - cte_names - created),
+    )
@@ -1,13 +1,34 @@
-from typing import Dict, List
+import re
+from textwrap import dedent
+from typing import Dict, List, Optional
 
 import oracledb
 
 from schemachange.common.schema import OracleConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
-from schemachange.session.base import BaseSession
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import BaseSession, BatchStatementError
+
+# PL/SQL units, whose trailing semicolon belongs to the statement
+ORACLE_PLSQL_PATTERN = re.compile(
+    r"^(BEGIN|DECLARE)\b|^CREATE (OR REPLACE )?((NON)?EDITIONABLE )?"
+    r"(PROCEDURE|FUNCTION|PACKAGE|TRIGGER|TYPE)\b"
+)
+
+# ORA-00060 deadlock detected rolls the statement back, ORA-08177 cannot serialize access
+ORACLE_TRANSIENT_ERROR_CODES = (60, 8177)
+# The round trip exceeded the call timeout, the statement was cancelled
+ORACLE_TIMEOUT_ERROR_CODE = "DPI-1067"
 
 
 class OracleSession(BaseSession):
+    liveness_query = "SELECT 1 FROM DUAL"
+    paramstyle = "named"
+    supports_statement_batching = True
+    supports_statement_timeout = True
+    # Parsing INSERT ALL statements slows down quickly with their number of rows
+    max_insert_rows = 1000
+
     def _connect(self):
         self.service_name = self.connections_info.get("service_name")
         self.user = self.connections_info.get("user")
@@ -18,9 +39,73 @@ class OracleSession(BaseSession):
             )
         )
         self._cursor = self._connection.cursor()
-        self.set_autocommit(autocommit=self.autocommit)
+        self.ensure_autocommit(autocommit=self.autocommit)
+
+    def _is_connection_error(self, error: Exception) -> bool:
+        return self._connection is not None and not self._connection.is_healthy()
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        if not error.args:
+            return False
+        return getattr(error.args[0], "code", None) in ORACLE_TRANSIENT_ERROR_CODES
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        if not error.args:
+            return False
+        return getattr(error.args[0], "full_code", None) == ORACLE_TIMEOUT_ERROR_CODE
+
+    def set_statement_timeout(self, timeout: Optional[float]) -> None:
+        # Client side timeout of each round trip in milliseconds, 0 disables it
+        self.connection.call_timeout = (
+            0 if timeout is None else max(1, round(timeout * 1000))
+        )
+
+    def _is_batchable(self, normalized_query: str) -> bool:
+        if ORACLE_PLSQL_PATTERN.match(normalized_query):
+            return False
+        return super()._is_batchable(normalized_query=normalized_query)
+
+    def build_multi_row_insert(self, target: str, rows: List[str]) -> str:
+        # Multi-row VALUES are only supported from Oracle 23ai
+        into_clauses = "\n".join(f"INTO {target} VALUES {row}" for row in rows)
+        return f"INSERT ALL\n{into_clauses}\nSELECT 1 FROM DUAL"
+
+    def _execute_batch(self, queries: List[str]) -> None:
+        # Run the statements in one anonymous block, the block tracks the index
+        # of the running statement and reports the error of the failing one
+        cursor = self.cursor
+        statement_index = cursor.var(int)
+        error_message = cursor.var(str)
+        binds = {"statement_index": statement_index, "error_message": error_message}
+        block_statements = []
+        for i, query in enumerate(queries):
+            binds[f"statement_{i}"] = query.strip().rstrip(";")
+            block_statements.append(
+                f":statement_index := {i};\nEXECUTE IMMEDIATE :statement_{i};"
+            )
+
+        query = dedent("""\
+            BEGIN
+            {statements}
+            EXCEPTION
+                WHEN OTHERS THEN
+                    :error_message := SQLERRM;
+            END;
+            """).format(statements="\n".join(block_statements))
+        cursor.execute(query, binds)
+
+        if error_message.getvalue():
+            failed_index = statement_index.getvalue()
+            raise BatchStatementError(
+                statement_index=failed_index,
+                statement=queries[failed_index],
+                message=error_message.getvalue(),
+            )
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        table = table or self.change_history_table
         query = f"""\
             SELECT
                 CREATED AS CREATE_TIME,
@@ -29,14 +114,14 @@ class OracleSession(BaseSession):
                 all_objects
             WHERE
                 object_type = 'TABLE'
-                AND object_name = '{self.change_history_table.table_name}'
-                AND owner = '{self.change_history_table.database_name}'
+                AND object_name = '{table.table_name}'
+                AND owner = '{table.database_name}'
         """
         data = self.execute_query(query=query)
 
         return data
 
-    def reset_session(self):
+    def _apply_session_context(self):
         if self.service_name:
             self.execute_query(
                 query=f"ALTER SESSION SET CURRENT_SCHEMA = {self.service_name}"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from schemachange.session.base import BaseSession
+
+# Maximum number of connections opened by the pool, on top of the connection of the session
+DEFAULT_CONNECTION_POOL_SIZE = 4
+
+
+class SessionPool:
+    """
+    Sessions with their own connection, forked from the session of the deploy on first
+    use. A session is lent to one thread or asyncio task at a time: its connection is
+    probed when it is checked out, reopened if it was lost, and its session context
+    (e.g. role, warehouse, schema) is restored. Sessions are kept open until the pool
+    is closed, and the limits of the throttle apply to the statements of all of them
+    """
+
+    def __init__(self, owner: BaseSession, size: int = DEFAULT_CONNECTION_POOL_SIZE):
+        self.owner = owner
+        self.size = size
+        self.checkouts = 0
+        self._sessions: List[BaseSession] = []
+        # Sessions checked in, the last one returned is lent first
+        self._idle: List[BaseSession] = []
+        self._condition = threading.Condition()
+        # Session lent to the current thread or task by session()
+        self._current: contextvars.ContextVar[Optional[BaseSession]] = (
+            contextvars.ContextVar(f"schemachange_pool_{id(self)}", default=None)
+        )
+
+    @property
+    def available(self) -> int:
+        """Number of sessions that can be checked out without waiting"""
+        with self._condition:
+            return len(self._idle) + self.size - len(self._sessions)
+
+    def acquire(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> Optional[BaseSession]:
+        """
+        Checks out a session, opening a new one while the pool is below its size.
+        Returns None when none is available without blocking or within the timeout
+        """
+        with self._condition:
+            while not self._idle and len(self._sessions) >= self.size:
+                if not block or not self._condition.wait(timeout=timeout):
+                    return None
+            if self._idle:
+                session = self._idle.pop()
+            else:
+                session = self.owner.fork()
+                self._sessions.append(session)
+            self.checkouts += 1
+        try:
+            session.check_connection()
+            session.reset_session()
+        except Exception:
+            self.release(session=session)
+            raise
+        return session
+
+    def release(self, session: BaseSession) -> None:
+        with self._condition:
+            self._idle.append(session)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[BaseSession]:
+        """
+        Lends a session to the current thread or task until the block exits.
+        Nested blocks of the same thread or task reuse its session
+        """
+        current = self._current.get()
+        if current is not None:
+            yield current
+            return
+        session = self.acquire(timeout=timeout)
+        if session is None:
+            raise TimeoutError(f"No pooled session available within {timeout} seconds")
+        token = self._current.set(session)
+        try:
+            yield session
+        finally:
+            self._current.reset(token)
+            self.release(session=session)
+
+    def close(self) -> None:
+        with self._condition:
+            sessions, self._sessions, self._idle = self._sessions, [], []
+        for session in sessions:
+            session.close()
@@ -1,14 +1,33 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import psycopg
 
 from schemachange.common.schema import PostgresConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
 from schemachange.config.change_history_table import ChangeHistoryTable
-from schemachange.session.base import BaseSession
+from schemachange.session.async_base import AsyncBaseSession
+from schemachange.session.base import (
+    BaseSession,
+    BatchStatementError,
+    terminate_statement,
+)
+from schemachange.session.result_set import ResultSet
+from schemachange.session.script import SeedScript
+from schemachange.session.seed import SeedFormat, iter_seed_batches, read_seed_columns
+
+POSTGRES_BATCH_SAVEPOINT = "schemachange_batch"
+# serialization_failure, deadlock_detected
+POSTGRES_TRANSIENT_SQLSTATES = ("40001", "40P01")
+# query_canceled, raised by statement_timeout and by a cancel request
+POSTGRES_TIMEOUT_SQLSTATE = "57014"
+# Bytes of a CSV seed file sent per COPY message
+POSTGRES_COPY_BUFFER_SIZE = 1024 * 1024
 
 
 class PostgresSession(BaseSession):
+    supports_statement_batching = True
+    supports_statement_timeout = True
+
     def _connect(self):
         self.user = self.connections_info.get("user")
         self.dbname = self.connections_info.get("dbname")
@@ -24,16 +43,79 @@ class PostgresSession(BaseSession):
         )
         self._cursor = self._connection.cursor()
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
-        query = f"""\
-            SELECT 1
-            FROM INFORMATION_SCHEMA.TABLES
-            WHERE LOWER(TABLE_SCHEMA) = LOWER('{self.change_history_table.schema_name}')
-                AND LOWER(TABLE_NAME) = LOWER('{self.change_history_table.table_name}')
-        """
-        data = self.execute_query(query=query)
+    def _is_connection_error(self, error: Exception) -> bool:
+        return self._connection is not None and self._connection.closed
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        return getattr(error, "sqlstate", None) in POSTGRES_TRANSIENT_SQLSTATES
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        return getattr(error, "sqlstate", None) == POSTGRES_TIMEOUT_SQLSTATE
+
+    def set_statement_timeout(self, timeout: Optional[float]) -> None:
+        # In milliseconds, 0 disables the timeout
+        milliseconds = 0 if timeout is None else max(1, round(timeout * 1000))
+        self.cursor.execute(f"SET statement_timeout = {milliseconds}")
+
+    def _execute_batch(self, queries: List[str]) -> None:
+        statements = [terminate_statement(q) for q in queries]
+        if self._in_transaction:
+            # A failing statement aborts the script transaction, the savepoint
+            # allows discarding the batch only
+            statements.insert(0, f"SAVEPOINT {POSTGRES_BATCH_SAVEPOINT};")
+        try:
+            # Without parameters, psycopg sends the queries as one simple query
+            self.cursor.execute("\n".join(statements))
+            return
+        except Exception:
+            # The statements of a multi-statement query run in one transaction,
+            # none of them was applied. Replay them one by one to find the failing one
+            if self._in_transaction:
+                self.cursor.execute(f"ROLLBACK TO SAVEPOINT {POSTGRES_BATCH_SAVEPOINT}")
+            elif not self._autocommit_state:
+                self._rollback()
+
+        for statement_index, query in enumerate(queries):
+            try:
+                self._execute_query(query=query)
+            except Exception as e:
+                raise BatchStatementError(
+                    statement_index=statement_index, statement=query, message=str(e)
+                ) from e
+
+    def load_seed(self, script: SeedScript) -> int:
+        columns = ", ".join(
+            read_seed_columns(file_path=script.file_path, seed_format=script.format)
+        )
+        if script.format == SeedFormat.CSV:
+            # The file is streamed as is, the server parses it
+            query = (
+                f"COPY {script.table} ({columns}) FROM STDIN (FORMAT csv, HEADER true)"
+            )
+            with self.cursor.copy(query) as copy:
+                with open(script.file_path, "rb") as f:
+                    while data := f.read(POSTGRES_COPY_BUFFER_SIZE):
+                        copy.write(data)
+            return self.cursor.rowcount
+
+        rows = 0
+        with self.cursor.copy(f"COPY {script.table} ({columns}) FROM STDIN") as copy:
+            for batch in iter_seed_batches(
+                file_path=script.file_path, seed_format=script.format
+            ):
+                for row in batch:
+                    copy.write_row(row)
+                rows += len(batch)
+        return rows
 
-        return data
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        return self.execute_query(
+            query=get_change_history_metadata_query(
+                table=table or self.change_history_table
+            )
+        )
 
     def create_change_history_schema(self, dry_run: bool) -> None:
         self.logger.info(
@@ -42,3 +124,52 @@ class PostgresSession(BaseSession):
         )
         query = f"CREATE SCHEMA IF NOT EXISTS {self.change_history_table.schema_name}"
         self.execute_query_with_debug(query=query, dry_run=dry_run)
+
+
+class AsyncPostgresSession(AsyncBaseSession):
+    """PostgresSession on psycopg AsyncConnection"""
+
+    async def _connect(self) -> psycopg.AsyncConnection:
+        self.user = self.connections_info.get("user")
+        self.dbname = self.connections_info.get("dbname")
+        self.change_history_table = ChangeHistoryTable.from_str(
+            table_str=f"{self.dbname}.{self.change_history_table.schema_name}.{self.change_history_table.table_name}",
+            include_schema=self.include_schema,
+        )
+        # Each statement is committed on its own, as BaseSession does outside of
+        # script transactions
+        connect_kwargs = get_connect_kwargs(
+            connections_info=self.connections_info,
+            supported_args_schema=PostgresConnectorArgsSchema,
+        )
+        connect_kwargs["autocommit"] = True
+        return await psycopg.AsyncConnection.connect(**connect_kwargs)
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        return getattr(error, "sqlstate", None) in POSTGRES_TRANSIENT_SQLSTATES
+
+    async def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> ResultSet:
+        return await self.execute_query(
+            query=get_change_history_metadata_query(
+                table=table or self.change_history_table
+            )
+        )
+
+    async def create_change_history_schema(self, dry_run: bool) -> None:
+        self.logger.info(
+            f"Using current session database '{self.dbname}' "
+            "for creating change history table"
+        )
+        query = f"CREATE SCHEMA IF NOT EXISTS {self.change_history_table.schema_name}"
+        await self.execute_query_with_debug(query=query, dry_run=dry_run)
+
+
+def get_change_history_metadata_query(table: ChangeHistoryTable) -> str:
+    return f"""\
+        SELECT 1
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE LOWER(TABLE_SCHEMA) = LOWER('{table.schema_name}')
+            AND LOWER(TABLE_NAME) = LOWER('{table.table_name}')
+    """
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+from pathlib import Path
+from typing import List
+
+import structlog
+
+from schemachange.common.utils import BaseEnum
+
+DEFAULT_RESULT_PREVIEW_ROWS = 10
+# Number of rows fetched per round trip when rows are streamed
+RESULT_FETCH_SIZE = 1000
+
+
+class ResultPolicy(BaseEnum):
+    DISCARD = "discard"
+    PREVIEW = "preview"
+    EXPORT = "export"
+
+
+def get_column_names(cursor) -> List[str]:
+    return [column[0] for column in cursor.description]
+
+
+@dataclasses.dataclass
+class ResultHandler:
+    """Consumes the rows returned by the statements of a change script"""
+
+    script_name: str
+    logger: structlog.BoundLogger
+    statement_count: int = dataclasses.field(default=0, init=False)
+
+    def handle(self, cursor, query: str) -> None:
+        self.statement_count += 1
+        self._handle(cursor=cursor, query=query)
+
+    def _handle(self, cursor, query: str) -> None:
+        raise NotImplementedError
+
+
+@dataclasses.dataclass
+class DiscardResultHandler(ResultHandler):
+    def _handle(self, cursor, query: str) -> None:
+        # Rows are never fetched, the session discards them
+        pass
+
+
+@dataclasses.dataclass
+class PreviewResultHandler(ResultHandler):
+    preview_rows: int = DEFAULT_RESULT_PREVIEW_ROWS
+
+    def _handle(self, cursor, query: str) -> None:
+        columns = get_column_names(cursor=cursor)
+        rows = cursor.fetchmany(self.preview_rows)
+        self.logger.info(
+            "Statement result preview",
+            script_name=self.script_name,
+            statement=self.statement_count,
+            rows=[dict(zip(columns, row)) for row in rows],
+        )
+
+
+@dataclasses.dataclass
+class ExportResultHandler(ResultHandler):
+    export_folder: Path = Path(".")
+
+    def _handle(self, cursor, query: str) -> None:
+        export_path = (
+            self.export_folder
+            / f"{Path(self.script_name).stem}.{self.statement_count}.csv"
+        )
+        export_path.parent.mkdir(parents=True, exist_ok=True)
+
+        row_count = 0
+        with export_path.open("w", newline="", encoding="utf-8") as export_file:
+            writer = csv.writer(export_file)
+            writer.writerow(get_column_names(cursor=cursor))
+            while rows := cursor.fetchmany(RESULT_FETCH_SIZE):
+                writer.writerows(rows)
+                row_count += len(rows)
+
+        self.logger.info(
+            "Exported statement result",
+            script_name=self.script_name,
+            statement=self.statement_count,
+            export_path=str(export_path),
+            row_count=row_count,
+        )
+
+
+def get_result_handler(
+    result_policy: str,
+    script_name: str,
+    logger: structlog.BoundLogger,
+    preview_rows: int = DEFAULT_RESULT_PREVIEW_ROWS,
+    export_folder: Path | None = None,
+) -> ResultHandler:
+    ResultPolicy.validate_value(attr="result_policy", value=result_policy)
+    if result_policy == ResultPolicy.PREVIEW:
+        return PreviewResultHandler(
+            script_name=script_name, logger=logger, preview_rows=preview_rows
+        )
+    if result_policy == ResultPolicy.EXPORT:
+        if export_folder is None:
+            raise ValueError("'result_export_folder' is required to export results")
+        return ExportResultHandler(
+            script_name=script_name, logger=logger, export_folder=Path(export_folder)
+        )
+    return DiscardResultHandler(script_name=script_name, logger=logger)
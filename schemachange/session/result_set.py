@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from schemachange.session.result_handler import RESULT_FETCH_SIZE, get_column_names
+
+
+class ResultRow:
+    """Read-only view of a row of a result set, accessed by lower-cased column name"""
+
+    __slots__ = ("_column_indexes", "_values")
+
+    def __init__(self, column_indexes: Dict[str, int], values: Sequence[Any]):
+        self._column_indexes = column_indexes
+        self._values = values
+
+    def __getitem__(self, column: str) -> Any:
+        return self._values[self._column_indexes[column]]
+
+    def get(self, column: str, default: Any = None) -> Any:
+        index = self._column_indexes.get(column)
+        return default if index is None else self._values[index]
+
+    def keys(self) -> List[str]:
+        return list(self._column_indexes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {column: self._values[i] for column, i in self._column_indexes.items()}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ResultRow):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ResultRow({self.to_dict()!r})"
+
+
+class ResultSet:
+    """
+    Rows of a query kept as driver tuples, with the column names resolved once into
+    an index map. Rows are wrapped in a ResultRow view only when accessed one by one
+    """
+
+    __slots__ = ("column_indexes", "rows")
+
+    def __init__(self, columns: Sequence[str], rows: List[Sequence[Any]]):
+        self.column_indexes = {column.lower(): i for i, column in enumerate(columns)}
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cursor, fetch_size: int = RESULT_FETCH_SIZE) -> ResultSet:
+        columns = get_column_names(cursor=cursor)
+        rows: List[Sequence[Any]] = []
+        while True:
+            chunk = cursor.fetchmany(fetch_size)
+            rows.extend(chunk)
+            if len(chunk) < fetch_size:
+                break
+        return cls(columns=columns, rows=rows)
+
+    @classmethod
+    async def from_async_cursor(
+        cls, cursor, fetch_size: int = RESULT_FETCH_SIZE
+    ) -> ResultSet:
+        columns = get_column_names(cursor=cursor)
+        rows: List[Sequence[Any]] = []
+        while True:
+            chunk = await cursor.fetchmany(fetch_size)
+            rows.extend(chunk)
+            if len(chunk) < fetch_size:
+                break
+        return cls(columns=columns, rows=rows)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.column_indexes)
+
+    def iter_values(self, *columns: str) -> Iterator[Tuple[Any, ...]]:
+        """Yields the values of the given columns of each row, without building row views"""
+        getter = itemgetter(*(self.column_indexes[column] for column in columns))
+        if len(columns) == 1:
+            return ((getter(row),) for row in self.rows)
+        return map(getter, self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> ResultRow:
+        return ResultRow(column_indexes=self.column_indexes, values=self.rows[index])
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        for row in self.rows:
+            yield ResultRow(column_indexes=self.column_indexes, values=row)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ResultSet):
+            return (
+                self.column_indexes == other.column_indexes and self.rows == other.rows
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ResultSet(columns={self.columns!r}, rows={len(self.rows)})"
@@ -4,11 +4,12 @@ import dataclasses
 import re
 from abc import ABC
 from pathlib import Path
-from typing import ClassVar, Literal, Pattern, TypeVar
+from typing import ClassVar, Dict, List, Literal, Pattern, Tuple, TypeVar
 
+import sqlparse
 import structlog
 
-from schemachange.common.utils import BaseEnum
+from schemachange.common.utils import BaseEnum, get_parallel_markers
 
 logger = structlog.getLogger(__name__)
 T = TypeVar("T", bound="Script")
@@ -19,14 +20,69 @@ class ScriptType(BaseEnum):
     REPEATABLE = "R"
     ALWAYS = "A"
     ROLLBACK = "RB"
+    SEED = "S"
 
 
 DEPLOYABLE_SCRIPT_TYPES = [
     ScriptType.VERSIONED,
+    ScriptType.SEED,
     ScriptType.REPEATABLE,
     ScriptType.ALWAYS,
 ]
 
+# Setting of a script given in its leading comments, e.g. "-- schemachange: statement-timeout=600"
+SCRIPT_HEADER_PATTERN = re.compile(
+    r"^--\s*schemachange:\s*(?P<key>[a-z][a-z-]*)\s*=\s*(?P<value>\S+)$", re.IGNORECASE
+)
+
+
+def get_script_headers(script_content: str) -> Dict[str, str]:
+    """Reads the settings in the comment lines at the top of a script"""
+    headers = {}
+    for line in script_content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("--"):
+            break
+        match = SCRIPT_HEADER_PATTERN.match(line)
+        if match:
+            headers[match.group("key").lower()] = match.group("value")
+    return headers
+
+
+def split_parallel_blocks(statements: List[str]) -> List[Tuple[int, List[str], bool]]:
+    """
+    Splits the statements of a script in runs of consecutive statements, each with the
+    index of its first statement and whether it is a parallel block. A block starts at
+    the statement following "parallel begin" and ends before the one following
+    "parallel end", or at the end of the script
+    """
+    blocks: List[Tuple[int, List[str], bool]] = []
+    block: List[str] = []
+    block_start = 0
+    parallel = False
+    for statement_index, statement in enumerate(statements):
+        markers = get_parallel_markers(statement=statement)
+        for marker in markers:
+            if (marker == "begin") == parallel:
+                # Nested begin or unmatched end
+                continue
+            if block:
+                blocks.append((block_start, block, parallel))
+            block = []
+            parallel = not parallel
+        if not block:
+            block_start = statement_index
+        if markers and not sqlparse.format(statement, strip_comments=True).strip():
+            # The comment closing a block at the end of the script
+            continue
+        block.append(statement)
+
+    if block:
+        blocks.append((block_start, block, parallel))
+    return blocks
+
 
 @dataclasses.dataclass(frozen=True)
 class Script(ABC):
@@ -102,11 +158,37 @@ class RollbackScript(Script):
     type: ClassVar[Literal["RB"]] = ScriptType.ROLLBACK
 
 
+@dataclasses.dataclass(frozen=True)
+class SeedScript(Script):
+    # Seed data file loaded into <table>: S__<table>.<csv|parquet>
+    # eg. S__COUNTRIES.csv
+    # eg. S__REFERENCE.CURRENCIES.parquet
+    pattern: ClassVar[re.Pattern[str]] = re.compile(
+        r"^(S)__(?P<description>[\w.$]+)\.(?P<format>csv|parquet)$", re.IGNORECASE
+    )
+    type: ClassVar[Literal["S"]] = ScriptType.SEED
+    table: str
+    format: str
+
+    @classmethod
+    def from_path(cls: T, file_path: Path, **kwargs) -> T:
+        name_parts = cls.pattern.search(file_path.name.strip())
+
+        return super().from_path(
+            file_path=file_path,
+            table=name_parts.group("description"),
+            format=name_parts.group("format").lower(),
+        )
+
+
 def script_factory(
     file_path: Path,
 ) -> T | None:
     file_name = file_path.name.strip()
-    if VersionedScript.pattern.search(file_name) is not None:
+    if SeedScript.pattern.search(file_name) is not None:
+        return SeedScript.from_path(file_path=file_path)
+
+    elif VersionedScript.pattern.search(file_name) is not None:
         return VersionedScript.from_path(file_path=file_path)
 
     elif RepeatableScript.pattern.search(file_name) is not None:
@@ -130,7 +212,12 @@ def get_all_scripts_recursively(root_directory: Path):
     for file_path in file_paths:
         if file_path.is_dir():
             continue
-        if not sql_pattern.search(file_path.name.strip()):
+        file_name = file_path.name.strip()
+        # Data files other than seed files are not change scripts
+        if (
+            not sql_pattern.search(file_name)
+            and SeedScript.pattern.search(file_name) is None
+        ):
             continue
         script = script_factory(file_path=file_path)
         if script is None:
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from schemachange.session.object_references import (
+    ObjectName,
+    ScriptObjects,
+    names_match,
+)
+from schemachange.session.script import Script, ScriptType
+
+# Script header listing the scripts applied before a script, e.g.
+# "-- schemachange: depends-on=R__customers.sql,R__orders.sql"
+DEPENDS_ON_HEADER = "depends-on"
+
+T = TypeVar("T")
+
+
+def get_depends_on(headers: Dict[str, str]) -> List[str]:
+    """Names of the scripts declared in the depends-on header of a script"""
+    value = headers.get(DEPENDS_ON_HEADER, "")
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_implicit_dependencies(scripts: Sequence[Script]) -> Dict[str, Set[str]]:
+    """
+    Dependencies following from the apply order of the scripts: each versioned script
+    depends on the previous one, and the other scripts on every script of the type applied
+    before theirs, e.g. repeatable scripts on every seed file. Seed files, repeatable
+    scripts and always scripts do not depend on the other scripts of their type
+    """
+    dependencies: Dict[str, Set[str]] = {}
+    previous_group: List[str] = []
+    group: List[str] = []
+    group_type: Optional[str] = None
+    for script in scripts:
+        if script.type != group_type or script.type == ScriptType.VERSIONED:
+            if group:
+                previous_group = group
+            group = []
+            group_type = script.type
+        dependencies[script.name] = set(previous_group)
+        group.append(script.name)
+    return dependencies
+
+
+class ScriptGraph(Generic[T]):
+    """
+    Dependency graph of the scripts of a deploy, built from the implicit order of script
+    types and the depends-on headers of the scripts. Scripts are added in apply order as
+    they are planned, with the item to run for each of them, and handed out once all
+    the scripts they depend on are done.
+
+    With infer_dependencies, repeatable scripts also depend on the repeatable scripts
+    creating the objects they read, see get_script_objects. They are then handed out
+    once every repeatable script has been added, when their dependencies are known
+    """
+
+    def __init__(self, scripts: Sequence[Script], infer_dependencies: bool = False):
+        self.dependencies = get_implicit_dependencies(scripts=scripts)
+        # Scripts added and not handed out yet, in apply order
+        self._pending: Dict[str, T] = {}
+        self._done: Set[str] = set()
+        # Repeatable scripts whose dependencies are inferred, those not added yet, and
+        # the objects of those added
+        self._inferred_scripts: Set[str] = (
+            {script.name for script in scripts if script.type == ScriptType.REPEATABLE}
+            if infer_dependencies
+            else set()
+        )
+        self._unplanned_repeatables = set(self._inferred_scripts)
+        self._objects: Dict[str, ScriptObjects] = {}
+
+    def add(
+        self,
+        name: str,
+        item: T,
+        depends_on: Sequence[str] = (),
+        objects: Optional[ScriptObjects] = None,
+    ) -> None:
+        """
+        Adds a planned script, with the scripts declared in its depends-on header and,
+        for repeatable scripts when dependencies are inferred, the objects of its content
+        """
+        for dependency in depends_on:
+            if dependency not in self.dependencies:
+                raise ValueError(
+                    f"Script {name} depends on {dependency}, which is not a script of the deploy"
+                )
+            self.dependencies[name].add(dependency)
+        self._pending[name] = item
+        self._check_cycle(name=name)
+        if name in self._unplanned_repeatables:
+            self._unplanned_repeatables.remove(name)
+            if objects is not None:
+                self._objects[name] = objects
+            if not self._unplanned_repeatables:
+                self._infer_dependencies()
+
+    def _infer_dependencies(self) -> None:
+        """Makes each repeatable script depend on the ones creating the objects it reads"""
+        # Scripts creating each object, by the last part of its name
+        creators: Dict[str, List[Tuple[ObjectName, str]]] = defaultdict(list)
+        for name, objects in self._objects.items():
+            for created in objects.created:
+                creators[created[-1]].append((created, name))
+        for name, objects in self._objects.items():
+            for referenced in objects.referenced:
+                for created, creator in creators.get(referenced[-1], []):
+                    if creator != name and names_match(referenced, created):
+                        self.dependencies[name].add(creator)
+        for name in self._objects:
+            self._check_cycle(name=name, inferred=True)
+
+    def _check_cycle(self, name: str, inferred: bool = False) -> None:
+        cycle = self._find_cycle(name=name)
+        if cycle is None:
+            return
+        message = f"Circular dependency between scripts: {' -> '.join(cycle)}"
+        if inferred:
+            message = f"{message}, inferred from the objects they create and read"
+        raise ValueError(message)
+
+    def _find_cycle(self, name: str) -> Optional[List[str]]:
+        """A path from the script back to itself through scripts not handed out yet"""
+        path = [name]
+        visited: Set[str] = set()
+
+        def visit(current: str) -> bool:
+            for dependency in sorted(self.dependencies[current]):
+                if dependency == name:
+                    path.append(dependency)
+                    return True
+                if dependency in visited or dependency not in self._pending:
+                    continue
+                visited.add(dependency)
+                path.append(dependency)
+                if visit(dependency):
+                    return True
+                path.pop()
+            return False
+
+        return path if visit(name) else None
+
+    def pop_ready(self) -> List[T]:
+        """Items of the added scripts whose dependencies are all done, in apply order"""
+        ready = [
+            name
+            for name in self._pending
+            if self.dependencies[name].issubset(self._done)
+            and not (name in self._inferred_scripts and self._unplanned_repeatables)
+        ]
+        return [self._pending.pop(name) for name in ready]
+
+    def mark_done(self, name: str) -> None:
+        self._done.add(name)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+from schemachange.common.utils import BaseEnum
+
+# Rows of a seed file read in memory at once and sent in one round trip
+SEED_BATCH_SIZE = 10000
+
+
+class SeedFormat(BaseEnum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+def read_seed_columns(file_path: Path, seed_format: str) -> List[str]:
+    """Column names of the seed file, from the header row of CSV files"""
+    if seed_format == SeedFormat.PARQUET:
+        import pyarrow.parquet
+
+        return pyarrow.parquet.ParquetFile(file_path).schema_arrow.names
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise ValueError(f"Seed file {file_path} has no header row")
+    return [column.strip() for column in header]
+
+
+def iter_seed_batches(
+    file_path: Path, seed_format: str, batch_size: int = SEED_BATCH_SIZE
+) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Yields the rows of the seed file in batches of at most batch_size rows.
+    Empty CSV fields are read as NULL, as the native CSV loaders do
+    """
+    if seed_format == SeedFormat.PARQUET:
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(file_path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            columns = record_batch.to_pydict().values()
+            yield list(zip(*columns))
+        return
+
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        batch: List[Tuple[Any, ...]] = []
+        for row in reader:
+            batch.append(tuple(value if value != "" else None for value in row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def get_csv_line_terminator(file_path: Path) -> str:
+    """Line terminator of the header row of a CSV file"""
+    with open(file_path, "rb") as f:
+        header = f.readline()
+    return "\r\n" if header.endswith(b"\r\n") else "\n"
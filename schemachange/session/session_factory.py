@@ -2,6 +2,7 @@ from typing import Any, Dict
 
 import structlog
 
+from schemachange.session.async_base import DEFAULT_ASYNC_CONNECTIONS, AsyncBaseSession
 from schemachange.session.base import BaseSession, DatabaseType
 
 
@@ -36,3 +37,20 @@ def get_db_session(
         DatabaseType.validate_value(attr="db_type", value=db_type)
 
     return db_session
+
+
+def get_async_db_session(
+    db_type: str,
+    logger: structlog.BoundLogger,
+    session_kwargs: Dict[str, Any],
+    connections: int = DEFAULT_ASYNC_CONNECTIONS,
+) -> AsyncBaseSession:
+    """Session for databases whose driver has an asyncio API"""
+    if db_type == DatabaseType.POSTGRES:
+        from schemachange.session.postgres_session import AsyncPostgresSession
+
+        return AsyncPostgresSession(
+            logger=logger, session_kwargs=session_kwargs, connections=connections
+        )
+    DatabaseType.validate_value(attr="db_type", value=db_type)
+    raise ValueError(f"Asynchronous sessions are not supported for {db_type}")
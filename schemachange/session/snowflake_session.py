@@ -1,13 +1,37 @@
-from typing import Dict, List
+import json
+import math
+import re
+from textwrap import dedent
+from typing import Any, Dict, List, Optional, Tuple
 
 import snowflake.connector
+from snowflake.connector.errors import OperationalError
 
 from schemachange.common.schema import SnowflakeConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
-from schemachange.session.base import BaseSession
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import (
+    BaseSession,
+    BatchStatementError,
+    terminate_statement,
+)
+from schemachange.session.script import SeedScript
+from schemachange.session.seed import SeedFormat, read_seed_columns
+
+# Authentication token has expired, the session has to be re-established
+SNOWFLAKE_CONNECTION_ERRNOS = (390114,)
+# Statement reached its timeout and was canceled
+SNOWFLAKE_TIMEOUT_ERRNO = 630
+
+# Snowflake Scripting blocks cannot be nested in the batch block
+SNOWFLAKE_SCRIPTING_PATTERN = re.compile(r"^(BEGIN|DECLARE|EXECUTE IMMEDIATE)\b|\$\$")
 
 
 class SnowflakeSession(BaseSession):
+    supports_statement_batching = True
+    supports_async_execution = True
+    supports_statement_timeout = True
+
     def _connect(self):
         self.user = self.connections_info.get("user")
         self.warehouse = self.connections_info.get("warehouse")
@@ -25,8 +49,133 @@ class SnowflakeSession(BaseSession):
     def set_autocommit(self, autocommit: bool) -> None:
         self._connection.autocommit(autocommit)
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
-        schemachange_database = self.change_history_table.database_name
+    def _is_connection_error(self, error: Exception) -> bool:
+        if getattr(error, "errno", None) in SNOWFLAKE_CONNECTION_ERRNOS:
+            return True
+        return self._connection is not None and self._connection.is_closed()
+
+    def _submit_statement(
+        self, cursor, query: str, params: Optional[Tuple | Dict[str, Any]]
+    ) -> Optional[str]:
+        cursor.execute_async(query, params)
+        return cursor.sfqid
+
+    def _is_statement_running(self, cursor, query_id: Optional[str]) -> bool:
+        status = self.connection.get_query_status_throw_if_error(query_id)
+        return self.connection.is_still_running(status)
+
+    def _fetch_statement_result(self, cursor, query_id: Optional[str]) -> None:
+        cursor.get_results_from_sfqid(query_id)
+
+    def _is_poll_error(self, error: Exception) -> bool:
+        # Failed statements raise a ProgrammingError, lost requests an OperationalError
+        if isinstance(error, OperationalError):
+            return True
+        return super()._is_poll_error(error=error)
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) == SNOWFLAKE_TIMEOUT_ERRNO
+
+    def set_statement_timeout(self, timeout: Optional[float]) -> None:
+        if timeout is None:
+            self.cursor.execute("ALTER SESSION UNSET STATEMENT_TIMEOUT_IN_SECONDS")
+        else:
+            self.cursor.execute(
+                "ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = "
+                f"{max(1, math.ceil(timeout))}"
+            )
+
+    def _cancel_statement(self) -> None:
+        if self._cursor.sfqid is not None:
+            self._cursor.abort_query(self._cursor.sfqid)
+
+    def _is_batchable(self, normalized_query: str) -> bool:
+        if SNOWFLAKE_SCRIPTING_PATTERN.search(normalized_query):
+            return False
+        return super()._is_batchable(normalized_query=normalized_query)
+
+    def _execute_batch(self, queries: List[str]) -> None:
+        # Run the statements in one Snowflake Scripting block, the block tracks
+        # the index of the running statement and returns the error of the failing one
+        block_statements = []
+        for i, query in enumerate(queries):
+            block_statements.append(
+                f"statement_index := {i};\n{terminate_statement(query)}"
+            )
+
+        query = dedent("""\
+            EXECUTE IMMEDIATE $$
+            DECLARE
+                statement_index INTEGER DEFAULT 0;
+            BEGIN
+            {statements}
+            RETURN NULL;
+            EXCEPTION
+                WHEN OTHER THEN
+                    RETURN OBJECT_CONSTRUCT(
+                        'statement_index', statement_index,
+                        'sqlcode', SQLCODE,
+                        'sqlerrm', SQLERRM
+                    );
+            END;
+            $$
+            """).format(statements="\n".join(block_statements))
+        cursor = self.cursor
+        cursor.execute(query)
+        result = cursor.fetchone()
+
+        if result and result[0] is not None:
+            error = json.loads(result[0])
+            failed_index = error["statement_index"]
+            raise BatchStatementError(
+                statement_index=failed_index,
+                statement=queries[failed_index],
+                message=f"{error['sqlcode']} ({error['sqlerrm']})",
+            )
+
+    def load_seed(self, script: SeedScript) -> int:
+        # The file is uploaded to the stage of the table, loaded, then purged
+        stage = get_table_stage(table=script.table)
+        is_csv = script.format == SeedFormat.CSV
+        cursor = self.cursor
+        cursor.execute(
+            f"PUT 'file://{script.file_path.resolve().as_posix()}' {stage} "
+            f"AUTO_COMPRESS = {'TRUE' if is_csv else 'FALSE'} OVERWRITE = TRUE"
+        )
+        if is_csv:
+            columns = ", ".join(
+                read_seed_columns(file_path=script.file_path, seed_format=script.format)
+            )
+            query = f"""\
+                COPY INTO {script.table} ({columns})
+                FROM {stage}
+                FILES = ('{script.file_path.name}.gz')
+                FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '"')
+                FORCE = TRUE
+                PURGE = TRUE
+            """
+        else:
+            query = f"""\
+                COPY INTO {script.table}
+                FROM {stage}
+                FILES = ('{script.file_path.name}')
+                FILE_FORMAT = (TYPE = PARQUET)
+                MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+                FORCE = TRUE
+                PURGE = TRUE
+            """
+        cursor.execute(dedent(query))
+        # One row per loaded file, or a status row when no file was loaded
+        data = self.get_executed_query_data(cursor)
+        if "rows_loaded" not in data.column_indexes:
+            return 0
+        return sum(rows for (rows,) in data.iter_values("rows_loaded"))
+
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        table = table or self.change_history_table
+        schemachange_database = table.database_name
 
         # Check if database exists yet
         database_data = self.execute_query(
@@ -39,15 +188,15 @@ class SnowflakeSession(BaseSession):
             SELECT
                 CREATED AS CREATE_TIME,
                 LAST_ALTERED AS UPDATE_TIME
-            FROM {self.change_history_table.database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE UPPER(TABLE_SCHEMA) = UPPER('{self.change_history_table.schema_name}')
-                AND UPPER(TABLE_NAME) = UPPER('{self.change_history_table.table_name}')
+            FROM {table.database_name}.INFORMATION_SCHEMA.TABLES
+            WHERE UPPER(TABLE_SCHEMA) = UPPER('{table.schema_name}')
+                AND UPPER(TABLE_NAME) = UPPER('{table.table_name}')
         """
         data = self.execute_query(query=query)
 
         return data
 
-    def reset_session(self):
+    def _apply_session_context(self):
         reset_query = []
         if self.role:
             reset_query.append(f"USE ROLE IDENTIFIER('{self.role}');")
@@ -80,3 +229,9 @@ class SnowflakeSession(BaseSession):
             query=f"CREATE SCHEMA IF NOT EXISTS {schemachange_database}.{schemachange_schema}",
             dry_run=dry_run,
         )
+
+
+def get_table_stage(table: str) -> str:
+    """Stage of the table, e.g. @DB.SCHEMA.%TABLE"""
+    *qualifiers, table_name = table.split(".")
+    return "@" + ".".join([*qualifiers, f"%{table_name}"])
@@ -1,13 +1,30 @@
-from typing import Dict, List
+import math
+from typing import Dict, List, Optional
 
 import pymssql
 
 from schemachange.common.schema import SQLServerConnectorArgsSchema
 from schemachange.common.utils import get_connect_kwargs
+from schemachange.config.change_history_table import ChangeHistoryTable
 from schemachange.session.base import BaseSession
+from schemachange.session.script import SeedScript
+from schemachange.session.seed import (
+    SEED_BATCH_SIZE,
+    iter_seed_batches,
+    read_seed_columns,
+)
+
+# Transaction was deadlocked and chosen as the victim, it is rolled back
+SQL_SERVER_TRANSIENT_ERROR_NUMBERS = (1205,)
+# SQLETIME, the client stopped waiting for the statement after the query timeout
+SQL_SERVER_TIMEOUT_ERROR_NUMBER = 20003
 
 
 class SQLServerSession(BaseSession):
+    supports_statement_timeout = True
+    # Table value constructors are limited to 1000 rows
+    max_insert_rows = 1000
+
     def _connect(self):
         self.user = self.connections_info.get("user")
         self.database = self.connections_info.get("database")
@@ -22,6 +39,60 @@ class SQLServerSession(BaseSession):
     def set_autocommit(self, autocommit: bool) -> None:
         self._connection.autocommit(autocommit)
 
+    def _is_transient_error(self, error: Exception) -> bool:
+        # pymssql errors carry the server error number first
+        return bool(error.args) and error.args[0] in SQL_SERVER_TRANSIENT_ERROR_NUMBERS
+
+    def _is_timeout_error(self, error: Exception) -> bool:
+        return bool(error.args) and error.args[0] == SQL_SERVER_TIMEOUT_ERROR_NUMBER
+
+    def set_statement_timeout(self, timeout: Optional[float]) -> None:
+        # Client side timeout in whole seconds, 0 disables it
+        self.connection._conn.query_timeout = (
+            0 if timeout is None else max(1, math.ceil(timeout))
+        )
+
+    def _cancel_statement(self) -> None:
+        self._connection._conn.cancel()
+
+    def load_seed(self, script: SeedScript) -> int:
+        # Bulk copy addresses the columns of the table by position
+        cursor = self.cursor
+        cursor.execute(
+            "SELECT name, column_id FROM sys.columns WHERE object_id = OBJECT_ID(%s)",
+            (script.table,),
+        )
+        column_ids = {name.lower(): column_id for name, column_id in cursor.fetchall()}
+        columns = read_seed_columns(
+            file_path=script.file_path, seed_format=script.format
+        )
+        unknown_columns = [c for c in columns if c.lower() not in column_ids]
+        if unknown_columns:
+            raise ValueError(
+                f"Columns {unknown_columns} of {script.name} do not exist in {script.table}"
+            )
+
+        rows = 0
+
+        def iter_rows():
+            nonlocal rows
+            for batch in iter_seed_batches(
+                file_path=script.file_path, seed_format=script.format
+            ):
+                rows += len(batch)
+                yield from batch
+
+        # Constraints and triggers apply as they do to INSERT statements
+        self._connection.bulk_copy(
+            table_name=script.table,
+            elements=iter_rows(),
+            column_ids=[column_ids[c.lower()] for c in columns],
+            batch_size=SEED_BATCH_SIZE,
+            check_constraints=True,
+            fire_triggers=True,
+        )
+        return rows
+
     def create_change_history_table(self, dry_run: bool) -> None:
         query = f"""\
             CREATE TABLE {self.change_history_table.fully_qualified} (
@@ -41,8 +112,11 @@ class SQLServerSession(BaseSession):
         """
         self.execute_query_with_debug(query=query, dry_run=dry_run)
 
-    def fetch_change_history_metadata(self) -> List[Dict]:
-        schemachange_database = self.change_history_table.database_name
+    def fetch_change_history_metadata(
+        self, table: Optional[ChangeHistoryTable] = None
+    ) -> List[Dict]:
+        table = table or self.change_history_table
+        schemachange_database = table.database_name
 
         # Check if database exists yet
         database_data = self.execute_query(
@@ -53,17 +127,17 @@ class SQLServerSession(BaseSession):
 
         query = f"""\
             SELECT 1
-            FROM {self.change_history_table.database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE LOWER(TABLE_CATALOG) = LOWER('{self.change_history_table.database_name}')
-                AND LOWER(TABLE_SCHEMA) = LOWER('{self.change_history_table.schema_name}')
-                AND LOWER(TABLE_NAME) = LOWER('{self.change_history_table.table_name}')
+            FROM {table.database_name}.INFORMATION_SCHEMA.TABLES
+            WHERE LOWER(TABLE_CATALOG) = LOWER('{table.database_name}')
+                AND LOWER(TABLE_SCHEMA) = LOWER('{table.schema_name}')
+                AND LOWER(TABLE_NAME) = LOWER('{table.table_name}')
                 AND TABLE_TYPE = 'BASE TABLE'
         """
         data = self.execute_query(query=query)
 
         return data
 
-    def reset_session(self):
+    def _apply_session_context(self):
         if self.database:
             self.execute_query(query=f"USE {self.database}")
 
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+import structlog
+
+DEFAULT_HEALTH_CHECK_TIMEOUT = 600.0
+# Seconds between two evaluations of the health check, passing or not
+HEALTH_CHECK_INTERVAL = 5.0
+
+
+class HealthCheckTimeoutError(Exception):
+    """Raised when the health check did not pass before its timeout"""
+
+
+class Throttle:
+    """
+    Paces the statements of change scripts to protect the load of the database: at most
+    max_statements_per_second statements are started per second, scripts start at least
+    script_pause seconds apart, and no statement starts while the health check fails.
+    Shared by the sessions running the statements of a deploy, so limits apply to all
+    """
+
+    def __init__(
+        self,
+        logger: structlog.BoundLogger,
+        max_statements_per_second: Optional[float] = None,
+        script_pause: Optional[float] = None,
+        health_check: Optional[Callable[[], bool]] = None,
+        health_check_timeout: float = DEFAULT_HEALTH_CHECK_TIMEOUT,
+    ):
+        self.logger = logger
+        self.max_statements_per_second = max_statements_per_second
+        self.script_pause = script_pause
+        self.health_check = health_check
+        self.health_check_timeout = health_check_timeout
+        self.throttled_time = 0.0
+        self._lock = threading.Lock()
+        self._next_statement_time = 0.0
+        self._last_script_end_time: Optional[float] = None
+        self._last_health_check_time: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.max_statements_per_second is not None
+            or self.script_pause is not None
+            or self.health_check is not None
+        )
+
+    def _sleep(self, delay: float) -> None:
+        if delay <= 0:
+            return
+        self.throttled_time += delay
+        time.sleep(delay)
+
+    def before_script(self) -> None:
+        """Waits until script_pause seconds passed since the end of the previous script"""
+        if self.script_pause is None or self._last_script_end_time is None:
+            return
+        self._sleep(self._last_script_end_time + self.script_pause - time.monotonic())
+
+    def after_script(self) -> None:
+        self._last_script_end_time = time.monotonic()
+
+    def before_statements(self, statements: int = 1) -> None:
+        """Waits for the health check to pass and for the rate limit to allow the statements"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._wait_for_health_check()
+            if self.max_statements_per_second is None:
+                return
+            now = time.monotonic()
+            start_time = max(now, self._next_statement_time)
+            self._next_statement_time = (
+                start_time + statements / self.max_statements_per_second
+            )
+            self._sleep(start_time - now)
+
+    def _wait_for_health_check(self) -> None:
+        if self.health_check is None:
+            return
+        now = time.monotonic()
+        if (
+            self._last_health_check_time is not None
+            and now - self._last_health_check_time < HEALTH_CHECK_INTERVAL
+        ):
+            return
+        deadline = now + self.health_check_timeout
+        while not self.health_check():
+            if time.monotonic() >= deadline:
+                raise HealthCheckTimeoutError(
+                    f"Health check did not pass within {self.health_check_timeout} seconds"
+                )
+            self.logger.info(
+                "Pausing deploy until the health check passes",
+                retry_in=HEALTH_CHECK_INTERVAL,
+            )
+            self._sleep(HEALTH_CHECK_INTERVAL)
+        self._last_health_check_time = time.monotonic()
@@ -0,0 +1,372 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import structlog
+
+from schemachange.action import deploy
+from schemachange.action.deploy import (
+    DeployState,
+    ScriptPlan,
+    apply_script_plans,
+    check_resume_state,
+    classify_script,
+    deploy_async,
+    planned_scripts,
+    render_script,
+)
+from schemachange.config.deploy_config import DeployConfig
+from schemachange.session.result_set import ResultSet
+from schemachange.session.script import SeedScript, VersionedScript, script_factory
+
+SCRIPTS = [
+    VersionedScript.from_path(file_path=Path(f"V1.0.{index}__script.sql"))
+    for index in range(5)
+]
+STATE = DeployState(
+    versioned_scripts={},
+    r_scripts_checksum={},
+    max_published_version=[],
+    applied_scripts={},
+    checkpoints={},
+)
+
+
+def get_config(render_ahead: int = 2, parallelism: int = 1) -> DeployConfig:
+    return DeployConfig.factory(
+        config_file_path=Path("schemachange-config.yml"),
+        db_type="POSTGRES",
+        render_ahead=render_ahead,
+        parallelism=parallelism,
+    )
+
+
+def get_state() -> Future:
+    state = Future()
+    state.set_result(STATE)
+    return state
+
+
+def plan_all(render_ahead: int, fake_render_script, state: Optional[Future] = None):
+    with patch.object(deploy, "render_script", side_effect=fake_render_script):
+        with planned_scripts(
+            scripts=SCRIPTS,
+            config=get_config(render_ahead=render_ahead),
+            state=state or get_state(),
+            db_type="POSTGRES",
+            logger=structlog.get_logger(),
+        ) as plans:
+            yield from plans
+
+
+def get_fake_render_script(planned: list, fail_on: Optional[str] = None):
+    def fake_render_script(script, **kwargs):
+        if script.name == fail_on:
+            raise ValueError(f"Invalid {script.name}")
+        planned.append(script.name)
+        return "SELECT 1;", "checksum"
+
+    return fake_render_script
+
+
+def wait_for_planned(planned: list, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(planned) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("render_ahead", [0, 1, 2, 10])
+def test_plans_keep_the_apply_order(render_ahead: int):
+    planned = []
+
+    plans = list(plan_all(render_ahead, get_fake_render_script(planned=planned)))
+
+    assert [plan.script.name for _, plan in plans] == [s.name for s in SCRIPTS]
+    assert planned == [s.name for s in SCRIPTS]
+
+
+def test_scripts_are_planned_ahead_of_the_applied_one():
+    planned = []
+    plans = plan_all(2, get_fake_render_script(planned=planned))
+
+    next(plans)
+    # The planning thread fills the queue while the first script is applied
+    wait_for_planned(planned=planned, count=4)
+
+    # One script handed out, two waiting in the queue and one waiting for room
+    assert planned == [s.name for s in SCRIPTS[:4]]
+    plans.close()
+    assert not any(
+        thread.name == "schemachange-planner" for thread in threading.enumerate()
+    )
+
+
+def test_planning_error_is_raised_at_its_script():
+    planned = []
+    applied = []
+
+    with pytest.raises(ValueError, match="Invalid V1.0.2__script.sql"):
+        for _, plan in plan_all(
+            2, get_fake_render_script(planned=planned, fail_on=SCRIPTS[2].name)
+        ):
+            applied.append(plan.script.name)
+
+    assert applied == [s.name for s in SCRIPTS[:2]]
+
+
+def test_scripts_are_rendered_while_the_change_history_is_read():
+    planned = []
+    state = Future()
+    plans = plan_all(2, get_fake_render_script(planned=planned), state=state)
+
+    # The first script waits for the change history to be classified, while the
+    # next ones are rendered: two waiting in the queue and one waiting for room
+    consumer = threading.Thread(target=next, args=(plans,))
+    consumer.start()
+    wait_for_planned(planned=planned, count=4)
+    assert planned == [s.name for s in SCRIPTS[:4]]
+    assert consumer.is_alive()
+
+    state.set_result(STATE)
+    consumer.join(timeout=5)
+    assert not consumer.is_alive()
+    plans.close()
+
+
+DAG_SCRIPTS = [
+    script_factory(file_path=Path(name))
+    for name in [
+        "V1.0.0__tables.sql",
+        "R__customers.sql",
+        "R__orders.sql",
+        "R__report.sql",
+        "A__grants.sql",
+    ]
+]
+DAG_CONTENTS = {
+    "R__report.sql": "-- schemachange: depends-on=R__orders.sql\nSELECT 1;",
+}
+
+
+def apply_all(parallelism: int, fake_run_script_plan):
+    plans = [
+        (
+            structlog.get_logger(),
+            ScriptPlan(
+                script=script,
+                content=DAG_CONTENTS.get(script.name, "SELECT 1;"),
+                checksum="checksum",
+                apply=True,
+            ),
+        )
+        for script in DAG_SCRIPTS
+    ]
+    with patch.object(deploy, "run_script_plan", side_effect=fake_run_script_plan):
+        return apply_script_plans(
+            plans=iter(plans),
+            scripts=DAG_SCRIPTS,
+            config=get_config(parallelism=parallelism),
+            db_session=MagicMock(),
+            batch_id="batch",
+        )
+
+
+def test_scripts_are_applied_after_their_dependencies():
+    applied = []
+
+    counts = apply_all(1, lambda plan, **kwargs: applied.append(plan.script.name))
+
+    assert counts == (5, 0)
+    assert applied == [
+        "V1.0.0__tables.sql",
+        "R__customers.sql",
+        "R__orders.sql",
+        "R__report.sql",
+        "A__grants.sql",
+    ]
+
+
+def test_independent_scripts_are_applied_concurrently():
+    applied = []
+    # Both repeatable scripts without dependencies must run at the same time
+    barrier = threading.Barrier(2)
+
+    def fake_run_script_plan(plan, **kwargs):
+        if plan.script.name in ("R__customers.sql", "R__orders.sql"):
+            barrier.wait(timeout=5)
+        applied.append(plan.script.name)
+
+    counts = apply_all(4, fake_run_script_plan)
+
+    assert counts == (5, 0)
+    assert applied[0] == "V1.0.0__tables.sql"
+    assert applied.index("R__orders.sql") < applied.index("R__report.sql")
+    assert applied[-1] == "A__grants.sql"
+
+
+def test_no_script_starts_after_a_failure():
+    applied = []
+
+    def fake_run_script_plan(plan, **kwargs):
+        if plan.script.name == "R__orders.sql":
+            raise ValueError("Failed to execute R__orders.sql")
+        applied.append(plan.script.name)
+
+    with pytest.raises(ValueError, match="R__orders.sql"):
+        apply_all(4, fake_run_script_plan)
+
+    assert "R__report.sql" not in applied
+    assert "A__grants.sql" not in applied
+
+
+def test_deploy_async_applies_scripts_after_their_dependencies():
+    contents = {
+        "R__customers.sql": "-- schemachange: depends-on=R__report.sql\nSELECT 1;",
+    }
+    db_session = AsyncMock(db_type="POSTGRES", retries=0)
+    db_session.get_script_metadata.return_value = ({}, {}, None)
+    applied = []
+
+    async def fake_run_script_plan_async(plan, **kwargs):
+        applied.append(plan.script.name)
+
+    with patch.object(
+        deploy, "get_deploy_scripts", return_value=DAG_SCRIPTS
+    ), patch.object(
+        deploy,
+        "render_script",
+        side_effect=lambda script, config: (
+            contents.get(script.name, "SELECT 1;"),
+            "checksum",
+        ),
+    ), patch.object(
+        deploy, "run_script_plan_async", side_effect=fake_run_script_plan_async
+    ):
+        asyncio.run(
+            deploy_async(
+                config=get_config(),
+                db_session=db_session,
+                logger=structlog.get_logger(),
+            )
+        )
+
+    assert applied == [
+        "V1.0.0__tables.sql",
+        "R__orders.sql",
+        "R__report.sql",
+        "R__customers.sql",
+        "A__grants.sql",
+    ]
+    db_session.update_batch_status.assert_awaited_once()
+    assert db_session.update_batch_status.call_args.kwargs["batch_status"] == "SUCCESS"
+
+
+def test_deploy_async_renders_scripts_off_the_event_loop():
+    db_session = AsyncMock(db_type="POSTGRES", retries=0)
+    db_session.get_script_metadata.return_value = ({}, {}, None)
+    ticks = []
+
+    def slow_render_script(script, config):
+        time.sleep(0.1)
+        return "SELECT 1;", "checksum"
+
+    async def tick():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        ticker = asyncio.create_task(tick())
+        try:
+            await deploy_async(
+                config=get_config(render_ahead=0),
+                db_session=db_session,
+                logger=structlog.get_logger(),
+            )
+        finally:
+            ticker.cancel()
+
+    with patch.object(deploy, "get_deploy_scripts", return_value=SCRIPTS), patch.object(
+        deploy, "render_script", side_effect=slow_render_script
+    ):
+        asyncio.run(run())
+
+    # The event loop kept running while each script was rendered
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.08
+    assert db_session.apply_change_script.await_count == len(SCRIPTS)
+
+
+def get_batch_data(batch_status: str) -> ResultSet:
+    return ResultSet(
+        columns=["SCRIPT", "CHECKSUM", "BATCH_STATUS"],
+        rows=[("V1.0.0__script.sql", "checksum", batch_status)],
+    )
+
+
+def test_killed_batch_can_be_resumed():
+    checkpoint = ResultSet(
+        columns=["SCRIPT", "STATEMENT_INDEX"], rows=[("V1.0.1__script.sql", 3)]
+    )[0]
+
+    applied_scripts, checkpoints = check_resume_state(
+        batch_id="batch",
+        batch_data=get_batch_data(batch_status="IN_PROGRESS"),
+        checkpoints=[checkpoint],
+    )
+
+    assert applied_scripts == {"V1.0.0__script.sql": "checksum"}
+    assert checkpoints == {"V1.0.1__script.sql": checkpoint}
+
+
+def test_successful_batch_cannot_be_resumed():
+    with pytest.raises(ValueError, match="its status is SUCCESS"):
+        check_resume_state(
+            batch_id="batch",
+            batch_data=get_batch_data(batch_status="SUCCESS"),
+            checkpoints=[],
+        )
+
+
+def test_seed_recorded_with_legacy_checksum_is_not_reloaded(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_text("CODE,NAME\nFR,France\n")
+    script = SeedScript.from_path(file_path=file_path)
+    config = DeployConfig.factory(
+        config_file_path=Path("schemachange-config.yml"),
+        db_type="POSTGRES",
+        checksum_algorithm="blake2b",
+    )
+    content, checksum_current = render_script(script=script, config=config)
+    # Recorded as a bare sha224 hexdigest of the file before checksums were prefixed
+    legacy_checksum = hashlib.sha224(file_path.read_bytes()).hexdigest()
+
+    def classify(checksum_last: str) -> ScriptPlan:
+        return classify_script(
+            script=script,
+            content=content,
+            checksum_current=checksum_current,
+            config=config,
+            state=DeployState(
+                versioned_scripts={},
+                r_scripts_checksum={script.name: [checksum_last]},
+                max_published_version=[],
+                applied_scripts={},
+                checkpoints={},
+            ),
+            db_type="POSTGRES",
+            logger=structlog.get_logger(),
+        )
+
+    plan = classify(checksum_last=legacy_checksum)
+    assert not plan.apply
+    assert plan.legacy_checksum == legacy_checksum
+
+    file_path.write_text("CODE,NAME\nDE,Germany\n")
+    content, checksum_current = render_script(script=script, config=config)
+    assert classify(checksum_last=legacy_checksum).apply
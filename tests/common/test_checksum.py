@@ -0,0 +1,73 @@
+import pytest
+
+from schemachange.common.checksum import (
+    ChecksumAlgorithm,
+    checksum_matches,
+    file_checksum_matches,
+    get_checksum,
+    get_file_checksum,
+    parse_checksum,
+)
+
+LEGACY_SHA224 = "1424ebf029da1157d94a236c23bb527381a2a98a5b455091349501a9"
+
+
+def test_get_checksum_is_prefixed_with_algorithm():
+    assert get_checksum("SELECT data") == f"sha224:{LEGACY_SHA224}"
+    assert get_checksum("SELECT data", ChecksumAlgorithm.BLAKE2B).startswith("blake2b:")
+
+
+def test_get_file_checksum(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_bytes(b"SELECT data")
+
+    assert get_file_checksum(file_path=file_path) == f"sha224:{LEGACY_SHA224}"
+
+
+def test_get_checksum_xxh3():
+    pytest.importorskip("xxhash")
+    checksum = get_checksum("SELECT data", ChecksumAlgorithm.XXH3)
+    assert checksum.startswith("xxh3:")
+    assert checksum == get_checksum("SELECT data", ChecksumAlgorithm.XXH3)
+
+
+def test_get_checksum_invalid_algorithm():
+    with pytest.raises(ValueError) as excinfo:
+        get_checksum("SELECT data", "md5")
+    assert "Invalid value 'checksum_algorithm'" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "checksum, expected",
+    [
+        (LEGACY_SHA224, ("sha224", LEGACY_SHA224)),
+        (f"sha224:{LEGACY_SHA224}", ("sha224", LEGACY_SHA224)),
+        ("blake2b:abc", ("blake2b", "abc")),
+        ("unknown:abc", ("sha224", "unknown:abc")),
+    ],
+)
+def test_parse_checksum(checksum, expected):
+    assert parse_checksum(checksum) == expected
+
+
+def test_checksum_matches():
+    assert checksum_matches(LEGACY_SHA224, "SELECT data")
+    assert checksum_matches(f"sha224:{LEGACY_SHA224}", "SELECT data")
+    assert checksum_matches(
+        get_checksum("SELECT data", ChecksumAlgorithm.BLAKE2B), "SELECT data"
+    )
+    assert not checksum_matches(LEGACY_SHA224, "SELECT other_data")
+    assert not checksum_matches(None, "SELECT data")
+    assert not checksum_matches("", "SELECT data")
+
+
+def test_file_checksum_matches(tmp_path):
+    file_path = tmp_path / "S__data.csv"
+    file_path.write_text("SELECT data")
+
+    assert file_checksum_matches(LEGACY_SHA224, file_path)
+    assert file_checksum_matches(
+        get_checksum("SELECT data", ChecksumAlgorithm.BLAKE2B), file_path
+    )
+    assert not file_checksum_matches(get_checksum("SELECT other_data"), file_path)
+    assert not file_checksum_matches(None, file_path)
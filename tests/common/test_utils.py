@@ -5,6 +5,7 @@ from unittest.mock import patch
 import pytest
 from marshmallow import Schema, exceptions, fields
 
+from schemachange.common.schema import SnowflakeConnectorArgsSchema
 from schemachange.common.utils import (
     BaseEnum,
     get_config_secrets,
@@ -15,6 +16,7 @@ from schemachange.common.utils import (
     validate_config_vars,
     validate_directory,
     validate_file_path,
+    validate_script_content,
 )
 from tests.conftest import TEST_DIR
 
@@ -296,3 +298,28 @@ def test_get_connect_kwargs_redundant_param():
     with pytest.raises(exceptions.ValidationError) as excinfo:
         get_connect_kwargs(connections_info, MockSchema)
     assert "{'param4': ['Unknown field.']}" in str(excinfo.value)
+
+
+def test_get_connect_kwargs_rejects_snowflake_positional_paramstyle():
+    connections_info = {"account": "account", "paramstyle": "qmark"}
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        get_connect_kwargs(connections_info, SnowflakeConnectorArgsSchema)
+    assert "paramstyle" in str(excinfo.value)
+
+    connections_info["paramstyle"] = "pyformat"
+    result = get_connect_kwargs(connections_info, SnowflakeConnectorArgsSchema)
+    assert result["paramstyle"] == "pyformat"
+
+
+def test_validate_script_content_accepts_closing_parallel_marker():
+    validate_script_content(
+        script_name="V1__indexes.sql",
+        script_content="-- schemachange: parallel begin\nCREATE INDEX i1 ON t (a);\n"
+        "CREATE INDEX i2 ON t (b);\n-- schemachange: parallel end",
+    )
+
+    with pytest.raises(Exception, match="contains invalid statement"):
+        validate_script_content(
+            script_name="V1__indexes.sql",
+            script_content="CREATE INDEX i1 ON t (a);\n-- a trailing comment",
+        )
@@ -35,6 +35,7 @@ def test_get_merged_config():
                 "secrets": {"var3": "value3"},
             },
             "log_level": 20,
+            "checksum_algorithm": "sha224",
             "connections_file_path": TEST_DIR
             / "resource"
             / "connections_config_file.yml",
@@ -49,6 +50,30 @@ def test_get_merged_config():
             "force": False,
             "from_version": None,
             "to_version": None,
+            "resume_batch_id": None,
+            "checkpoint_statements": False,
+            "render_ahead": 2,
+            "parallelism": 1,
+            "infer_dependencies": False,
+            "connection_check_interval": 300,
+            "connection_retries": 1,
+            "statement_retries": 2,
+            "retry_backoff": 1.0,
+            "statement_batch_size": 1,
+            "insert_batch_size": 1,
+            "parallel_connections": 4,
+            "connection_pool_size": 4,
+            "max_statements_per_second": None,
+            "script_pause": None,
+            "health_check_query": None,
+            "health_check_timeout": 600.0,
+            "transactional_scripts": False,
+            "async_execution": False,
+            "result_policy": "discard",
+            "result_preview_rows": 10,
+            "result_export_folder": None,
+            "statement_timeout": None,
+            "script_timeout": None,
         }
 
 
@@ -89,5 +114,6 @@ def test_get_merged_config_for_render():
             "modules_folder": None,
             "config_vars": {},
             "log_level": 20,
+            "checksum_algorithm": "sha224",
             "script_path": Path("tests/resource/render_script.sql"),
         }
@@ -0,0 +1,226 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.async_base import AsyncBaseSession
+from schemachange.session.base import DatabaseType
+from schemachange.session.script import VersionedScript
+
+
+class DeadlockError(Exception):
+    pass
+
+
+class FakeCursor:
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self.description = [("VERSION",), ("SCRIPT",), ("CHECKSUM",)]
+        self.rowcount = 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, query, params=None):
+        session = self.connection.session
+        session.executed.append((query, params))
+        session.in_flight += 1
+        session.max_in_flight = max(session.max_in_flight, session.in_flight)
+        try:
+            # Gives the other tasks of the event loop a chance to run
+            await asyncio.sleep(session.delay)
+            if query in session.failing_statements:
+                raise ValueError("invalid")
+            if session.errors:
+                error = session.errors.pop(0)
+                if error is not None:
+                    raise error
+        finally:
+            session.in_flight -= 1
+
+    async def fetchmany(self, size):
+        return []
+
+
+class FakeConnection:
+    def __init__(self, session: "FakeAsyncSession"):
+        self.session = session
+
+    def cursor(self):
+        return FakeCursor(connection=self)
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncSession(AsyncBaseSession):
+    def __init__(self, **session_kwargs):
+        super().__init__(
+            session_kwargs={
+                "change_history_table": ChangeHistoryTable(),
+                "db_type": DatabaseType.POSTGRES,
+                "retry_backoff": 0,
+                **session_kwargs,
+            },
+            logger=structlog.get_logger(),
+        )
+        self.executed = []
+        self.errors = []
+        self.failing_statements = ()
+        self.delay = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _connect(self):
+        return FakeConnection(session=self)
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        return isinstance(error, DeadlockError)
+
+    async def fetch_change_history_metadata(self, table=None):
+        return [{"1": 1}]
+
+
+def apply_script(session: FakeAsyncSession, script_content: str):
+    return session.apply_change_script(
+        script=VersionedScript.from_path(file_path=Path("V1.0.0__script.sql")),
+        script_content=script_content,
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+    )
+
+
+def get_checkpoint_indexes(session: FakeAsyncSession):
+    return [
+        params["statement_index"]
+        for _, params in session.executed
+        if params and "statement_index" in params
+    ]
+
+
+def test_metadata_queries_run_concurrently():
+    session = FakeAsyncSession()
+    session.delay = 0.01
+
+    asyncio.run(
+        session.get_script_metadata(create_change_history_table=False, dry_run=False)
+    )
+
+    assert session.max_in_flight == 2
+
+
+def test_script_statements_run_in_order():
+    session = FakeAsyncSession(checkpoint_statements=True)
+
+    asyncio.run(
+        apply_script(
+            session=session,
+            script_content="INSERT INTO t VALUES (1);\nINSERT INTO t VALUES (2);",
+        )
+    )
+
+    executed = [
+        (query, params)
+        for query, params in session.executed
+        if "CHECKPOINT" not in query
+    ]
+    assert [query for query, _ in executed[:2]] == [
+        "INSERT INTO t VALUES (1);",
+        "INSERT INTO t VALUES (2);",
+    ]
+    assert executed[2][1]["status"] == "SUCCESS"
+    assert session.max_in_flight == 1
+    # The checkpoint follows the statements and is deleted once the script is applied
+    assert get_checkpoint_indexes(session) == [0, 1, 2]
+    assert session.executed[-1][0].startswith(
+        "DELETE FROM METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT"
+    )
+
+
+def test_transient_errors_are_retried():
+    session = FakeAsyncSession(statement_retries=1)
+    session.errors = [DeadlockError("deadlock"), None]
+
+    asyncio.run(session.execute_query(query="UPDATE t SET c = 1"))
+
+    assert session.retries == 1
+    assert len(session.executed) == 2
+
+
+def test_failed_statement_records_checkpoint():
+    session = FakeAsyncSession()
+    session.failing_statements = ("INSERT INTO t VALUES ('x');",)
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        asyncio.run(
+            apply_script(
+                session=session,
+                script_content="INSERT INTO t VALUES (1);\nINSERT INTO t VALUES ('x');",
+            )
+        )
+
+    # Only recorded once the script failed
+    assert get_checkpoint_indexes(session) == [1]
+
+
+def test_statement_past_its_timeout_is_cancelled():
+    session = FakeAsyncSession(statement_timeout=0.01)
+    session.delay = 0.2
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        asyncio.run(
+            apply_script(
+                session=session,
+                script_content="-- schemachange: script-timeout=0\n"
+                "UPDATE t SET c = 1;",
+            )
+        )
+
+    statuses = [params.get("status") for _, params in session.executed if params]
+    assert "TIMED_OUT" in statuses
+
+
+def test_transactional_scripts_are_not_supported():
+    with pytest.raises(ValueError):
+        FakeAsyncSession(transactional_scripts=True)
+
+
+@pytest.mark.parametrize(
+    "session_kwargs",
+    [
+        {"statement_batch_size": 10},
+        {"max_statements_per_second": 5},
+        {"script_pause": 1},
+        {"health_check_query": "SELECT 1"},
+        {"result_policy": "preview"},
+        {"async_execution": True},
+    ],
+)
+def test_unsupported_settings_are_rejected(session_kwargs):
+    with pytest.raises(ValueError, match="FakeAsyncSession does not support"):
+        FakeAsyncSession(**session_kwargs)
+
+
+def test_default_settings_are_accepted():
+    FakeAsyncSession(statement_batch_size=1, result_policy="discard")
+
+
+def test_parallel_blocks_are_not_supported():
+    session = FakeAsyncSession()
+
+    with pytest.raises(ValueError, match="Parallel blocks"):
+        asyncio.run(
+            apply_script(
+                session=session,
+                script_content="-- schemachange: parallel begin\n"
+                "CREATE INDEX i1 ON t (a);\nCREATE INDEX i2 ON t (b);",
+            )
+        )
+
+    assert session.executed == []
@@ -0,0 +1,1344 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import (
+    BaseSession,
+    BatchStatementError,
+    MAX_RETRY_BACKOFF,
+    DatabaseType,
+    ScriptStatementError,
+    StatementTimeoutError,
+    is_timeout,
+)
+from schemachange.session.chunking import CHUNK_RANGE_PLACEHOLDER, ChunkSettings
+from schemachange.session.script import (
+    SeedScript,
+    VersionedScript,
+    get_script_headers,
+    split_parallel_blocks,
+)
+
+
+class OperationalError(Exception):
+    pass
+
+
+class DeadlockError(Exception):
+    pass
+
+
+class FakeSession(BaseSession):
+    def _connect(self):
+        self.connect_count = getattr(self, "connect_count", 0) + 1
+        self._connection = MagicMock()
+        self._cursor = self._connection.cursor()
+        self._cursor.description = [("COL",)]
+        self._cursor.fetchmany.return_value = [(1,)]
+
+    def _is_transient_error(self, error: Exception) -> bool:
+        return isinstance(error, DeadlockError)
+
+
+def get_session(**session_kwargs) -> FakeSession:
+    return FakeSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.POSTGRES,
+            "retry_backoff": 0,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def test_cursor_does_not_probe_active_connection():
+    session = get_session(connection_check_interval=300)
+    session.execute_query("INSERT INTO t VALUES (1)")
+    session.execute_query("INSERT INTO t VALUES (2)")
+
+    assert session.liveness_probes == 0
+    executed = [call.args[0] for call in session._cursor.execute.call_args_list]
+    assert executed == ["INSERT INTO t VALUES (1)", "INSERT INTO t VALUES (2)"]
+
+
+def test_cursor_probes_idle_connection():
+    session = get_session(connection_check_interval=0)
+    session.execute_query("INSERT INTO t VALUES (1)")
+    session.execute_query("INSERT INTO t VALUES (2)")
+
+    assert session.liveness_probes == 1
+    assert session.connect_count == 1
+
+
+def test_cursor_reconnects_when_probe_fails():
+    session = get_session(connection_check_interval=0)
+    session.execute_query("INSERT INTO t VALUES (1)")
+    session._cursor.execute.side_effect = OperationalError("connection lost")
+    stale_connection = session._connection
+
+    session.execute_query("INSERT INTO t VALUES (2)")
+
+    assert session.liveness_probes == 1
+    assert session.reconnects == 1
+    assert session.connect_count == 2
+    stale_connection.close.assert_called_once()
+
+
+def test_execute_query_retries_connection_error():
+    session = get_session(connection_check_interval=-1, connection_retries=1)
+    _ = session.cursor
+    session._cursor.execute.side_effect = OperationalError("connection lost")
+
+    session.execute_query("INSERT INTO t VALUES (1)")
+
+    assert session.reconnects == 1
+    assert session.liveness_probes == 0
+    session._cursor.execute.assert_called_once_with("INSERT INTO t VALUES (1)")
+
+
+def test_execute_query_retries_are_bounded():
+    session = get_session(connection_check_interval=-1, connection_retries=0)
+    _ = session.cursor
+    session._cursor.execute.side_effect = OperationalError("connection lost")
+
+    with pytest.raises(OperationalError):
+        session.execute_query("INSERT INTO t VALUES (1)")
+    assert session.reconnects == 0
+
+
+def test_execute_query_does_not_retry_other_errors():
+    session = get_session(connection_check_interval=-1, connection_retries=3)
+    _ = session.cursor
+    session._cursor.execute.side_effect = ValueError("syntax error")
+
+    with pytest.raises(ValueError):
+        session.execute_query("INSERT INTO t VALUES (1)")
+    assert session.reconnects == 0
+
+
+def test_execute_query_retries_transient_error_without_reconnecting():
+    session = get_session(connection_check_interval=-1, statement_retries=2)
+    _ = session.cursor
+    session._cursor.execute.side_effect = [DeadlockError("deadlock"), None]
+
+    session.execute_query("INSERT INTO t VALUES (1)")
+
+    assert session.retries == 1
+    assert session.reconnects == 0
+    assert session._cursor.execute.call_count == 2
+
+
+def test_execute_query_transient_retries_are_bounded():
+    session = get_session(connection_check_interval=-1, statement_retries=2)
+    _ = session.cursor
+    session._cursor.execute.side_effect = DeadlockError("deadlock")
+
+    with pytest.raises(DeadlockError):
+        session.execute_query("INSERT INTO t VALUES (1)")
+    assert session._cursor.execute.call_count == 3
+
+
+def test_execute_query_does_not_retry_applied_statement():
+    # In autocommit mode, the statement may have been applied before the connection was lost
+    session = get_session(
+        connection_check_interval=-1, connection_retries=3, autocommit=True
+    )
+    _ = session.cursor
+    session._cursor.execute.side_effect = OperationalError("connection lost")
+
+    with pytest.raises(OperationalError):
+        session.execute_query("ALTER TABLE t ADD COLUMN c INT")
+    assert session.reconnects == 0
+
+
+def test_execute_query_retries_idempotent_statement():
+    session = get_session(
+        connection_check_interval=-1, connection_retries=3, autocommit=True
+    )
+    _ = session.cursor
+    session._cursor.execute.side_effect = OperationalError("connection lost")
+
+    session.execute_query("CREATE TABLE IF NOT EXISTS t (c INT)")
+    assert session.reconnects == 1
+
+
+def test_retry_delay_is_bounded():
+    session = get_session(retry_backoff=1.0)
+
+    assert 0 <= session._get_retry_delay(attempt=1) <= 1.0
+    assert 0 <= session._get_retry_delay(attempt=3) <= 4.0
+    assert session._get_retry_delay(attempt=20) <= MAX_RETRY_BACKOFF
+
+
+class ContextSession(FakeSession):
+    def _apply_session_context(self):
+        self.execute_query("USE DATABASE test_database")
+
+
+def get_context_session(**session_kwargs) -> ContextSession:
+    return ContextSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.SNOWFLAKE,
+            "connection_check_interval": -1,
+            "retry_backoff": 0,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def get_executed_queries(session: BaseSession):
+    return [call.args[0] for call in session._cursor.execute.call_args_list]
+
+
+def get_script_queries(session: BaseSession):
+    """Executed queries, without the ones on the checkpoint table"""
+    return [
+        query for query in get_executed_queries(session) if "CHECKPOINT" not in query
+    ]
+
+
+def get_checkpoint_positions(session: BaseSession):
+    """Statement index and chunk key of each checkpoint recorded or saved, in order"""
+    return [
+        (call.args[1]["statement_index"], call.args[1]["chunk_key"])
+        for call in session._cursor.execute.call_args_list
+        if len(call.args) > 1 and "statement_index" in call.args[1]
+    ]
+
+
+def fail_statement(session: BaseSession, statement: str, error: Exception):
+    def execute(query, params=None):
+        if query.endswith(statement):
+            raise error
+
+    _ = session.cursor
+    session._cursor.execute.side_effect = execute
+
+
+def test_autocommit_is_switched_only_when_state_changes():
+    session = get_session(connection_check_interval=-1)
+    session.set_autocommit = MagicMock()
+
+    session.execute_query("CREATE TABLE t1 (id INT)")
+    session.execute_query("CREATE TABLE t2 (id INT)")
+    session.execute_query("INSERT INTO t1 VALUES (1)")
+    session.execute_query("INSERT INTO t1 VALUES (2)")
+
+    assert [
+        call.kwargs["autocommit"] for call in session.set_autocommit.call_args_list
+    ] == [
+        True,
+        False,
+    ]
+
+
+def test_reset_session_is_skipped_while_context_is_unchanged():
+    session = get_context_session()
+    session.reset_session()
+    session.execute_query("CREATE TABLE t1 (id INT)")
+    session.reset_session()
+
+    assert get_executed_queries(session) == [
+        "USE DATABASE test_database",
+        "CREATE TABLE t1 (id INT)",
+    ]
+
+
+def test_reset_session_after_script_changes_context():
+    session = get_context_session()
+    session.reset_session()
+    session.execute_query("-- Switch database\nUSE DATABASE other_database")
+    session.reset_session()
+
+    assert get_executed_queries(session) == [
+        "USE DATABASE test_database",
+        "-- Switch database\nUSE DATABASE other_database",
+        "USE DATABASE test_database",
+    ]
+
+
+def test_session_state_is_reset_on_reconnect():
+    session = get_context_session()
+    session.reset_session()
+    session._reconnect()
+    assert session._autocommit_state is None
+    session.reset_session()
+
+    assert get_executed_queries(session) == ["USE DATABASE test_database"]
+
+
+class BatchingSession(FakeSession):
+    supports_statement_batching = True
+
+    def _execute_batch(self, queries):
+        self.batches = getattr(self, "batches", []) + [queries]
+
+
+def get_batching_session(**session_kwargs) -> BatchingSession:
+    return BatchingSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.POSTGRES,
+            "connection_check_interval": -1,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def test_get_statement_batches():
+    session = get_batching_session(statement_batch_size=2)
+    statements = [
+        "CREATE TABLE t1 (id INT);",
+        "CREATE TABLE t2 (id INT);",
+        "CREATE TABLE t3 (id INT);",
+        "INSERT INTO t1 VALUES (1);",
+        "-- Check the data\nSELECT * FROM t1;",
+        "INSERT INTO t1 VALUES (2);",
+        "USE DATABASE other_database;",
+        "INSERT INTO t1 VALUES (3);",
+    ]
+
+    assert session._get_statement_batches(statements=statements) == [
+        ["CREATE TABLE t1 (id INT);", "CREATE TABLE t2 (id INT);"],
+        ["CREATE TABLE t3 (id INT);"],
+        ["INSERT INTO t1 VALUES (1);"],
+        ["-- Check the data\nSELECT * FROM t1;"],
+        ["INSERT INTO t1 VALUES (2);"],
+        ["USE DATABASE other_database;"],
+        ["INSERT INTO t1 VALUES (3);"],
+    ]
+
+
+def test_execute_statements_without_batching():
+    session = get_batching_session(statement_batch_size=1)
+    session.execute_statements(
+        ["INSERT INTO t1 VALUES (1);", "INSERT INTO t1 VALUES (2);"]
+    )
+
+    assert not hasattr(session, "batches")
+    assert len(get_executed_queries(session)) == 2
+
+
+def test_execute_statements_with_batching():
+    session = get_batching_session(statement_batch_size=10)
+    session._commit = MagicMock()
+    session.execute_statements(
+        ["INSERT INTO t1 VALUES (1);", "INSERT INTO t1 VALUES (2);", "SELECT 1;"]
+    )
+
+    assert session.batches == [
+        ["INSERT INTO t1 VALUES (1);", "INSERT INTO t1 VALUES (2);"]
+    ]
+    assert get_executed_queries(session) == ["SELECT 1;"]
+    assert session._commit.call_count == 2
+
+
+def test_execute_batch_commits_statements_before_failing_one():
+    session = get_batching_session(statement_batch_size=10)
+    session._commit = MagicMock()
+    session._rollback = MagicMock()
+    session._execute_batch = MagicMock(
+        side_effect=BatchStatementError(
+            statement_index=1,
+            statement="INSERT INTO t1 VALUES ('x');",
+            message="invalid",
+        )
+    )
+
+    with pytest.raises(BatchStatementError) as excinfo:
+        session.execute_batch(
+            ["INSERT INTO t1 VALUES (1);", "INSERT INTO t1 VALUES ('x');"]
+        )
+
+    assert excinfo.value.statement_index == 1
+    assert "Failed to execute statement 2 of the batch: invalid" in str(excinfo.value)
+    session._commit.assert_called_once()
+    session._rollback.assert_not_called()
+
+
+def test_script_transaction_commits_once():
+    session = get_session(transactional_scripts=True)
+    with session.script_transaction():
+        session.execute_query("CREATE TABLE t (id INT)")
+        session.execute_query("INSERT INTO t VALUES (1)")
+        session.execute_query("INSERT INTO t VALUES (2)")
+
+    session._connection.commit.assert_called_once()
+    session._connection.rollback.assert_not_called()
+    assert session._connection.autocommit is False
+
+
+def test_script_transaction_rolls_back_on_failure():
+    session = get_session(transactional_scripts=True)
+    with pytest.raises(Exception, match="syntax error"):
+        with session.script_transaction():
+            session.execute_query("INSERT INTO t VALUES (1)")
+            session._cursor.execute.side_effect = Exception("syntax error")
+            session.execute_query("INSERT INTO t VALUES (")
+
+    session._connection.commit.assert_not_called()
+    session._connection.rollback.assert_called_once()
+
+
+def test_script_transaction_does_not_retry_connection_errors():
+    session = get_session(transactional_scripts=True, connection_retries=3)
+    with pytest.raises(OperationalError):
+        with session.script_transaction():
+            session._cursor.execute.side_effect = OperationalError("connection lost")
+            session.execute_query("INSERT INTO t VALUES (1)")
+
+    assert session.reconnects == 0
+
+
+def test_script_transaction_does_not_retry_transient_errors():
+    session = get_session(transactional_scripts=True, statement_retries=3)
+    with pytest.raises(DeadlockError):
+        with session.script_transaction():
+            session._cursor.execute.side_effect = DeadlockError("deadlock")
+            session.execute_query("INSERT INTO t VALUES (1)")
+
+    assert session.retries == 0
+
+
+def test_transactional_scripts_unsupported_database():
+    session = get_session(transactional_scripts=True, db_type=DatabaseType.MYSQL)
+    assert session.transactional_scripts is False
+
+    with session.script_transaction():
+        session.execute_query("INSERT INTO t VALUES (1)")
+    session._connection.commit.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "db_type, query, expected",
+    [
+        (DatabaseType.POSTGRES, "CREATE INDEX CONCURRENTLY idx ON t (id)", True),
+        (DatabaseType.POSTGRES, "vacuum analyze t", True),
+        (DatabaseType.POSTGRES, "ALTER TYPE mood ADD VALUE 'happy'", True),
+        (DatabaseType.POSTGRES, "CREATE INDEX idx ON t (id)", False),
+        (DatabaseType.SQL_SERVER, "ALTER DATABASE db SET RECOVERY SIMPLE", True),
+        (DatabaseType.SQL_SERVER, "ALTER TABLE t ADD c INT", False),
+        (DatabaseType.MYSQL, "CREATE DATABASE db", False),
+    ],
+)
+def test_is_non_transactional(db_type, query, expected):
+    session = get_session(db_type=db_type)
+    assert session._is_non_transactional(statement=query) is expected
+
+
+def test_non_transactional_statement_runs_in_autocommit():
+    session = get_session()
+    session.execute_query("VACUUM t")
+
+    assert session._connection.autocommit is True
+    session._connection.commit.assert_not_called()
+
+
+def test_non_transactional_statement_in_script_transaction():
+    session = get_session(transactional_scripts=True)
+    _ = session.cursor
+    autocommit_modes = []
+    session._connection.commit.side_effect = lambda: autocommit_modes.append(
+        session._autocommit_state
+    )
+    with session.script_transaction():
+        session.execute_query("INSERT INTO t VALUES (1)")
+        session.execute_query("CREATE INDEX CONCURRENTLY idx ON t (id)")
+        assert session._connection.autocommit is False
+        session.execute_query("INSERT INTO t VALUES (2)")
+
+    # The pending transaction is committed before the statement, then the rest at the end
+    assert autocommit_modes == [False, False]
+    assert session._cursor.execute.call_count == 3
+
+
+def test_script_rows_are_discarded_by_default():
+    session = get_session()
+    result_handler = session.get_result_handler(script_name="A__select.sql")
+    data = session.execute_query(query="SELECT 1", result_handler=result_handler)
+
+    assert data is None
+    session._cursor.fetchall.assert_not_called()
+    session._cursor.fetchmany.assert_not_called()
+
+
+def test_change_history_rows_are_materialised():
+    session = get_session()
+    data = session.execute_query(query="SELECT 1")
+
+    assert data.rows == [(1,)]
+    assert data[0]["col"] == 1
+    session._cursor.fetchall.assert_not_called()
+
+
+def test_script_rows_preview_is_bounded():
+    session = get_session(result_policy="preview", result_preview_rows=2)
+    session.cursor.fetchmany.return_value = [(1,), (2,)]
+    result_handler = session.get_result_handler(script_name="A__select.sql")
+    session.execute_query(query="SELECT 1", result_handler=result_handler)
+
+    session._cursor.fetchmany.assert_called_once_with(2)
+    session._cursor.fetchall.assert_not_called()
+
+
+def test_script_rows_are_exported(tmp_path):
+    session = get_session(result_policy="export", result_export_folder=str(tmp_path))
+    session.cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+    result_handler = session.get_result_handler(script_name="A__select.sql")
+    session.execute_statements(
+        statements=["INSERT INTO t1 VALUES (1);", "SELECT * FROM t1;"],
+        result_handler=result_handler,
+    )
+
+    assert (tmp_path / "A__select.1.csv").read_text().splitlines() == [
+        "COL",
+        "1",
+        "2",
+        "3",
+    ]
+    session._cursor.fetchall.assert_not_called()
+
+
+def test_export_result_policy_requires_folder():
+    session = get_session(result_policy="export")
+    with pytest.raises(ValueError):
+        session.get_result_handler(script_name="A__select.sql")
+
+
+def test_execute_statements_reports_failing_statement_index():
+    session = get_session()
+    _ = session.cursor
+    session._cursor.execute.side_effect = [None, None, ValueError("invalid")]
+
+    with pytest.raises(ScriptStatementError) as excinfo:
+        session.execute_statements(
+            statements=[
+                "INSERT INTO t1 VALUES (1);",
+                "INSERT INTO t1 VALUES (2);",
+                "INSERT INTO t1 VALUES ('x');",
+            ]
+        )
+
+    assert excinfo.value.statement_index == 2
+
+
+def test_execute_statements_reports_failing_statement_index_of_batch():
+    session = get_batching_session(statement_batch_size=10)
+    session._execute_batch = MagicMock(
+        side_effect=BatchStatementError(
+            statement_index=1,
+            statement="INSERT INTO t1 VALUES ('x');",
+            message="invalid",
+        )
+    )
+
+    with pytest.raises(ScriptStatementError) as excinfo:
+        session.execute_statements(
+            statements=[
+                "CREATE TABLE t1 (id INT);",
+                "INSERT INTO t1 VALUES (1);",
+                "INSERT INTO t1 VALUES ('x');",
+            ]
+        )
+
+    assert excinfo.value.statement_index == 2
+
+
+def test_apply_change_script_records_checkpoint():
+    session = get_session()
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    fail_statement(session, "INSERT INTO t1 VALUES (3);", ValueError("invalid"))
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content="INSERT INTO t1 VALUES (1);\nINSERT INTO t1 VALUES (2);\n"
+            "INSERT INTO t1 VALUES (3);",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+            start_statement_index=1,
+        )
+
+    assert get_script_queries(session) == [
+        "INSERT INTO t1 VALUES (2);",
+        "INSERT INTO t1 VALUES (3);",
+    ]
+    # Only recorded once the script failed
+    assert get_checkpoint_positions(session) == [(2, None)]
+
+
+def test_checkpoint_table_is_not_created_without_create_change_history_table():
+    session = get_session(checkpoint_statements=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[])
+    _ = session.cursor
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(ValueError, match="Unable to find checkpoint table"):
+        session.apply_change_script(
+            script=script,
+            script_content="INSERT INTO t1 VALUES (1);",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    # The script does not run without its checkpoint
+    assert get_executed_queries(session) == []
+
+
+def test_failed_checkpoint_save_stops_the_script():
+    session = get_session(checkpoint_statements=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+
+    def execute(query, params=None):
+        if query.startswith("UPDATE METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT"):
+            raise ValueError("lost")
+
+    _ = session.cursor
+    session._cursor.execute.side_effect = execute
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content="INSERT INTO t1 VALUES (1);\nUPDATE t1 SET a = 2;",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    # The next statement is not run, the checkpoint is recorded past the applied one
+    assert get_script_queries(session) == ["INSERT INTO t1 VALUES (1);"]
+    assert get_checkpoint_positions(session)[-1] == (1, None)
+    calls = session._cursor.execute.call_args_list
+    assert "DELETE FROM METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT" in (
+        calls[-2].args[0]
+    )
+    assert calls[-1].args[1]["script"] == "V1.0.0__script.sql"
+
+
+def test_apply_change_script_without_checkpoint_statements_skips_checkpoint():
+    session = get_session()
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    session.apply_change_script(
+        script=script,
+        script_content="INSERT INTO t1 VALUES (1);\nUPDATE t1 SET a = 2;",
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+    )
+
+    # No round trip on the checkpoint table for a successful script
+    assert get_script_queries(session) == get_executed_queries(session)
+
+
+def test_apply_change_script_saves_checkpoint_as_statements_complete():
+    session = get_session(checkpoint_statements=True, create_change_history_table=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[])
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    session.apply_change_script(
+        script=script,
+        script_content="INSERT INTO t1 VALUES (1);\nUPDATE t1 SET a = 2;",
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+    )
+
+    queries = get_executed_queries(session)
+    # The checkpoint table is created once per session
+    assert queries[0].startswith(
+        "CREATE TABLE METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT"
+    )
+    assert queries[4].startswith(
+        "UPDATE METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT"
+    )
+    assert get_checkpoint_positions(session) == [(0, None), (1, None), (2, None)]
+    # The checkpoint of the applied script is deleted after its change history row
+    assert "INSERT INTO METADATA.SCHEMACHANGE.CHANGE_HISTORY" in queries[-2]
+    assert queries[-1].startswith(
+        "DELETE FROM METADATA.SCHEMACHANGE.CHANGE_HISTORY_CHECKPOINT"
+    )
+    assert session._cursor.execute.call_args_list[-1].args[1] == {
+        "batch_id": "batch",
+        "script": "V1.0.0__script.sql",
+    }
+
+
+def test_transactional_script_records_checkpoint_only_on_failure():
+    session = get_session(transactional_scripts=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    fail_statement(session, "UPDATE t1 SET a = 2;", ValueError("invalid"))
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content="INSERT INTO t1 VALUES (1);\nUPDATE t1 SET a = 2;",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    # The rolled back script is resumed from its first statement
+    assert get_checkpoint_positions(session) == [(0, None)]
+
+
+class NativeTimeoutSession(FakeSession):
+    supports_statement_timeout = True
+
+    def set_statement_timeout(self, timeout):
+        self.cursor.execute(f"SET statement_timeout = {timeout}")
+
+
+def get_native_timeout_session(**session_kwargs) -> NativeTimeoutSession:
+    return NativeTimeoutSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.POSTGRES,
+            "retry_backoff": 0,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def test_get_script_headers():
+    headers = get_script_headers(
+        script_content="-- Orders index\n-- schemachange: statement-timeout=30\n"
+        "--SCHEMACHANGE: Script-Timeout = 120\nCREATE INDEX i ON t (c);\n"
+        "-- schemachange: statement-timeout=5"
+    )
+
+    assert headers == {"statement-timeout": "30", "script-timeout": "120"}
+
+
+def test_statement_timeout_is_set_only_when_it_changes():
+    session = get_native_timeout_session()
+    with session.script_timeouts(statement_timeout=30, script_timeout=None):
+        session.execute_statements(
+            statements=["INSERT INTO t VALUES (1);", "INSERT INTO t VALUES (2);"]
+        )
+    session.execute_query("INSERT INTO t VALUES (3)")
+
+    executed = [call.args[0] for call in session._cursor.execute.call_args_list]
+    assert executed == [
+        "SET statement_timeout = 30",
+        "INSERT INTO t VALUES (1);",
+        "INSERT INTO t VALUES (2);",
+        "SET statement_timeout = None",
+        "INSERT INTO t VALUES (3)",
+    ]
+
+
+def test_watchdog_cancels_statement_past_its_timeout():
+    session = get_session(statement_retries=1)
+    _ = session.cursor
+    cancelled = threading.Event()
+    session._connection.cancel.side_effect = cancelled.set
+
+    def execute(query):
+        # The statement runs until the watchdog cancels it
+        assert cancelled.wait(timeout=5)
+        raise OperationalError("canceling statement")
+
+    session._cursor.execute.side_effect = execute
+
+    with session.script_timeouts(statement_timeout=0.01, script_timeout=None):
+        with pytest.raises(ScriptStatementError) as excinfo:
+            session.execute_statements(statements=["SELECT pg_sleep(60);"])
+
+    assert isinstance(excinfo.value.__cause__, StatementTimeoutError)
+    assert session._cursor.execute.call_count == 1
+
+
+def test_script_timeout_stops_before_next_statement():
+    session = get_session()
+    with session.script_timeouts(statement_timeout=None, script_timeout=0.01):
+        session._script_deadline = 0
+        with pytest.raises(ScriptStatementError) as excinfo:
+            session.execute_statements(statements=["INSERT INTO t VALUES (1);"])
+
+    assert isinstance(excinfo.value.__cause__, StatementTimeoutError)
+    session._cursor.execute.assert_not_called()
+
+
+def test_batch_cancelled_by_watchdog_times_out():
+    session = get_batching_session(statement_batch_size=10)
+    _ = session.cursor
+    cancelled = threading.Event()
+    session._connection.cancel.side_effect = cancelled.set
+
+    def execute_batch(queries):
+        # The second statement of the batch runs until the watchdog cancels it
+        assert cancelled.wait(timeout=5)
+        raise BatchStatementError(
+            statement_index=1, statement=queries[1], message="canceling statement"
+        ) from OperationalError("canceling statement")
+
+    session._execute_batch = execute_batch
+
+    with session.script_timeouts(statement_timeout=0.01, script_timeout=None):
+        with pytest.raises(ScriptStatementError) as excinfo:
+            session.execute_statements(
+                statements=["INSERT INTO t VALUES (1);", "INSERT INTO t SELECT 2;"]
+            )
+
+    assert excinfo.value.statement_index == 1
+    assert is_timeout(excinfo.value)
+
+
+def test_late_statement_watchdog_does_not_cancel_next_statement():
+    session = get_session()
+    with session.script_timeouts(statement_timeout=60, script_timeout=None):
+        session.execute_query(query="INSERT INTO t VALUES (1);")
+        # The watchdog of the first statement fires once it completed
+        session._cancel_running_statement(statement=session._statement_count)
+        with session._bounded_statement():
+            session._cancel_running_statement(statement=1)
+            assert not session._statement_cancelled
+
+    session._connection.cancel.assert_not_called()
+
+
+def test_script_watchdog_firing_between_statements_stops_next_one():
+    session = get_session()
+    with session.script_timeouts(statement_timeout=None, script_timeout=60):
+        session.execute_query(query="INSERT INTO t VALUES (1);")
+        # Nothing runs when the script watchdog fires, the deadline stops the next one
+        session._script_deadline = time.monotonic()
+        session._cancel_running_statement()
+        with pytest.raises(StatementTimeoutError):
+            session.execute_query(query="INSERT INTO t VALUES (2);")
+
+    session._connection.cancel.assert_not_called()
+    assert get_executed_queries(session) == ["INSERT INTO t VALUES (1);"]
+
+
+def test_statement_failing_past_its_deadline_times_out():
+    session = get_session(statement_retries=1)
+    _ = session.cursor
+
+    def execute(query, params=None):
+        # The statement outlived its deadline before the watchdog cancelled it
+        session._statement_deadline = time.monotonic()
+        raise OperationalError("connection interrupted")
+
+    session._cursor.execute.side_effect = execute
+    with session.script_timeouts(statement_timeout=60, script_timeout=None):
+        with pytest.raises(StatementTimeoutError):
+            session.execute_query(query="SELECT pg_sleep(60);")
+
+
+def test_apply_change_script_records_timed_out_script():
+    session = get_native_timeout_session(statement_timeout=10)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    session._is_timeout_error = lambda error: "timeout" in str(error)
+    fail_statement(
+        session, "UPDATE t1 SET c = 1;", OperationalError("statement timeout")
+    )
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content="-- schemachange: statement-timeout=60\n"
+            "UPDATE t1 SET c = 1;",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    calls = session._cursor.execute.call_args_list
+    assert get_script_queries(session)[0] == "SET statement_timeout = 60.0"
+    assert calls[-3].args[1]["status"] == "TIMED_OUT"
+    assert "CHANGE_HISTORY_CHECKPOINT" in calls[-2].args[0]
+    assert get_checkpoint_positions(session)[-1] == (0, None)
+
+
+def test_change_history_statements_are_bound_and_prepared_once():
+    session = get_session()
+    session.update_batch_status(batch_id="batch-1", batch_status="SUCCESS")
+    session.update_batch_status(batch_id="it's", batch_status="FAILED")
+
+    first, second = session._cursor.execute.call_args_list
+    assert first.args[0] is second.args[0]
+    assert "%(batch_id)s" in first.args[0]
+    assert second.args[1] == {"batch_status": "FAILED", "batch_id": "it's"}
+
+
+def test_update_script_checksum_only_updates_latest_successful_row():
+    session = get_session()
+    session.update_script_checksum(
+        script_name="V1.1__script.sql",
+        script_type="V",
+        checksum="old",
+        checksum_current="new",
+    )
+
+    (call,) = session._cursor.execute.call_args_list
+    query = " ".join(call.args[0].split())
+    assert "AND STATUS = 'SUCCESS' AND INSTALLED_ON = ( SELECT MAX(" in query
+    assert query.count("STATUS = 'SUCCESS'") == 2
+    assert call.args[1] == {
+        "checksum_current": "new",
+        "script": "V1.1__script.sql",
+        "script_type": "V",
+        "checksum": "old",
+    }
+
+
+def test_bind_uses_paramstyle_of_driver():
+    session = get_session()
+    assert session.bind("batch_id") == "%(batch_id)s"
+    session.paramstyle = "named"
+    assert session.bind("batch_id") == ":batch_id"
+
+
+class AsyncExecutionSession(FakeSession):
+    supports_async_execution = True
+
+    def _submit_statement(self, cursor, query, params):
+        self.events.append(("submit", query))
+        return query
+
+    def _is_statement_running(self, cursor, query_id):
+        self.events.append(("poll", query_id))
+        status = self.statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+    def _fetch_statement_result(self, cursor, query_id):
+        self.events.append(("fetch", query_id))
+
+
+def get_async_execution_session(statuses, **session_kwargs) -> AsyncExecutionSession:
+    session = AsyncExecutionSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.SNOWFLAKE,
+            "async_execution": True,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+    session.events = []
+    session.statuses = statuses
+    return session
+
+
+def test_async_execution_polls_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr("schemachange.session.base.time.sleep", delays.append)
+    session = get_async_execution_session(statuses=[True, True, True, False])
+
+    session.execute_query("UPDATE t SET c = 1")
+
+    assert delays == [0.1, 0.2, 0.4]
+    assert session.events[0] == ("submit", "UPDATE t SET c = 1")
+    assert session.events[-1] == ("fetch", "UPDATE t SET c = 1")
+
+
+def test_async_execution_retries_failed_polls(monkeypatch):
+    monkeypatch.setattr("schemachange.session.base.time.sleep", lambda delay: None)
+    session = get_async_execution_session(
+        statuses=[OperationalError("network error"), False], connection_retries=1
+    )
+    session._is_poll_error = lambda error: isinstance(error, OperationalError)
+
+    session.execute_query("UPDATE t SET c = 1")
+
+    assert [event for event, _ in session.events] == ["submit", "poll", "poll", "fetch"]
+
+
+def test_fetch_concurrently_submits_all_queries_first(monkeypatch):
+    monkeypatch.setattr("schemachange.session.base.time.sleep", lambda delay: None)
+    session = get_async_execution_session(statuses=[False, False])
+
+    results = session.fetch_concurrently(queries=["SELECT 1", "SELECT 2"])
+
+    assert len(results) == 2
+    assert [event for event, _ in session.events] == [
+        "submit",
+        "submit",
+        "poll",
+        "fetch",
+        "poll",
+        "fetch",
+    ]
+
+
+def test_async_execution_unsupported_database():
+    session = get_session(async_execution=True)
+    assert not session.async_execution
+
+
+def test_coalesced_insert_failure_is_attributed_to_its_first_statement():
+    session = get_session(connection_check_interval=-1, insert_batch_size=2)
+    _ = session.cursor
+    session._cursor.execute.side_effect = [None, ValueError("invalid"), None]
+
+    with pytest.raises(ScriptStatementError) as excinfo:
+        session.execute_statements(
+            [
+                "INSERT INTO t1 VALUES (1);",
+                "INSERT INTO t1 VALUES (2);",
+                "INSERT INTO t1 VALUES (3);",
+                "INSERT INTO t1 VALUES ('x');",
+            ]
+        )
+
+    assert excinfo.value.statement_index == 2
+    assert get_executed_queries(session) == [
+        "INSERT INTO t1 VALUES\n(1),\n(2);",
+        "INSERT INTO t1 VALUES\n(3),\n('x');",
+    ]
+
+
+PARALLEL_SCRIPT = [
+    "CREATE TABLE t (a INT, b INT);",
+    "-- schemachange: parallel begin\nCREATE INDEX i1 ON t (a);",
+    "CREATE INDEX i2 ON t (b);",
+    "-- schemachange: parallel end\nINSERT INTO t VALUES (1, 1);",
+]
+
+
+def test_split_parallel_blocks():
+    assert split_parallel_blocks(
+        statements=[*PARALLEL_SCRIPT, "-- schemachange: parallel begin\nGRANT x;"]
+    ) == [
+        (0, PARALLEL_SCRIPT[:1], False),
+        (1, PARALLEL_SCRIPT[1:3], True),
+        (3, PARALLEL_SCRIPT[3:], False),
+        (4, ["-- schemachange: parallel begin\nGRANT x;"], True),
+    ]
+    # The marker closing a block at the end of the script is not a statement
+    assert split_parallel_blocks(
+        statements=[*PARALLEL_SCRIPT[:3], "-- schemachange: parallel end"]
+    ) == [(0, PARALLEL_SCRIPT[:1], False), (1, PARALLEL_SCRIPT[1:3], True)]
+
+
+class ParallelSession(FakeSession):
+    barrier = None
+    failing_statements = ()
+
+    def _connect(self):
+        super()._connect()
+        self._cursor.execute.side_effect = self.run_statement
+
+    def run_statement(self, query, params=None):
+        if query in self.failing_statements:
+            raise ValueError("invalid")
+        if self.barrier is not None and "INDEX" in query:
+            self.barrier.wait(timeout=5)
+
+
+def get_parallel_session(**session_kwargs) -> ParallelSession:
+    return ParallelSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.POSTGRES,
+            "connection_check_interval": -1,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def test_parallel_block_runs_statements_concurrently():
+    session = get_parallel_session(parallel_connections=2)
+    # Both indexes must be running at the same time to pass the barrier
+    ParallelSession.barrier = threading.Barrier(2)
+    try:
+        session.execute_statements(statements=PARALLEL_SCRIPT)
+    finally:
+        ParallelSession.barrier = None
+
+    assert session.pool.checkouts == 2
+    assert session.pool.available == session.connection_pool_size
+    assert get_executed_queries(session) == [PARALLEL_SCRIPT[0], PARALLEL_SCRIPT[3]]
+    session.close()
+    assert session._pool is None
+
+
+def test_parallel_block_failures_are_reported_per_statement():
+    session = get_parallel_session(parallel_connections=4)
+    session.logger = MagicMock()
+    ParallelSession.failing_statements = PARALLEL_SCRIPT[1:3]
+    try:
+        with pytest.raises(ScriptStatementError) as excinfo:
+            session.execute_statements(statements=PARALLEL_SCRIPT)
+    finally:
+        ParallelSession.failing_statements = ()
+
+    assert excinfo.value.statement_index == 1
+    failed_numbers = [
+        call.kwargs["statement_number"] for call in session.logger.error.call_args_list
+    ]
+    assert failed_numbers == [2, 3]
+    # The statements after the block are not run
+    assert get_executed_queries(session) == [PARALLEL_SCRIPT[0]]
+
+
+def test_parallel_block_resume_skips_statements_applied_by_siblings():
+    session = get_parallel_session(parallel_connections=2, checkpoint_statements=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+    script_content = "\n".join(PARALLEL_SCRIPT)
+    # The first index fails once the second one is applied
+    ParallelSession.failing_statements = PARALLEL_SCRIPT[1:2]
+    try:
+        with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+            session.apply_change_script(
+                script=script,
+                script_content=script_content,
+                dry_run=False,
+                logger=structlog.get_logger(),
+                batch_id="batch",
+            )
+    finally:
+        ParallelSession.failing_statements = ()
+
+    checkpoints = [
+        call.args[1]
+        for call in session._cursor.execute.call_args_list
+        if len(call.args) > 1 and "completed_statements" in call.args[1]
+    ]
+    # Saved as the sibling is applied, and recorded on failure
+    assert [
+        (params["statement_index"], params["completed_statements"])
+        for params in checkpoints[-2:]
+    ] == [(1, "2"), (1, "2")]
+
+    resumed = get_parallel_session(parallel_connections=2)
+    resumed.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    resumed.apply_change_script(
+        script=script,
+        script_content=script_content,
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+        start_statement_index=1,
+        completed_statements=[2],
+    )
+
+    assert get_script_queries(resumed)[:2] == [
+        PARALLEL_SCRIPT[1],
+        PARALLEL_SCRIPT[3],
+    ]
+    assert resumed.pool.checkouts == 0
+
+
+def test_parallel_block_runs_sequentially_with_one_connection():
+    session = get_parallel_session(parallel_connections=1)
+    session.execute_statements(statements=PARALLEL_SCRIPT)
+
+    assert session._pool is None
+    assert get_executed_queries(session) == PARALLEL_SCRIPT
+
+
+def test_health_check_runs_before_script_statements():
+    session = get_session(
+        connection_check_interval=-1, health_check_query="SELECT 1 AS HEALTHY"
+    )
+    session.execute_statements(
+        ["INSERT INTO t VALUES (1);", "INSERT INTO t VALUES (2);"]
+    )
+
+    # The passing health check is not repeated within its interval
+    assert get_executed_queries(session) == [
+        "SELECT 1 AS HEALTHY",
+        "INSERT INTO t VALUES (1);",
+        "INSERT INTO t VALUES (2);",
+    ]
+
+
+CHUNKED_SCRIPT = (
+    "-- schemachange: chunk-table=t1\n-- schemachange: chunk-key=id\n"
+    "-- schemachange: chunk-size=10\n"
+    f"UPDATE t1 SET a = 1 WHERE {CHUNK_RANGE_PLACEHOLDER};\n"
+    f"DELETE FROM t2 WHERE {CHUNK_RANGE_PLACEHOLDER};"
+)
+
+
+def test_apply_change_script_records_chunk_checkpoint():
+    session = get_session(connection_check_interval=-1)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    fail_statement(
+        session, "DELETE FROM t2 WHERE id >= 11 AND id < 21;", ValueError("invalid")
+    )
+    session._cursor.description = [("MIN_ID",), ("MAX_ID",)]
+    session._cursor.fetchmany.return_value = [(1, 25)]
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content=CHUNKED_SCRIPT,
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    assert [query.split("\n")[-1] for query in get_script_queries(session)[:5]] == [
+        "SELECT MIN(id), MAX(id) FROM t1",
+        "UPDATE t1 SET a = 1 WHERE id >= 1 AND id < 11;",
+        "DELETE FROM t2 WHERE id >= 1 AND id < 11;",
+        "SELECT MIN(id) FROM t1 WHERE id >= 11 AND id <= 25",
+        "UPDATE t1 SET a = 1 WHERE id >= 11 AND id < 21;",
+    ]
+    assert get_checkpoint_positions(session)[-1] == (1, "11")
+
+
+def test_chunked_script_resumes_from_key_saved_by_committed_chunk():
+    session = get_session(connection_check_interval=-1, checkpoint_statements=True)
+    session.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    # The run stops in the second chunk, before any of its statements is committed
+    fail_statement(
+        session, "UPDATE t1 SET a = 1 WHERE id >= 11 AND id < 21;", ValueError("lost")
+    )
+    session._cursor.fetchmany.return_value = [(1, 25)]
+    script = VersionedScript.from_path(file_path=Path("V1.0.0__script.sql"))
+
+    with pytest.raises(Exception, match="Failed to execute V1.0.0__script.sql"):
+        session.apply_change_script(
+            script=script,
+            script_content=CHUNKED_SCRIPT,
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    # Saved after each statement is committed, then on failure
+    assert get_checkpoint_positions(session) == [
+        (0, None),
+        (1, "1"),
+        (0, "11"),
+        (0, "11"),
+    ]
+
+    resumed = get_session(connection_check_interval=-1)
+    resumed.fetch_change_history_metadata = MagicMock(return_value=[{"1": 1}])
+    _ = resumed.cursor
+    resumed._cursor.fetchmany.return_value = [(1, 25)]
+    resumed.apply_change_script(
+        script=script,
+        script_content=CHUNKED_SCRIPT,
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+        start_statement_index=0,
+        start_chunk_key=11,
+    )
+
+    assert [query.split("\n")[-1] for query in get_script_queries(resumed)[:6]] == [
+        "SELECT MIN(id), MAX(id) FROM t1",
+        "UPDATE t1 SET a = 1 WHERE id >= 11 AND id < 21;",
+        "DELETE FROM t2 WHERE id >= 11 AND id < 21;",
+        "SELECT MIN(id) FROM t1 WHERE id >= 21 AND id <= 25",
+        "UPDATE t1 SET a = 1 WHERE id >= 21 AND id < 31;",
+        "DELETE FROM t2 WHERE id >= 21 AND id < 31;",
+    ]
+
+
+def test_chunked_statements_resume_from_chunk_key():
+    session = get_session(connection_check_interval=-1)
+    _ = session.cursor
+    session._cursor.fetchmany.return_value = [(1, 25)]
+
+    session.execute_chunked_statements(
+        statements=CHUNKED_SCRIPT.split("\n")[-2:],
+        chunk=ChunkSettings(table="t1", key="id", size=10),
+        start_statement_index=1,
+        start_chunk_key=11,
+    )
+
+    assert get_executed_queries(session)[1:] == [
+        "DELETE FROM t2 WHERE id >= 11 AND id < 21;",
+        "SELECT MIN(id) FROM t1 WHERE id >= 21 AND id <= 25",
+        "UPDATE t1 SET a = 1 WHERE id >= 21 AND id < 31;",
+        "DELETE FROM t2 WHERE id >= 21 AND id < 31;",
+    ]
+
+
+def test_chunked_statements_skip_key_gaps():
+    session = get_session(connection_check_interval=-1)
+    _ = session.cursor
+    # Keys 1 to 5, then 1000005 to 1000012
+    session._cursor.fetchmany.side_effect = [[(1, 1000012)], [(1000005,)], [(None,)]]
+
+    session.execute_chunked_statements(
+        statements=["DELETE FROM t2 WHERE " + CHUNK_RANGE_PLACEHOLDER + ";"],
+        chunk=ChunkSettings(table="t1", key="id", size=10),
+    )
+
+    assert get_executed_queries(session)[1:] == [
+        "DELETE FROM t2 WHERE id >= 1 AND id < 11;",
+        "SELECT MIN(id) FROM t1 WHERE id >= 11 AND id <= 1000012",
+        "DELETE FROM t2 WHERE id >= 1000005 AND id < 1000015;",
+    ]
+
+
+def test_apply_seed_script_replaces_table_rows(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_text("CODE,NAME\nFR,France\nDE,\n")
+    session = get_session(connection_check_interval=-1)
+    _ = session.cursor
+
+    session.apply_seed_script(
+        script=SeedScript.from_path(file_path=file_path),
+        checksum="sha224:0",
+        dry_run=False,
+        logger=structlog.get_logger(),
+        batch_id="batch",
+    )
+
+    executed = get_executed_queries(session)
+    assert executed[0] == "DELETE FROM countries"
+    assert "INSERT INTO METADATA.SCHEMACHANGE.CHANGE_HISTORY" in executed[1]
+    session._cursor.executemany.assert_called_once_with(
+        "INSERT INTO countries (CODE, NAME) VALUES (%(c0)s, %(c1)s)",
+        [{"c0": "FR", "c1": "France"}, {"c0": "DE", "c1": None}],
+    )
+    # The rows are deleted and loaded in one transaction
+    assert session._connection.commit.call_count == 2
+
+
+def test_failed_seed_load_is_rolled_back(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_text("CODE\nFR\n")
+    session = get_session(connection_check_interval=-1)
+    _ = session.cursor
+    session._cursor.executemany.side_effect = ValueError("invalid")
+
+    with pytest.raises(Exception, match="Failed to load S__countries.csv"):
+        session.apply_seed_script(
+            script=SeedScript.from_path(file_path=file_path),
+            checksum="sha224:0",
+            dry_run=False,
+            logger=structlog.get_logger(),
+            batch_id="batch",
+        )
+
+    assert get_executed_queries(session) == ["DELETE FROM countries"]
+    session._connection.rollback.assert_called_once()
+    session._connection.commit.assert_not_called()
@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+import jinja2
+import pytest
+
+from schemachange.jinja.jinja_template_processor import JinjaTemplateProcessor
+from schemachange.session.chunking import (
+    CHUNK_RANGE_PLACEHOLDER,
+    ChunkSettings,
+    get_chunk_settings,
+    get_key_value,
+)
+
+
+def test_chunk_settings_from_headers():
+    chunk = ChunkSettings.from_headers(
+        headers={
+            "chunk-table": "sales.orders",
+            "chunk-key": "order_id",
+            "chunk-size": "500",
+            "chunk-pause": "0.5",
+        }
+    )
+
+    assert chunk == ChunkSettings(
+        table="sales.orders", key="order_id", size=500, pause=0.5
+    )
+    assert ChunkSettings.from_headers(headers={"statement-timeout": "30"}) is None
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"chunk-key": "id"},
+        {"chunk-table": "t1", "chunk-key": "id", "chunk-size": "0"},
+        {"chunk-table": "t1", "chunk-key": "id", "chunk-pause": "soon"},
+    ],
+)
+def test_invalid_chunk_headers(headers):
+    with pytest.raises(ValueError):
+        ChunkSettings.from_headers(headers=headers)
+
+
+def test_get_chunks():
+    chunk = ChunkSettings(table="t1", key="id", size=10)
+
+    assert list(chunk.get_chunks(min_key=5, max_key=25)) == [
+        (5, 15),
+        (15, 25),
+        (25, 35),
+    ]
+    assert list(chunk.get_chunks(min_key=5, max_key=25, start_key=15)) == [
+        (15, 25),
+        (25, 35),
+    ]
+    assert list(chunk.get_chunks(min_key=5, max_key=5)) == [(5, 15)]
+
+
+def test_get_chunks_seeks_next_key():
+    chunk = ChunkSettings(table="t1", key="id", size=10)
+    keys = {15: 1000, 1010: None}
+
+    assert list(chunk.get_chunks(min_key=5, max_key=2000, next_key=keys.get)) == [
+        (5, 15),
+        (1000, 1010),
+    ]
+    assert chunk.next_key_query(key=15, max_key=2000) == (
+        "SELECT MIN(id) FROM t1 WHERE id >= 15 AND id <= 2000"
+    )
+
+
+def test_every_chunked_statement_uses_chunk_range():
+    headers = {"chunk-table": "t1", "chunk-key": "id"}
+
+    with pytest.raises(ValueError, match="chunk_range"):
+        get_chunk_settings(
+            headers=headers,
+            script_content=f"UPDATE t1 SET a = 1 WHERE {CHUNK_RANGE_PLACEHOLDER};\n"
+            "DELETE FROM t2;",
+        )
+    with pytest.raises(ValueError, match="chunk-key"):
+        get_chunk_settings(
+            headers={}, script_content=f"DELETE FROM t1 WHERE {CHUNK_RANGE_PLACEHOLDER}"
+        )
+
+
+def test_get_key_value():
+    assert get_key_value(Decimal("42")) == 42
+    assert get_key_value(None) is None
+    with pytest.raises(ValueError):
+        get_key_value(Decimal("4.2"))
+
+
+def test_chunk_range_is_rendered():
+    processor = JinjaTemplateProcessor(project_root="")
+    processor.override_loader(
+        jinja2.DictLoader({"test.sql": "DELETE FROM t1 WHERE {{ chunk_range }};"})
+    )
+
+    chunk = ChunkSettings(table="t1", key="id")
+
+    assert (
+        chunk.bind_chunk(
+            statement=processor.render("test.sql", None), lower=1, upper=10001
+        )
+        == "DELETE FROM t1 WHERE id >= 1 AND id < 10001;"
+    )
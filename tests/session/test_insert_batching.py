@@ -0,0 +1,94 @@
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import DatabaseType
+from schemachange.session.insert_batching import (
+    InsertValues,
+    coalesce_inserts,
+    parse_insert_values,
+)
+from schemachange.session.oracle_session import OracleSession
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        (
+            "INSERT INTO t1 VALUES (1, 'a);');",
+            InsertValues(target="t1", rows=["(1, 'a);')"], terminated=True),
+        ),
+        (
+            '-- Countries\ninsert into s."T"(a,  b) values (1, 2), (3, 4)',
+            InsertValues(
+                target='s."T" (a, b)', rows=["(1, 2)", "(3, 4)"], terminated=False
+            ),
+        ),
+        ("INSERT INTO t1 SELECT * FROM t2;", None),
+        ("INSERT INTO t1 VALUES (1) RETURNING id;", None),
+        ("INSERT INTO t1 VALUES (1) ON CONFLICT DO NOTHING;", None),
+        ("INSERT INTO t1 VALUES (1) -- trailing comment", None),
+        ("UPDATE t1 SET a = 1;", None),
+    ],
+)
+def test_parse_insert_values(statement, expected):
+    assert parse_insert_values(statement=statement) == expected
+
+
+def test_coalesce_inserts_into_the_same_table():
+    statements = [
+        "INSERT INTO t1 (a) VALUES (1);",
+        "INSERT INTO t1 (a) VALUES (2);",
+        "INSERT INTO t1 (a) VALUES (3);",
+        "INSERT INTO t1 (a, b) VALUES (4, 4);",
+        "UPDATE t1 SET a = 1;",
+        "INSERT INTO t1 (a) VALUES (5);",
+    ]
+
+    assert coalesce_inserts(statements=statements, batch_size=2) == [
+        (0, "INSERT INTO t1 (a) VALUES\n(1),\n(2);"),
+        (2, "INSERT INTO t1 (a) VALUES (3);"),
+        (3, "INSERT INTO t1 (a, b) VALUES (4, 4);"),
+        (4, "UPDATE t1 SET a = 1;"),
+        (5, "INSERT INTO t1 (a) VALUES (5);"),
+    ]
+
+
+def test_coalesce_inserts_respects_statement_limits():
+    statements = [f"INSERT INTO t1 VALUES ({i}), ({i + 1});" for i in range(6)]
+
+    by_rows = coalesce_inserts(statements=statements, batch_size=10, max_insert_rows=5)
+    by_length = coalesce_inserts(
+        statements=statements, batch_size=10, max_statement_length=100
+    )
+
+    assert [index for index, _ in by_rows] == [0, 2, 4]
+    assert [index for index, _ in by_length] == [0, 3]
+
+
+def test_coalesce_inserts_is_disabled_by_default():
+    statements = ["INSERT INTO t1 VALUES (1);", "INSERT INTO t1 VALUES (2);"]
+
+    assert coalesce_inserts(statements=statements, batch_size=1) == [
+        (0, statements[0]),
+        (1, statements[1]),
+    ]
+
+
+def test_oracle_coalesces_inserts_with_insert_all():
+    session = OracleSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "db_type": DatabaseType.ORACLE,
+            "insert_batch_size": 10,
+        },
+        logger=structlog.get_logger(),
+    )
+
+    _, statements = session.coalesce_inserts(
+        statements=["INSERT INTO t1 VALUES (1)", "INSERT INTO t1 VALUES (2)"]
+    )
+
+    assert statements == [
+        "INSERT ALL\nINTO t1 VALUES (1)\nINTO t1 VALUES (2)\nSELECT 1 FROM DUAL"
+    ]
@@ -0,0 +1,118 @@
+import pytest
+
+from schemachange.session.base import DatabaseType, normalize_statement
+from schemachange.session.lock_hazard import find_lock_hazards, lint_script_content
+
+
+def test_normalize_statement():
+    assert (
+        normalize_statement("-- comment\ncreate  index\n  idx ON t (a);")
+        == "CREATE INDEX IDX ON T (A);"
+    )
+
+
+@pytest.mark.parametrize(
+    "db_type, statement, rule",
+    [
+        (
+            DatabaseType.POSTGRES,
+            "CREATE INDEX idx_jobs_name ON jobs (name);",
+            "postgres-create-index-without-concurrently",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "CREATE UNIQUE INDEX idx_jobs_name ON jobs (name);",
+            "postgres-create-index-without-concurrently",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "DROP INDEX idx_jobs_name;",
+            "postgres-drop-index-without-concurrently",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ADD COLUMN uid UUID DEFAULT gen_random_uuid();",
+            "postgres-add-column-volatile-default",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ALTER COLUMN name TYPE TEXT;",
+            "postgres-alter-column-type",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ADD CONSTRAINT fk_owner FOREIGN KEY (owner_id) REFERENCES owners (id);",
+            "postgres-add-constraint-without-not-valid",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ALTER COLUMN name SET NOT NULL;",
+            "postgres-set-not-null",
+        ),
+        (DatabaseType.POSTGRES, "VACUUM FULL jobs;", "postgres-table-rewrite"),
+        (
+            DatabaseType.MYSQL,
+            "ALTER TABLE jobs ADD COLUMN owner INT;",
+            "mysql-alter-table-without-online-algorithm",
+        ),
+        (
+            DatabaseType.SQL_SERVER,
+            "CREATE NONCLUSTERED INDEX idx_jobs_name ON jobs (name);",
+            "sqlserver-index-build-without-online",
+        ),
+        (
+            DatabaseType.ORACLE,
+            "CREATE INDEX idx_jobs_name ON jobs (name)",
+            "oracle-create-index-without-online",
+        ),
+    ],
+)
+def test_find_lock_hazards(db_type, statement, rule):
+    lock_hazards = find_lock_hazards(statement=statement, db_type=db_type)
+    assert [lock_hazard.rule for lock_hazard in lock_hazards] == [rule]
+    assert lock_hazards[0].statement == statement
+
+
+@pytest.mark.parametrize(
+    "db_type, statement",
+    [
+        (DatabaseType.POSTGRES, "CREATE INDEX CONCURRENTLY idx ON jobs (name);"),
+        (DatabaseType.POSTGRES, "DROP INDEX CONCURRENTLY idx;"),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ADD COLUMN created TIMESTAMP DEFAULT now();",
+        ),
+        (
+            DatabaseType.POSTGRES,
+            "ALTER TABLE jobs ADD CONSTRAINT fk_owner FOREIGN KEY (owner_id) REFERENCES owners (id) NOT VALID;",
+        ),
+        (DatabaseType.POSTGRES, "CREATE TABLE jobs (id INT);"),
+        (DatabaseType.POSTGRES, "INSERT INTO jobs VALUES ('CREATE INDEX x ON y (z)');"),
+        (
+            DatabaseType.MYSQL,
+            "ALTER TABLE jobs ADD COLUMN owner INT, ALGORITHM=INSTANT;",
+        ),
+        (
+            DatabaseType.SQL_SERVER,
+            "CREATE INDEX idx ON jobs (name) WITH (ONLINE = ON);",
+        ),
+        (DatabaseType.SNOWFLAKE, "ALTER TABLE jobs ALTER COLUMN name SET NOT NULL;"),
+        (DatabaseType.DATABRICKS, "CREATE INDEX idx ON jobs (name);"),
+    ],
+)
+def test_find_lock_hazards_safe_statements(db_type, statement):
+    assert find_lock_hazards(statement=statement, db_type=db_type) == []
+
+
+def test_lint_script_content():
+    script_content = """\
+        CREATE TABLE jobs (id INT, name TEXT);
+        -- Build the index without blocking writes
+        CREATE INDEX CONCURRENTLY idx_jobs_id ON jobs (id);
+        CREATE INDEX idx_jobs_name ON jobs (name);
+    """
+    lock_hazards = lint_script_content(
+        script_content=script_content, db_type=DatabaseType.POSTGRES
+    )
+    assert len(lock_hazards) == 1
+    assert lock_hazards[0].statement == "CREATE INDEX idx_jobs_name ON jobs (name);"
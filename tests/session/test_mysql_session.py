@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import DatabaseType, StatementTimeoutError
+from schemachange.session.mysql_session import MySQLSession
+
+
+def get_session(**session_kwargs) -> MySQLSession:
+    return MySQLSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.MYSQL,
+            "connection_check_interval": -1,
+            "connections_info": {"host": "localhost", "user": "deploy"},
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+@patch("mysql.connector.connect")
+def test_statement_past_its_timeout_is_killed_from_another_connection(connect):
+    connection, kill_connection = MagicMock(), MagicMock()
+    connection.connection_id = 42
+    connect.side_effect = [connection, kill_connection]
+    killed = threading.Event()
+    kill_connection.cursor().execute.side_effect = lambda query: killed.set()
+
+    def run_statement(query, params=None):
+        # The statement runs until it is killed
+        assert killed.wait(timeout=5)
+        raise Exception("Query execution was interrupted")
+
+    connection.cursor().execute.side_effect = run_statement
+    session = get_session()
+
+    with pytest.raises(StatementTimeoutError):
+        with session.script_timeouts(statement_timeout=0.01, script_timeout=None):
+            session.execute_query(query="UPDATE t1 SET a = 1")
+
+    kill_connection.cursor().execute.assert_called_once_with("KILL QUERY 42")
+    kill_connection.close.assert_called_once()
+    # max_execution_time is not set, it would only bound SELECT statements
+    executed = [call.args[0] for call in connection.cursor().execute.call_args_list]
+    assert executed == ["UPDATE t1 SET a = 1"]
+
+
+class DeadlockError(Exception):
+    errno = 1213
+
+
+@patch("mysql.connector.connect")
+def test_deadlock_in_a_batch_reruns_the_batch_without_autocommit(connect):
+    connection = MagicMock()
+    connect.return_value = connection
+    cursor = connection.cursor()
+    # The first statement of the batch succeeds, the second one is chosen as the
+    # deadlock victim and the transaction is rolled back
+    cursor.nextset.side_effect = DeadlockError("Deadlock found")
+    session = get_session(statement_batch_size=10, statement_retries=1)
+    statements = [
+        "UPDATE t1 SET a = 1;",
+        "UPDATE t2 SET a = 2;",
+        "UPDATE t3 SET a = 3;",
+    ]
+
+    session.execute_statements(statements=statements)
+
+    executed = [call.args[0] for call in cursor.execute.call_args_list]
+    assert executed == ["\n".join(statements), *statements]
+    connection.rollback.assert_called()
@@ -0,0 +1,53 @@
+import pytest
+
+from schemachange.session.object_references import (
+    get_script_objects,
+    names_match,
+    parse_object_name,
+)
+
+
+def test_created_and_referenced_objects():
+    objects = get_script_objects(script_content="""
+        -- Orders of the last day, FROM archive.orders is not read
+        CREATE OR REPLACE SECURE VIEW sales."Recent_Orders" AS
+        WITH totals AS (SELECT order_id, SUM(amount) AS amount FROM sales.order_lines GROUP BY 1)
+        SELECT o.*, t.amount, 'FROM fake_table' AS label
+        FROM sales.orders o
+        JOIN totals t ON t.order_id = o.order_id
+        LEFT JOIN [dbo].[customers] c ON c.id = o.customer_id;
+        """)
+
+    assert objects.created == {("SALES", "RECENT_ORDERS")}
+    assert objects.referenced == {
+        ("SALES", "ORDER_LINES"),
+        ("SALES", "ORDERS"),
+        ("DBO", "CUSTOMERS"),
+    }
+
+
+@pytest.mark.parametrize(
+    "statement, created",
+    [
+        ("CREATE VIEW v1 AS SELECT 1", ("V1",)),
+        ("CREATE MATERIALIZED VIEW IF NOT EXISTS s.v1 AS SELECT 1", ("S", "V1")),
+        ("CREATE OR ALTER PROCEDURE dbo.p1 AS SELECT 1", ("DBO", "P1")),
+        ("create or replace function `db`.f1() returns int", ("DB", "F1")),
+    ],
+)
+def test_created_object_kinds(statement, created):
+    assert get_script_objects(script_content=statement).created == {created}
+
+
+def test_objects_created_by_the_script_are_not_references():
+    objects = get_script_objects(
+        script_content="CREATE TABLE t1 (id INT);\nINSERT INTO t1 SELECT id FROM t1;"
+    )
+
+    assert objects.referenced == set()
+
+
+def test_names_match_when_one_is_qualified_further():
+    assert names_match(parse_object_name("db.sales.orders"), ("SALES", "ORDERS"))
+    assert names_match(parse_object_name('"Orders"'), ("SALES", "ORDERS"))
+    assert not names_match(("OTHER", "ORDERS"), ("SALES", "ORDERS"))
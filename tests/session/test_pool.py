@@ -0,0 +1,137 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import BaseSession, DatabaseType
+
+
+class OperationalError(Exception):
+    pass
+
+
+class ContextSession(BaseSession):
+    def _connect(self):
+        self.connect_count = getattr(self, "connect_count", 0) + 1
+        self._connection = MagicMock()
+        self._cursor = self._connection.cursor()
+        self._cursor.description = [("COL",)]
+        self._cursor.fetchmany.return_value = [(1,)]
+
+    def _apply_session_context(self):
+        self.execute_query("USE WAREHOUSE test_warehouse")
+
+
+def get_session(**session_kwargs) -> ContextSession:
+    return ContextSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": DatabaseType.SNOWFLAKE,
+            "connection_check_interval": -1,
+            "retry_backoff": 0,
+            **session_kwargs,
+        },
+        logger=structlog.get_logger(),
+    )
+
+
+def get_executed_queries(session: BaseSession):
+    return [call.args[0] for call in session._cursor.execute.call_args_list]
+
+
+def test_sessions_are_opened_up_to_the_pool_size():
+    session = get_session(connection_pool_size=2)
+
+    first = session.pool.acquire()
+    second = session.pool.acquire()
+
+    assert first is not session and second is not first
+    assert session.pool.acquire(block=False) is None
+    assert session.pool.acquire(timeout=0.01) is None
+    # Pooled sessions share the limits and the pool of the session
+    assert first.throttle is session.throttle
+    assert first.pool is session.pool
+
+    session.pool.release(session=second)
+
+    assert session.pool.acquire(block=False) is second
+    assert session.pool.checkouts == 3
+
+
+def test_checkout_replays_the_session_context():
+    session = get_session()
+
+    pooled = session.pool.acquire()
+    session.pool.release(session=pooled)
+    assert session.pool.acquire() is pooled
+
+    assert pooled.connect_count == 1
+    assert get_executed_queries(pooled) == ["USE WAREHOUSE test_warehouse"]
+
+
+def test_checkout_reconnects_a_lost_connection():
+    session = get_session(connection_check_interval=0)
+    pooled = session.pool.acquire()
+    session.pool.release(session=pooled)
+    pooled._cursor.execute.side_effect = OperationalError("connection lost")
+
+    assert session.pool.acquire() is pooled
+
+    assert pooled.reconnects == 1
+    assert pooled.connect_count == 2
+    # The new connection gets the session context back
+    assert get_executed_queries(pooled)[-1] == "USE WAREHOUSE test_warehouse"
+
+
+def test_session_is_lent_per_thread():
+    session = get_session(connection_pool_size=2)
+    barrier = threading.Barrier(2)
+    lent = {}
+
+    def run(name):
+        with session.pool.session() as outer:
+            with session.pool.session() as inner:
+                assert inner is outer
+            barrier.wait(timeout=5)
+            lent[name] = outer
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert lent["a"] is not lent["b"]
+    assert session.pool.available == 2
+    assert session.pool.checkouts == 2
+
+
+def test_session_times_out_when_the_pool_is_exhausted():
+    session = get_session(connection_pool_size=1)
+    pooled = session.pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        with session.pool.session(timeout=0.01):
+            pass
+
+    session.pool.release(session=pooled)
+
+
+def test_pool_is_closed_with_its_owner():
+    session = get_session()
+    pool = session.pool
+    first = pool.acquire()
+    second = pool.acquire()
+    connection = second._connection
+
+    # Closing a pooled session leaves the pool open
+    first.close()
+    assert session._pool is pool
+    connection.close.assert_not_called()
+
+    session.close()
+    assert session._pool is None
+    connection.close.assert_called_once()
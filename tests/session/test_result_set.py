@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from schemachange.session.result_set import ResultSet
+
+
+def get_cursor(rows, columns=("VERSION", "SCRIPT", "CHECKSUM")) -> MagicMock:
+    cursor = MagicMock()
+    cursor.description = [(column,) for column in columns]
+    cursor.fetchmany.side_effect = [rows[i : i + 2] for i in range(0, len(rows), 2)] + [
+        []
+    ]
+    return cursor
+
+
+def test_from_cursor_fetches_in_chunks():
+    rows = [
+        ("1", "V1__a.sql", "c1"),
+        ("2", "V2__b.sql", "c2"),
+        ("3", "V3__c.sql", "c3"),
+    ]
+    cursor = get_cursor(rows=rows)
+    result_set = ResultSet.from_cursor(cursor=cursor, fetch_size=2)
+
+    assert result_set.rows == rows
+    assert result_set.columns == ["version", "script", "checksum"]
+    assert cursor.fetchmany.call_count == 2
+    cursor.fetchall.assert_not_called()
+
+
+def test_iter_values():
+    result_set = ResultSet(
+        columns=["VERSION", "SCRIPT", "CHECKSUM"],
+        rows=[("1", "V1__a.sql", "c1"), ("2", "V2__b.sql", "c2")],
+    )
+
+    assert list(result_set.iter_values("script", "checksum")) == [
+        ("V1__a.sql", "c1"),
+        ("V2__b.sql", "c2"),
+    ]
+    assert list(result_set.iter_values("version")) == [("1",), ("2",)]
+
+
+def test_row_access_by_column_name():
+    result_set = ResultSet(columns=["SCRIPT", "CHECKSUM"], rows=[("V1__a.sql", "c1")])
+
+    assert len(result_set) == 1
+    assert result_set[0]["script"] == "V1__a.sql"
+    assert result_set[0].get("update_time") is None
+    assert list(result_set) == [{"script": "V1__a.sql", "checksum": "c1"}]
+
+
+def test_empty_result_set_is_falsy():
+    assert not ResultSet(columns=["SCRIPT"], rows=[])
@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import pytest
+
+from schemachange.session.object_references import get_script_objects
+from schemachange.session.script import script_factory
+from schemachange.session.script_graph import (
+    ScriptGraph,
+    get_depends_on,
+    get_implicit_dependencies,
+)
+
+SCRIPTS = [
+    script_factory(file_path=Path(name))
+    for name in [
+        "V1.0.0__tables.sql",
+        "V1.0.1__columns.sql",
+        "S__countries.csv",
+        "R__customers.sql",
+        "R__orders.sql",
+        "R__report.sql",
+        "A__grants.sql",
+    ]
+]
+
+
+def test_get_depends_on():
+    headers = {"depends-on": "R__customers.sql,,R__orders.sql"}
+
+    assert get_depends_on(headers=headers) == ["R__customers.sql", "R__orders.sql"]
+    assert get_depends_on(headers={}) == []
+
+
+def test_implicit_dependencies_follow_the_apply_order_of_script_types():
+    assert get_implicit_dependencies(scripts=SCRIPTS) == {
+        "V1.0.0__tables.sql": set(),
+        "V1.0.1__columns.sql": {"V1.0.0__tables.sql"},
+        "S__countries.csv": {"V1.0.1__columns.sql"},
+        "R__customers.sql": {"S__countries.csv"},
+        "R__orders.sql": {"S__countries.csv"},
+        "R__report.sql": {"S__countries.csv"},
+        "A__grants.sql": {"R__customers.sql", "R__orders.sql", "R__report.sql"},
+    }
+
+
+def test_scripts_are_ready_once_their_dependencies_are_done():
+    graph = ScriptGraph(scripts=SCRIPTS[3:])
+
+    graph.add(name="R__customers.sql", item="customers")
+    graph.add(name="R__orders.sql", item="orders")
+    # Declared on a script planned later
+    graph.add(
+        name="R__report.sql",
+        item="report",
+        depends_on=["R__customers.sql", "A__grants.sql"],
+    )
+
+    assert graph.pop_ready() == ["customers", "orders"]
+    graph.mark_done(name="R__customers.sql")
+    graph.mark_done(name="R__orders.sql")
+    assert graph.pop_ready() == []
+    assert graph.pending == 1
+
+
+def test_circular_dependencies_are_rejected():
+    graph = ScriptGraph(scripts=SCRIPTS[3:6])
+    graph.add(name="R__customers.sql", item=1, depends_on=["R__report.sql"])
+    graph.add(name="R__orders.sql", item=2, depends_on=["R__customers.sql"])
+
+    with pytest.raises(ValueError, match="Circular dependency between scripts") as e:
+        graph.add(name="R__report.sql", item=3, depends_on=["R__orders.sql"])
+
+    assert "R__report.sql -> R__orders.sql -> R__customers.sql -> R__report.sql" in str(
+        e.value
+    )
+
+
+def test_dependencies_on_unknown_scripts_are_rejected():
+    graph = ScriptGraph(scripts=SCRIPTS)
+
+    with pytest.raises(ValueError, match="R__missing.sql"):
+        graph.add(name="R__orders.sql", item=1, depends_on=["R__missing.sql"])
+
+
+def test_repeatable_scripts_depend_on_the_scripts_creating_what_they_read():
+    graph = ScriptGraph(scripts=SCRIPTS[3:6], infer_dependencies=True)
+    contents = {
+        "R__customers.sql": "CREATE OR REPLACE VIEW sales.customers_v AS "
+        "SELECT * FROM customers",
+        "R__orders.sql": "CREATE OR REPLACE VIEW orders_v AS SELECT * FROM orders o "
+        "JOIN sales.customers_v c ON c.id = o.customer_id",
+        "R__report.sql": "CREATE OR REPLACE VIEW report AS SELECT * FROM orders_v",
+    }
+
+    for name in ["R__report.sql", "R__orders.sql"]:
+        graph.add(
+            name=name,
+            item=name,
+            objects=get_script_objects(script_content=contents[name]),
+        )
+        # Held until the objects of every repeatable script are known
+        assert graph.pop_ready() == []
+    graph.add(
+        name="R__customers.sql",
+        item="R__customers.sql",
+        objects=get_script_objects(script_content=contents["R__customers.sql"]),
+    )
+
+    applied = []
+    ready = graph.pop_ready()
+    while ready:
+        for name in ready:
+            applied.append(name)
+            graph.mark_done(name=name)
+        ready = graph.pop_ready()
+    assert applied == ["R__customers.sql", "R__orders.sql", "R__report.sql"]
+
+
+def test_inferred_circular_dependencies_are_rejected():
+    graph = ScriptGraph(scripts=SCRIPTS[3:5], infer_dependencies=True)
+    graph.add(
+        name="R__customers.sql",
+        item=1,
+        objects=get_script_objects(script_content="CREATE VIEW a AS SELECT * FROM b"),
+    )
+
+    with pytest.raises(ValueError, match="inferred from the objects"):
+        graph.add(
+            name="R__orders.sql",
+            item=2,
+            objects=get_script_objects(
+                script_content="CREATE VIEW b AS SELECT * FROM a"
+            ),
+        )
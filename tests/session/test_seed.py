@@ -0,0 +1,162 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pyarrow
+import pyarrow.parquet
+import pytest
+import structlog
+
+from schemachange.action.deploy import (
+    DeployState,
+    classify_script,
+    get_deploy_scripts,
+    render_script,
+)
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.config.deploy_config import DeployConfig
+from schemachange.session.base import DatabaseType
+from schemachange.session.mysql_session import MySQLSession
+from schemachange.session.script import SeedScript, script_factory
+from schemachange.session.seed import (
+    SeedFormat,
+    get_csv_line_terminator,
+    iter_seed_batches,
+    read_seed_columns,
+)
+from schemachange.session.snowflake_session import get_table_stage
+
+
+def test_seed_script_from_path():
+    script = script_factory(file_path=Path("S__REFERENCE.COUNTRIES.csv"))
+
+    assert script == SeedScript(
+        name="S__REFERENCE.COUNTRIES.csv",
+        file_path=Path("S__REFERENCE.COUNTRIES.csv"),
+        description="Reference.countries",
+        table="REFERENCE.COUNTRIES",
+        format=SeedFormat.CSV,
+    )
+
+
+def test_only_seed_data_files_are_deployed(tmp_path):
+    for file_name in [
+        "V1.0.0__create_countries.sql",
+        "R__countries_view.sql",
+        "S__countries.csv",
+        "S__currencies.PARQUET",
+        "V1.0.1__data.csv",
+        "countries.csv",
+    ]:
+        (tmp_path / file_name).write_text("")
+
+    scripts = get_deploy_scripts(root_folder=tmp_path)
+
+    assert [script.name for script in scripts] == [
+        "V1.0.0__create_countries.sql",
+        "S__countries.csv",
+        "S__currencies.PARQUET",
+        "R__countries_view.sql",
+    ]
+
+
+def test_csv_seed_rows(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_bytes(
+        '\ufeffCODE, NAME,CAPITAL\r\nFR,France,Paris\r\nXX,"Nowhere, Land",\r\n'.encode()
+    )
+
+    assert read_seed_columns(file_path=file_path, seed_format="csv") == [
+        "CODE",
+        "NAME",
+        "CAPITAL",
+    ]
+    assert list(iter_seed_batches(file_path=file_path, seed_format="csv")) == [
+        [("FR", "France", "Paris"), ("XX", "Nowhere, Land", None)]
+    ]
+    assert list(
+        iter_seed_batches(file_path=file_path, seed_format="csv", batch_size=1)
+    ) == [[("FR", "France", "Paris")], [("XX", "Nowhere, Land", None)]]
+    assert get_csv_line_terminator(file_path=file_path) == "\r\n"
+
+
+def test_parquet_seed_rows(tmp_path):
+    file_path = tmp_path / "S__currencies.parquet"
+    pyarrow.parquet.write_table(
+        pyarrow.table({"CODE": ["EUR", "USD", "XXX"], "DIGITS": [2, 2, None]}),
+        file_path,
+    )
+
+    assert read_seed_columns(file_path=file_path, seed_format="parquet") == [
+        "CODE",
+        "DIGITS",
+    ]
+    assert list(
+        iter_seed_batches(file_path=file_path, seed_format="parquet", batch_size=2)
+    ) == [[("EUR", 2), ("USD", 2)], [("XXX", None)]]
+
+
+@pytest.mark.parametrize(
+    "table, expected",
+    [
+        ("COUNTRIES", "@%COUNTRIES"),
+        ("REFERENCE.COUNTRIES", "@REFERENCE.%COUNTRIES"),
+        ("DB.REFERENCE.COUNTRIES", "@DB.REFERENCE.%COUNTRIES"),
+    ],
+)
+def test_get_table_stage(table, expected):
+    assert get_table_stage(table=table) == expected
+
+
+def test_seed_is_reloaded_when_its_file_changes(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_text("CODE\nFR\n")
+    script = SeedScript.from_path(file_path=file_path)
+    config = DeployConfig.factory(
+        config_file_path=Path("schemachange-config.yml"), db_type="POSTGRES"
+    )
+    content, checksum = render_script(script=script, config=config)
+
+    def classify(checksum_last: str):
+        return classify_script(
+            script=script,
+            content=content,
+            checksum_current=checksum,
+            config=config,
+            state=DeployState(
+                versioned_scripts={},
+                r_scripts_checksum={script.name: [checksum_last]},
+                max_published_version=[],
+                applied_scripts={},
+                checkpoints={},
+            ),
+            db_type="POSTGRES",
+            logger=structlog.get_logger(),
+        )
+
+    assert not classify(checksum_last=checksum).apply
+    assert classify(checksum_last="sha224:0").apply
+
+
+def test_mysql_loads_csv_seed_with_load_data(tmp_path):
+    file_path = tmp_path / "S__countries.csv"
+    file_path.write_text("CODE,NAME\nFR,France\n")
+    session = MySQLSession(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "db_type": DatabaseType.MYSQL,
+            "connections_info": {"allow_local_infile": True},
+        },
+        logger=structlog.get_logger(),
+    )
+    session._connection = MagicMock()
+    session._cursor = session._connection.cursor()
+    session._cursor.rowcount = 1
+
+    rows = session.load_seed(script=SeedScript.from_path(file_path=file_path))
+
+    query, params = session._cursor.execute.call_args.args
+    assert rows == 1
+    assert params == (str(file_path.resolve()),)
+    assert "LOAD DATA LOCAL INFILE %s\nINTO TABLE countries" in query
+    assert "LINES TERMINATED BY '\\n'" in query
+    assert "SET CODE = NULLIF(@c0, ''), NAME = NULLIF(@c1, '')" in query
@@ -0,0 +1,70 @@
+from unittest.mock import MagicMock
+
+import pytest
+import structlog
+
+from schemachange.config.change_history_table import ChangeHistoryTable
+from schemachange.session.base import BatchStatementError, DatabaseType
+from schemachange.session.mysql_session import MySQLSession
+from schemachange.session.postgres_session import PostgresSession
+
+QUERIES = [
+    "INSERT INTO t1 VALUES (1);",
+    "INSERT INTO t1 VALUES ('x');",
+    "INSERT INTO t1 VALUES (3) -- last one",
+]
+
+
+def get_session(session_class, db_type):
+    session = session_class(
+        session_kwargs={
+            "change_history_table": ChangeHistoryTable(),
+            "autocommit": False,
+            "db_type": db_type,
+            "connection_check_interval": -1,
+            "statement_batch_size": 10,
+        },
+        logger=structlog.get_logger(),
+    )
+    session._connection = MagicMock()
+    session._cursor = session._connection.cursor()
+    return session
+
+
+def test_mysql_batch_is_sent_in_one_round_trip():
+    session = get_session(MySQLSession, DatabaseType.MYSQL)
+    session._cursor.nextset.side_effect = [True, True, None]
+
+    session.execute_batch(QUERIES)
+
+    session._cursor.execute.assert_called_once_with(
+        "INSERT INTO t1 VALUES (1);\n"
+        "INSERT INTO t1 VALUES ('x');\n"
+        "INSERT INTO t1 VALUES (3) -- last one\n;"
+    )
+
+
+def test_mysql_batch_error_is_attributed_to_failing_statement():
+    session = get_session(MySQLSession, DatabaseType.MYSQL)
+    session._cursor.nextset.side_effect = Exception("Incorrect integer value: 'x'")
+
+    with pytest.raises(BatchStatementError) as excinfo:
+        session.execute_batch(QUERIES)
+
+    assert excinfo.value.statement_index == 1
+    assert excinfo.value.statement == "INSERT INTO t1 VALUES ('x');"
+    session._connection.commit.assert_called_once()
+
+
+def test_postgres_batch_error_is_attributed_by_replaying_statements():
+    session = get_session(PostgresSession, DatabaseType.POSTGRES)
+    session._cursor.rowcount = 1
+    error = Exception("invalid input syntax for type integer")
+    session._cursor.execute.side_effect = [error, None, error]
+
+    with pytest.raises(BatchStatementError) as excinfo:
+        session.execute_batch(QUERIES)
+
+    assert excinfo.value.statement_index == 1
+    executed = [call.args[0] for call in session._cursor.execute.call_args_list]
+    assert executed[1:] == QUERIES[:2]
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from schemachange.session import throttle
+from schemachange.session.throttle import (
+    HEALTH_CHECK_INTERVAL,
+    HealthCheckTimeoutError,
+    Throttle,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch.object(throttle, "time", fake_clock):
+        yield fake_clock
+
+
+def test_statements_are_rate_limited(clock):
+    statement_throttle = Throttle(logger=MagicMock(), max_statements_per_second=4)
+
+    statement_throttle.before_statements()
+    statement_throttle.before_statements()
+    statement_throttle.before_statements(statements=2)
+    statement_throttle.before_statements()
+
+    assert clock.sleeps == [0.25, 0.25, 0.5]
+    assert statement_throttle.throttled_time == 1.0
+
+
+def test_scripts_are_paused(clock):
+    statement_throttle = Throttle(logger=MagicMock(), script_pause=10)
+
+    statement_throttle.before_script()
+    statement_throttle.after_script()
+    clock.now += 4
+    statement_throttle.before_script()
+
+    assert clock.sleeps == [6]
+
+
+def test_statements_wait_for_the_health_check(clock):
+    health_check = MagicMock(side_effect=[False, False, True, True])
+    statement_throttle = Throttle(logger=MagicMock(), health_check=health_check)
+
+    statement_throttle.before_statements()
+    # Passing checks are not repeated before every statement
+    statement_throttle.before_statements()
+
+    assert clock.sleeps == [HEALTH_CHECK_INTERVAL, HEALTH_CHECK_INTERVAL]
+    assert health_check.call_count == 3
+
+
+def test_health_check_timeout(clock):
+    statement_throttle = Throttle(
+        logger=MagicMock(),
+        health_check=MagicMock(return_value=False),
+        health_check_timeout=12,
+    )
+
+    with pytest.raises(HealthCheckTimeoutError):
+        statement_throttle.before_statements()
+
+    assert len(clock.sleeps) == 3
+
+
+def test_throttle_is_disabled_by_default(clock):
+    statement_throttle = Throttle(logger=MagicMock())
+
+    for _ in range(10):
+        statement_throttle.before_script()
+        statement_throttle.before_statements()
+        statement_throttle.after_script()
+
+    assert clock.sleeps == []
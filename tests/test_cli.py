@@ -1,6 +1,8 @@
 import os
 from unittest.mock import patch
 
+import pytest
+
 from structlog.testing import capture_logs
 
 from schemachange.cli import main
@@ -33,10 +35,58 @@ def test_render():
         assert render_log[0]["content"] == "SELECT data"
         assert (
             render_log[0]["checksum"]
-            == "1424ebf029da1157d94a236c23bb527381a2a98a5b455091349501a9"
+            == "sha224:1424ebf029da1157d94a236c23bb527381a2a98a5b455091349501a9"
         )
 
 
+@patch(
+    "sys.argv",
+    [
+        "script_name.py",
+        SubCommand.LINT,
+        "--db-type",
+        "MYSQL",
+        "--root-folder",
+        "tests/resource/scripts/",
+    ],
+)
+def test_lint():
+    with mock_structlog_logger() as _:
+        with capture_logs() as cap_logs:
+            main()
+
+        lint_log = [
+            item
+            for item in cap_logs
+            if item["event"] == "Completed successfully" and item["log_level"] == "info"
+        ]
+        assert len(lint_log) > 0
+        assert lint_log[0]["scripts_checked"] == 4
+
+
+@patch(
+    "sys.argv",
+    [
+        "script_name.py",
+        SubCommand.LINT,
+        "--db-type",
+        "POSTGRES",
+        "--root-folder",
+        "tests/resource/lint_scripts/",
+    ],
+)
+def test_lint_lock_hazards():
+    with mock_structlog_logger() as _:
+        with capture_logs() as cap_logs:
+            with pytest.raises(Exception) as excinfo:
+                main()
+        assert "found 1 lock hazards in 1 scripts" in str(excinfo.value)
+
+        hazard_log = [item for item in cap_logs if item["log_level"] == "warning"]
+        assert len(hazard_log) == 1
+        assert hazard_log[0]["rule"] == "postgres-create-index-without-concurrently"
+
+
 @patch(
     "sys.argv",
     [